@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from db_connection import connect
+from db_services import StadiumService
+from db_setup import setup_database
+
+
+def prepare_database(path, tickets, users):
+    setup_database(path)
+    service = StadiumService(connect(path))
+    event_id = service.create('events', {
+        'event_name': 'Benchmark Match', 'event_type': 'sports', 'event_holder': 'Benchmark',
+        'event_start': '2030-01-01 18:00:00', 'event_end': '2030-01-01 21:00:00'})
+    service.generate_tickets(event_id, {'sitting': tickets})
+    user_ids = [service.create('users', {'name': f'User {i}', 'email': f'user{i}@bench.test'}) for i in range(users)]
+    service.conn.close()
+    return event_id, user_ids
+
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"API server did not start on {host}:{port}")
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    data = await reader.readexactly(length) if length else b''
+    return status, data
+
+
+async def sale_client(host, port, event_id, jobs, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while jobs:
+            user_id = jobs.pop()
+            started = time.perf_counter()
+            status, _ = await request(reader, writer, 'POST', f'/events/{event_id}/sales',
+                                      {'seat': 'sitting', 'quantity': 1, 'user_id': user_id})
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, event_id, jobs, concurrency):
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    await asyncio.gather(*(sale_client(host, port, event_id, jobs, latencies, statuses) for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, statuses
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Requests/sec benchmark for the ticket-sale path of db_api.")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        event_id, user_ids = prepare_database(path, args.requests, 100)
+        jobs = [user_ids[i % len(user_ids)] for i in range(args.requests)]
+
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_api.py'),
+                                   '--db', path, '--port', str(args.port), '--pool-size', str(args.pool_size)])
+        try:
+            wait_for_port('127.0.0.1', args.port)
+            seconds, latencies, statuses = asyncio.run(run_load('127.0.0.1', args.port, event_id, jobs, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    results = {
+        'path': 'POST /events/{id}/sales',
+        'requests': len(latencies),
+        'concurrency': args.concurrency,
+        'pool_size': args.pool_size,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(len(latencies) / seconds, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'statuses': statuses,
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            print(f"{key:>20}: {value}")
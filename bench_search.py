@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db_connection import connect
+from db_generate import FIRST_NAMES, LAST_NAMES, WORDS
+from db_search import search_all
+from db_setup import setup_database
+
+QUERIES = ('alice smith', 'kravtsov', 'tr', 'derby', 'gala 12', 'festival walker', 'zzzz', 'rossi')
+
+
+def prepare_database(path, users, events, staff, seed):
+    rng = random.Random(seed)
+    setup_database(path)
+    conn = connect(path)
+    with conn:
+        conn.executemany("INSERT INTO Kravtsov_Users (name, email) VALUES (?, ?)",
+                         ((f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"user{i}@bench.test")
+                          for i in range(users)))
+        start = datetime(2030, 1, 1)
+        conn.executemany("INSERT INTO Kravtsov_Events (event_name, event_type, event_start, event_end, event_holder) "
+                         "VALUES (?, 'sports', ?, ?, ?)",
+                         ((f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", start + timedelta(hours=i),
+                           start + timedelta(hours=i + 2), rng.choice(LAST_NAMES)) for i in range(events)))
+        conn.executemany("INSERT INTO Kravtsov_Staff (staff_name, staff_email, phone_number, position, schedule_start, schedule_end, salary) "
+                         "VALUES (?, ?, '555-0100', 'Usher', '08:00', '16:00', 30000.0)",
+                         ((f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"staff{i}@bench.test")
+                          for i in range(staff)))
+    return conn
+
+
+def timed(task, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = task()
+        timings.append(time.perf_counter() - started)
+    return max(timings), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the unified full-text search over a large generated database.")
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--staff', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = prepare_database(os.path.join(tmp, 'bench.db'), args.users, args.events, args.staff, args.seed)
+        results = {'rows': args.users + args.events + args.staff}
+        for query in QUERIES:
+            worst, found = timed(lambda: search_all(conn, query), args.repeat)
+            results[query] = {'worst_ms': round(worst * 1000, 2), 'results': len(found)}
+        conn.close()
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            print(f"{key:>18}: {value}")
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db_connection import connect
+from db_setup import setup_database
+from db_staff import available_staff, available_staff_on, event_ranges, shift_ranges
+
+# The per-row strftime CASE query the staff lookup used before shifts were indexed,
+# with 'unixepoch' added now that event times are stored as epoch seconds.
+LEGACY_QUERY = """
+SELECT
+    s.staff_name,
+    s.position,
+    s.schedule_start,
+    s.schedule_end
+FROM Kravtsov_Staff s
+JOIN Kravtsov_Events e ON e.event_id = ?
+WHERE
+CASE
+    WHEN strftime('%H:%M', s.schedule_start) < strftime('%H:%M', s.schedule_end) THEN
+        NOT (
+            strftime('%H:%M', e.event_end, 'unixepoch') <= strftime('%H:%M', s.schedule_start)
+            OR
+            strftime('%H:%M', e.event_start, 'unixepoch') > strftime('%H:%M', s.schedule_end)
+        )
+    ELSE
+        NOT (
+            (strftime('%H:%M', e.event_end, 'unixepoch') <= strftime('%H:%M', s.schedule_start)
+            AND strftime('%H:%M', e.event_start, 'unixepoch') < strftime('%H:%M', s.schedule_end))
+            OR
+            (strftime('%H:%M', e.event_start, 'unixepoch') > strftime('%H:%M', s.schedule_end)
+            AND strftime('%H:%M', e.event_end, 'unixepoch') >= strftime('%H:%M', s.schedule_start))
+         )
+END
+ORDER BY e.event_start
+"""
+
+DAY = datetime(2030, 6, 1)
+
+
+def prepare_database(path, staff, events, seed):
+    rng = random.Random(seed)
+    setup_database(path)
+    conn = connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO Kravtsov_Staff (staff_name, staff_email, phone_number, position, schedule_start, schedule_end, salary) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((f"Staff {i}", f"staff{i}@bench.test", '555-0100', rng.choice(('Usher', 'Security', 'Catering')),
+              f"{(start := rng.randrange(96) * 15) // 60:02d}:{start % 60:02d}",
+              f"{(start + rng.choice((240, 360, 480, 600))) % 1440 // 60:02d}:{(start % 60):02d}",
+              30000.0) for i in range(staff)))
+        for i in range(events):
+            start = DAY + timedelta(minutes=rng.randrange(96) * 15)
+            end = start + timedelta(minutes=rng.choice((90, 120, 180, 240)))
+            conn.execute("INSERT INTO Kravtsov_Events (event_name, event_type, event_start, event_end, event_holder) "
+                         "VALUES (?, 'sports', ?, ?, 'Bench')",
+                         (f"Event {i}", start, end))
+    return conn
+
+
+def timed(task, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = task()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def brute_force(conn, event_id):
+    event_start, event_end = conn.execute(
+        "SELECT event_start, event_end FROM Kravtsov_Events WHERE event_id = ?", (event_id,)).fetchone()
+    windows = event_ranges(event_start, event_end)
+    return sorted(staff_id for staff_id, start, end in conn.execute(
+        "SELECT staff_id, schedule_start, schedule_end FROM Kravtsov_Staff")
+        if any(s < we and e > ws for s, e in shift_ranges(start, end) for ws, we in windows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy staff-availability query with the shift index.")
+    parser.add_argument('--staff', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = prepare_database(os.path.join(tmp, 'bench.db'), args.staff, args.events, args.seed)
+        event_ids = [row[0] for row in conn.execute("SELECT event_id FROM Kravtsov_Events ORDER BY event_id")]
+
+        legacy, legacy_rows = timed(lambda: [conn.execute(LEGACY_QUERY, (event_id,)).fetchall() for event_id in event_ids],
+                                    args.repeat)
+        per_event, _ = timed(lambda: [available_staff(conn, [event_id]) for event_id in event_ids], args.repeat)
+        batched, batched_rows = timed(lambda: available_staff_on(conn, DAY), args.repeat)
+
+        mismatched = [event_id for event_id in event_ids[:3]
+                      if [row[0] for row in batched_rows[event_id]] != brute_force(conn, event_id)]
+        conn.close()
+
+    results = {
+        'staff': args.staff,
+        'events': len(event_ids),
+        'legacy_seconds': round(legacy, 4),
+        'per_event_seconds': round(per_event, 4),
+        'batched_day_seconds': round(batched, 4),
+        'speedup_per_event': round(legacy / per_event, 1),
+        'speedup_batched': round(legacy / batched, 1),
+        'legacy_rows': sum(len(rows) for rows in legacy_rows),
+        'indexed_rows': sum(len(rows) for rows in batched_rows.values()),
+        'brute_force_mismatches': mismatched,
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for key, value in results.items():
+            print(f"{key:>24}: {value}")
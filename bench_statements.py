@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from collections import OrderedDict
+
+from db_bench import TABS, load_tab
+from db_connection import connect, DEFAULT_STATEMENT_CACHE
+from db_generate import generate, scale_counts
+from db_queries import QUERIES
+from db_services import StadiumService, ConflictError
+from db_setup import setup_database
+
+PYTHON_DEFAULT_CACHE = 128
+# Sort orders the GUI offers per tab, so a round pages with the statements a session builds.
+ORDERS = {'events': (None, 'event_start', 'event_holder'), 'tickets': (None, 'status'), 'staff': (None, 'position')}
+
+
+class RecordingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self.connection.record(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.record(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class RecordingConnection(sqlite3.Connection):
+    # Records the SQL text handed to execute, the key the statement cache looks up;
+    # the trace callback only sees it with the parameters already expanded. Nothing is
+    # recorded until `statements` is set, after connect() has run its PRAGMAs.
+    statements = None
+
+    def record(self, sql):
+        if self.statements is not None:
+            self.statements.append(sql)
+
+    def cursor(self, factory=RecordingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def hit_rate(statements, size, passes=2):
+    # The connection keeps its compiled statements in an LRU keyed by SQL text. A session
+    # repeats the round, so the rate reported is that of the last of `passes` rounds.
+    cache = OrderedDict()
+    for _ in range(passes):
+        hits = 0
+        for sql in statements:
+            if sql in cache:
+                hits += 1
+                cache.move_to_end(sql)
+            elif size:
+                cache[sql] = None
+                if len(cache) > size:
+                    cache.popitem(last=False)
+    return hits / len(statements) if statements else 0.0
+
+
+def operations(conn, seed):
+    # The hot insert/update/lookup paths, each taking the round number to vary its ids.
+    rng = random.Random(seed)
+    service = StadiumService(conn)
+    def ids(table, key):
+        values = [row[0] for row in conn.execute(f"SELECT {key} FROM {table}")]
+        return rng.sample(values, min(100, len(values)))
+
+    event_ids, user_ids = ids('Kravtsov_Events', 'event_id'), ids('Kravtsov_Users', 'user_id')
+    staff_ids, facility_ids = ids('Kravtsov_Staff', 'staff_id'), ids('Kravtsov_Facilities', 'facility_id')
+    item_ids = ids('Kravtsov_Equipment', 'item_id')
+    at = lambda values, run: values[run % len(values)]
+    created = []
+
+    def insert_user(run):
+        created.append(service.create('users', {'name': f"Bench {run}", 'email': f"bench{run}@statements.test"}))
+
+    def hold_and_release(run):
+        event_id, user_id = at(event_ids, run), at(user_ids, run)
+        try:
+            service.hold_tickets(event_id, 'sitting', 1, user_id)
+        except ConflictError:
+            pass
+        service.ticket_counts(event_id)
+        service.release_hold(user_id)
+
+    ops = {
+        'insert_user': insert_user,
+        'update_user': lambda run: service.update('users', created[-1], {'name': f"Bench {run}b"}),
+        'get_event': lambda run: service.get('events', at(event_ids, run)),
+        'update_event': lambda run: service.update('events', at(event_ids, run), {}),
+        'lookup_user_tickets': lambda run: service.user_tickets(at(user_ids, run)),
+        'lookup_staff_facilities': lambda run: service.staff_facilities(at(staff_ids, run)),
+        'lookup_facilities_events': lambda run: service.facility_events(at(facility_ids, run)),
+        'lookup_equipment_events': lambda run: service.equipment_events(at(item_ids, run)),
+        'lookup_staff_events': lambda run: service.available_staff(at(event_ids, run)),
+        'hold_and_release': hold_and_release,
+        'delete_user': lambda run: service.delete('users', created.pop()),
+    }
+    for name in TABS:
+        for order in ORDERS.get(name, (None,)):
+            ops[f'load_{name}' + (f'_by_{order}' if order else '')] = lambda run, name=name, order=order: load_tab(conn, name, order)
+    return ops
+
+
+def measure(path, size, rounds, seed):
+    # Median latency per operation over `rounds` rounds, after one warm-up round.
+    conn = connect(path, cached_statements=size)
+    ops = operations(conn, seed)
+    timings = {name: [] for name in ops}
+    for run in range(rounds + 1):
+        for name, op in ops.items():
+            started = time.perf_counter()
+            op(run)
+            if run:
+                timings[name].append(time.perf_counter() - started)
+    conn.close()
+    return {name: statistics.median(values) * 1000 for name, values in timings.items()}
+
+
+def record(path, seed):
+    # The SQL text of one round, as the statement cache sees it.
+    conn = connect(path, factory=RecordingConnection)
+    conn.statements = []
+    ops = operations(conn, seed)
+    del conn.statements[:]
+    for op in ops.values():
+        op(0)
+    statements = conn.statements
+    conn.close()
+    return statements
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Statement-cache hit rate and latency of the hot service paths.")
+    parser.add_argument('--tickets', type=int, default=20000, help="scale of the generated database")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    sizes = (0, PYTHON_DEFAULT_CACHE, DEFAULT_STATEMENT_CACHE)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'statements.db')
+        setup_database(path)
+        conn = connect(path)
+        generate(conn, scale_counts(args.tickets), args.seed)
+        conn.close()
+
+        statements = record(path, args.seed)
+        latencies = {size: measure(path, size, args.rounds, args.seed) for size in sizes}
+
+    results = {
+        'statements_per_round': len(statements),
+        'distinct_statements': len(set(statements)),
+        'registered_queries': len(QUERIES),
+        'hit_rate': {size: round(hit_rate(statements, size), 3) for size in sizes},
+        'median_ms': {name: {size: round(latencies[size][name], 4) for size in sizes} for name in latencies[sizes[0]]},
+    }
+    results['saved_ms'] = {name: round(by_size[0] - by_size[DEFAULT_STATEMENT_CACHE], 4)
+                           for name, by_size in results['median_ms'].items()}
+
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{results['statements_per_round']} statements per round, {results['distinct_statements']} distinct "
+              f"({results['registered_queries']} registered queries)")
+        for size in sizes:
+            print(f"cached_statements={size:<4} steady-state hit rate {results['hit_rate'][size]:.1%}")
+        print(f"{'operation':>28} " + ' '.join(f"{f'cache {size}':>11}" for size in sizes) + f" {'saved':>9}")
+        for name, by_size in results['median_ms'].items():
+            print(f"{name:>28} " + ' '.join(f"{by_size[size]:8.4f} ms" for size in sizes)
+                  + f" {results['saved_ms'][name]:6.4f} ms")
+        total = {size: sum(by_size[size] for by_size in results['median_ms'].values()) for size in sizes}
+        print(f"{'round total':>28} " + ' '.join(f"{total[size]:8.4f} ms" for size in sizes)
+              + f" {total[0] - total[DEFAULT_STATEMENT_CACHE]:6.4f} ms")
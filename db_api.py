@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+from db_connection import connect, TIMESTAMP_FORMAT
+from db_services import StadiumService, ServiceError, NotFoundError, ValidationError, ConflictError
+from db_setup import setup_database
+from db_sweeper import Sweeper, DEFAULT_INTERVAL
+from db_tickets import DEFAULT_HOLD_SECONDS
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 409: 'Conflict', 500: 'Internal Server Error'}
+ERROR_STATUS = [(NotFoundError, 404), (ValidationError, 400), (ConflictError, 409)]
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ServicePool:
+    def __init__(self, path=None, size=4):
+        self.services = queue.Queue()
+        for _ in range(size):
+            self.services.put(StadiumService(connect(path, check_same_thread=False)))
+        self.threads = ThreadPoolExecutor(max_workers=size, thread_name_prefix='db-api')
+
+    def _run(self, task):
+        service = self.services.get()
+        try:
+            return task(service)
+        finally:
+            self.services.put(service)
+
+    async def call(self, task):
+        return await asyncio.get_running_loop().run_in_executor(self.threads, self._run, task)
+
+    def close(self):
+        self.threads.shutdown()
+        while not self.services.empty():
+            self.services.get().conn.close()
+
+
+def flag(value):
+    return value.lower() in ('1', 'true', 'yes')
+
+
+ROUTES = []
+
+def route(method, pattern):
+    def register(handler):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), handler))
+        return handler
+    return register
+
+ENTITY = '(?P<entity>events|tickets|users|staff|facilities|equipment|security)'
+
+@route('GET', f'/{ENTITY}')
+def list_entities(service, body, query, entity):
+    query = dict(query)
+    limit = min(int(query.pop('limit', 200)), 1000)
+    after = query.pop('after', None)
+    descending = flag(query.pop('desc', ''))
+    return 200, service.find(entity, query.pop('q', None), query.pop('order', None), descending,
+                             int(after) if after else None, limit, flag(query.pop('archive', '')), **query)
+
+@route('GET', '/(?P<entity>facilities|equipment)/status')
+def resource_status(service, body, query, entity):
+    return 200, service.resource_status(entity, query.get('at'))
+
+@route('GET', '/(?P<entity>facilities|equipment)/(?P<id_value>\\d+)/timeline')
+def resource_timeline(service, body, query, entity, id_value):
+    return 200, service.resource_timeline(entity, int(id_value), query['start'], query['end'])
+
+@route('GET', '/search')
+def search(service, body, query):
+    return 200, service.search(query.get('q', ''), min(int(query.get('limit', 50)), 500))
+
+@route('GET', '/(?P<entity>events|staff)/suggest')
+def suggest(service, body, query, entity):
+    return 200, service.suggest(entity, query.get('q', ''), flag(query.get('upcoming', '')),
+                                min(int(query.get('limit', 20)), 100))
+
+@route('GET', f'/{ENTITY}/(?P<id_value>\\d+)')
+def get_entity(service, body, query, entity, id_value):
+    return 200, service.get(entity, int(id_value), flag(query.get('archive', '')))
+
+@route('POST', f'/{ENTITY}')
+def create_entity(service, body, query, entity):
+    return 201, {'id': service.create(entity, body)}
+
+@route('PATCH', f'/{ENTITY}/(?P<id_value>\\d+)')
+@route('PUT', f'/{ENTITY}/(?P<id_value>\\d+)')
+def update_entity(service, body, query, entity, id_value):
+    return 200, service.update(entity, int(id_value), body)
+
+@route('DELETE', f'/{ENTITY}/(?P<id_value>\\d+)')
+def delete_entity(service, body, query, entity, id_value):
+    service.delete(entity, int(id_value))
+    return 204, None
+
+@route('DELETE', f'/{ENTITY}')
+def delete_entities(service, body, query, entity):
+    return 200, {'removed': service.delete_many(entity, [int(id_value) for id_value in body['ids']])}
+
+@route('POST', '/events/purge')
+def purge_events(service, body, query):
+    return 200, {'removed': service.purge_events(body['before'])}
+
+@route('POST', '/sweeps')
+def run_sweep(service, body, query):
+    return 200, service.sweep(bool(body.get('full', False)))
+
+@route('GET', '/users/(?P<user_id>\\d+)/tickets')
+def user_tickets(service, body, query, user_id):
+    return 200, service.user_tickets(int(user_id), flag(query.get('archive', '')))
+
+@route('GET', '/events/(?P<event_id>\\d+)/available-staff')
+def available_staff(service, body, query, event_id):
+    return 200, service.available_staff(int(event_id))
+
+@route('GET', '/staff/available')
+def available_staff_on(service, body, query):
+    return 200, service.available_staff_on(query['day'])
+
+@route('GET', '/staff/(?P<staff_id>\\d+)/facilities')
+def staff_facilities(service, body, query, staff_id):
+    return 200, service.staff_facilities(int(staff_id))
+
+@route('GET', '/facilities/(?P<facility_id>\\d+)/events')
+def facility_events(service, body, query, facility_id):
+    return 200, service.facility_events(int(facility_id))
+
+@route('GET', '/equipment/(?P<item_id>\\d+)/events')
+def equipment_events(service, body, query, item_id):
+    return 200, service.equipment_events(int(item_id))
+
+@route('POST', '/facilities/(?P<facility_id>\\d+)/staff')
+def assign_staff(service, body, query, facility_id):
+    service.assign_staff_to_facility(int(facility_id), int(body['staff_id']))
+    return 201, None
+
+@route('POST', '/facilities/(?P<facility_id>\\d+)/events')
+def assign_facility(service, body, query, facility_id):
+    service.assign_facility_to_event(int(facility_id), int(body['event_id']), body['usage_start'], body['usage_end'])
+    return 201, None
+
+@route('POST', '/facilities/schedule')
+def schedule_facilities(service, body, query):
+    return 200, service.schedule_facilities(
+        body['event_ids'], body.get('facility_ids'), body.get('windows'), body.get('setup_minutes', 0),
+        bool(body.get('dry_run', False)))
+
+@route('POST', '/equipment/(?P<item_id>\\d+)/events')
+def assign_equipment(service, body, query, item_id):
+    service.assign_equipment_to_event(int(item_id), int(body['event_id']), body['usage_start'], body['usage_end'])
+    return 201, None
+
+@route('POST', '/events/(?P<event_id>\\d+)/tickets')
+def generate_tickets(service, body, query, event_id):
+    return 201, service.generate_tickets(int(event_id), body.get('seats', {}), body.get('ticket_type', 'one_day'))
+
+@route('GET', '/events/(?P<event_id>\\d+)/inventory')
+def ticket_counts(service, body, query, event_id):
+    return 200, service.ticket_counts(int(event_id))
+
+@route('POST', '/events/(?P<event_id>\\d+)/sales')
+def sell_tickets(service, body, query, event_id):
+    return 201, service.sell_tickets(int(event_id), body['seat'], int(body.get('quantity', 1)), int(body['user_id']))
+
+@route('POST', '/events/(?P<event_id>\\d+)/holds')
+def hold_tickets(service, body, query, event_id):
+    return 201, service.hold_tickets(int(event_id), body['seat'], int(body.get('quantity', 1)), int(body['user_id']),
+                                     int(body.get('hold_seconds', DEFAULT_HOLD_SECONDS)))
+
+@route('POST', '/users/(?P<user_id>\\d+)/holds/confirm')
+def confirm_hold(service, body, query, user_id):
+    return 200, service.confirm_hold(int(user_id), [int(ticket_id) for ticket_id in body['ticket_ids']])
+
+@route('DELETE', '/users/(?P<user_id>\\d+)/holds')
+def release_hold(service, body, query, user_id):
+    ticket_ids = body.get('ticket_ids')
+    return 200, {'released': service.release_hold(int(user_id), ticket_ids and [int(t) for t in ticket_ids])}
+
+
+async def dispatch(pool, method, target, body):
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    allowed = False
+    for route_method, pattern, handler in ROUTES:
+        match = pattern.match(url.path)
+        if not match:
+            continue
+        allowed = True
+        if route_method != method:
+            continue
+        try:
+            payload = json.loads(body) if body else {}
+            return await pool.call(lambda service: handler(service, payload, query, **match.groupdict()))
+        except ServiceError as e:
+            status = next((status for error, status in ERROR_STATUS if isinstance(e, error)), 500)
+            return status, {'error': str(e)}
+        except (KeyError, ValueError, TypeError) as e:
+            return 400, {'error': f"Bad request: {str(e)}"}
+        except Exception as e:
+            return 500, {'error': str(e)}
+    return (405, {'error': 'Method not allowed'}) if allowed else (404, {'error': 'Not found'})
+
+
+async def handle_client(pool, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            body = await reader.readexactly(length) if length else b''
+
+            status, payload = await dispatch(pool, method.upper(), target, body)
+            data = b'' if payload is None else json.dumps(payload, default=json_default).encode()
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=8080, path=None, pool_size=4, ready=None, sweep_interval=DEFAULT_INTERVAL):
+    setup_database(path)
+    pool = ServicePool(path, pool_size)
+    sweeper = Sweeper(path, sweep_interval) if sweep_interval else None
+    server = await asyncio.start_server(lambda r, w: handle_client(pool, r, w), host, port)
+    if ready is not None:
+        ready(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if sweeper is not None:
+            sweeper.close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP API over the stadium database.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--db', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--sweep-interval', type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between expiry/release sweeps (0 disables)")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.db, args.pool_size, sweep_interval=args.sweep_interval))
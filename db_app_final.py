@@ -1,19 +1,83 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from db_setup import setup_database
+from tkinter import ttk, messagebox, filedialog
+from db_setup import (setup_database, EVENT_TYPES, SEAT_TYPES, TICKET_STATUSES, FACILITY_STATUSES,
+                      EQUIPMENT_STATUSES, SECURITY_STATUSES)
+from db_paging import KeysetPager, TreeviewWindow
+from db_status import StatusPager
+from db_import import import_file, format_stats
+from db_executor import DatabaseExecutor
+from db_trace import Tracer, DEFAULT_SLOW_MS
+from db_queries import counters, reset_counters
+from db_changes import ChangeFeed
+from db_sweeper import Sweeper, format_metrics
+from db_scheduler import parse_ids
+from db_services import StadiumService, ServiceError, ENTITIES, format_removed
+from db_search import build_filters, format_count, SORTABLE, DERIVED_COLUMNS
+from datetime import datetime, timedelta
+import argparse
 import sqlite3
-from datetime import datetime
+import time
+from collections import OrderedDict
+
+TIMELINE_DAYS = 14
+DIAGNOSTICS_REFRESH_MS = 1000
+TYPEAHEAD_DELAY_MS = 250
+LOOKUP_CACHE_SIZE = 128
+LOOKUP_CACHE_SECONDS = 60
+# Helpers that run work for the method calling them; tracing names the caller instead.
+TRACE_PASS_THROUGH = ('load_window', 'run_service', 'delete_selected')
+
 
 class EventManagementGUI:
-    def __init__(self, root):
+    def __init__(self, root, db_path=None, on_first_paint=None, slow_ms=DEFAULT_SLOW_MS, slow_log=None):
         self.root = root
+        self.on_first_paint = on_first_paint
         self.root.title("Stadium Management System")
         self.root.geometry("1000x600")
 
-        setup_database()
-        self.conn = sqlite3.connect('event_management.db')
-        self.cursor = self.conn.cursor()
-        self.relationship_handlers = RelationshipHandlers(self.cursor, self.conn)
+        setup_database(db_path)
+        self.startup_marks = {'setup_database': time.perf_counter()}
+        self.tracer = Tracer(slow_ms, slow_log, TRACE_PASS_THROUGH)
+        self.executor = DatabaseExecutor(self.root, db_path, StadiumService, tracer=self.tracer)
+        self.executor.on_error = self.show_db_error
+        self.changes = ChangeFeed(self.root, self.executor)
+        self.sweeper = Sweeper(db_path)
+        self.relationship_handlers = RelationshipHandlers(self.executor)
+        self.lookups = LookupCache()
+        self.changes.subscribe(('Kravtsov_Events', 'Kravtsov_Staff'), self.lookups.clear)
+
+        menubar = tk.Menu(self.root)
+        import_menu = tk.Menu(menubar, tearoff=0)
+        import_menu.add_command(label="Events...", command=lambda: self.import_data('events'))
+        import_menu.add_command(label="Tickets...", command=lambda: self.import_data('tickets'))
+        import_menu.add_command(label="Users...", command=lambda: self.import_data('users'))
+        menubar.add_cascade(label="Import", menu=import_menu)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(label="Sweep Expired Now", command=self.sweep_now)
+        tools_menu.add_command(label="Diagnostics...", command=self.show_diagnostics)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self.root.config(menu=menubar)
+
+        status_bar = ttk.Frame(root)
+        status_bar.pack(side='bottom', fill='x', padx=5, pady=(0, 5))
+        self.cancel_btn = ttk.Button(status_bar, text="Cancel", command=self.executor.cancel, state='disabled')
+        self.cancel_btn.pack(side='right')
+        self.busy_bar = ttk.Progressbar(status_bar, mode='indeterminate', length=120)
+        self.busy_bar.pack(side='right', padx=5)
+        self.status_label = ttk.Label(status_bar, text="Ready")
+        self.status_label.pack(side='left')
+        self.executor.on_busy = self.update_busy_indicator
+
+        find_bar = ttk.Frame(root)
+        find_bar.pack(side='top', fill='x', padx=5, pady=(5, 0))
+        ttk.Label(find_bar, text="Find:").pack(side='left')
+        self.find_entry = ttk.Entry(find_bar, width=40)
+        self.find_entry.pack(side='left', padx=(2, 4))
+        self.find_entry.bind('<Return>', lambda event: self.find_anything())
+        ttk.Button(find_bar, text="Search", command=self.find_anything).pack(side='left')
+        self.search_results = None
+        self.diagnostics = None
+        self.slow_entries = []
 
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(expand=True, fill='both', padx=5, pady=5)
@@ -35,15 +99,19 @@ class EventManagementGUI:
         self.notebook.add(self.equipment_tab, text='Equipment')
         self.notebook.add(self.security_tab, text='Security')
 
-        self.events_columns = ('ID', 'Name', 'Type', 'Start', 'End', 'Holder')
+        self.events_columns = ('ID', 'Name', 'Type', 'Start', 'End', 'Holder', 'Sold', 'Unsold')
         self.tickets_columns = ('ID', 'Event ID', 'User ID', 'Type', 'Seat', 'Status')
         self.users_columns = ('ID', 'Name', 'Email')
         self.staff_columns = ('ID', 'Name', 'Email', 'Phone', 'Position', 'Start', 'End', 'Salary')
-        self.facilities_columns = ('ID', 'Name', 'Status')
-        self.equipment_columns = ('ID', 'Name', 'Status')
+        self.facilities_columns = ('ID', 'Name', 'Status', 'Until')
+        self.equipment_columns = ('ID', 'Name', 'Status', 'Until')
         self.security_columns = ('ID', 'Name', 'Status', 'Facility')
         
         self.buttons = {}
+        self.windows = {}
+        self.count_labels = {}
+        self.queries = {}
+        self.pending_locate = {}
 
         self.setup_events_tab()
         self.setup_tickets_tab()
@@ -53,49 +121,314 @@ class EventManagementGUI:
         self.setup_equipment_tab()
         self.setup_security_tab()
 
+        self.tab_loaders = {
+            str(self.events_tab): self.load_events,
+            str(self.tickets_tab): self.load_tickets,
+            str(self.users_tab): self.load_users,
+            str(self.staff_tab): self.load_staff,
+            str(self.facilities_tab): self.load_facilities,
+            str(self.equipment_tab): self.load_equipment,
+            str(self.security_tab): self.load_security,
+        }
+        self.loaded_tabs = set()
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        self.on_tab_changed()
+        self.startup_marks['widgets'] = time.perf_counter()
+
+    def on_tab_changed(self, event=None):
+        tab = str(self.notebook.select())
+        if tab in self.tab_loaders and tab not in self.loaded_tabs:
+            self.loaded_tabs.add(tab)
+            self.tab_loaders[tab]()
+
     def setup_events_tab(self):
-        self.events_tree = self.create_treeview(self.events_tab, self.events_columns)
+        self.events_tree = self.create_paged_treeview('events', self.events_tab, self.events_columns, 'Kravtsov_Events_Inventory', 'event_id',
+                                                      count_table='Kravtsov_Events', watch=('Kravtsov_Events', 'Kravtsov_Tickets'),
+                                                      filters=[("Type:", 'event_type', EVENT_TYPES), ("From:", 'start_from', None), ("To:", 'start_to', None)])
         self.buttons['events'] = self.add_button_frame(self.events_tab, self.show_add_event_dialog, self.load_events, self.show_update_event_dialog, self.delete_event, self.lookup_staff_events)
-        self.load_events()
 
     def setup_tickets_tab(self):
-        self.tickets_tree = self.create_treeview(self.tickets_tab, self.tickets_columns)
+        self.tickets_tree = self.create_paged_treeview('tickets', self.tickets_tab, self.tickets_columns, 'Kravtsov_Tickets', 'ticket_id',
+                                                       filters=[("Event ID:", 'event_id', None), ("Seat:", 'seat', SEAT_TYPES), ("Status:", 'status', TICKET_STATUSES)])
         self.buttons['tickets'] = self.add_button_frame(self.tickets_tab, self.show_add_ticket_dialog, self.load_tickets, self.show_update_ticket_dialog, self.delete_ticket, None)
-        self.load_tickets()
 
     def setup_users_tab(self):
-        self.users_tree = self.create_treeview(self.users_tab, self.users_columns)
+        self.users_tree = self.create_paged_treeview('users', self.users_tab, self.users_columns, 'Kravtsov_Users', 'user_id')
         self.buttons['users'] = self.add_button_frame(self.users_tab, self.show_add_user_dialog, self.load_users, self.show_update_user_dialog, self.delete_user, self.lookup_user_tickets)
-        self.load_users()
 
     def setup_staff_tab(self):
-        self.staff_tree = self.create_treeview(self.staff_tab, self.staff_columns)
+        self.staff_tree = self.create_paged_treeview('staff', self.staff_tab, self.staff_columns, 'Kravtsov_Staff', 'staff_id',
+                                                     filters=[("Position:", 'position', 'staff_positions')])
         self.buttons['staff'] = self.add_button_frame(self.staff_tab, self.show_add_staff_dialog, self.load_staff, self.show_update_staff_dialog, self.delete_staff, self.lookup_staff_facilities)
-        self.load_staff()
 
     def setup_facilities_tab(self):
-        self.facilities_tree = self.create_treeview(self.facilities_tab, self.facilities_columns)
+        self.facilities_tree = self.create_paged_treeview('facilities', self.facilities_tab, self.facilities_columns, 'Kravtsov_Facilities_Status', 'facility_id',
+                                                          count_table='Kravtsov_Facilities', pager_class=StatusPager,
+                                                          watch=('Kravtsov_Facilities', 'Kravtsov_Facilities_Events', 'Kravtsov_Resource_Status'),
+                                                          filters=[("Status:", 'facility_status', FACILITY_STATUSES)])
         self.buttons['facilities'] = self.add_button_frame(self.facilities_tab, self.show_add_facility_dialog, self.load_facilities, self.show_update_facility_dialog, self.delete_facility, self.lookup_facilities_events)
-        self.load_facilities()
 
     def setup_equipment_tab(self):
-        self.equipment_tree = self.create_treeview(self.equipment_tab, self.equipment_columns)
+        self.equipment_tree = self.create_paged_treeview('equipment', self.equipment_tab, self.equipment_columns, 'Kravtsov_Equipment_Status', 'item_id',
+                                                         count_table='Kravtsov_Equipment', pager_class=StatusPager,
+                                                         watch=('Kravtsov_Equipment', 'Kravtsov_Equipment_Events', 'Kravtsov_Resource_Status'),
+                                                         filters=[("Status:", 'item_status', EQUIPMENT_STATUSES)])
         self.buttons['equipment'] = self.add_button_frame(self.equipment_tab, self.show_add_equipment_dialog, self.load_equipment, self.show_update_equipment_dialog, self.delete_equipment, self.lookup_equipment_events)
-        self.load_equipment()
 
     def setup_security_tab(self):
-        self.security_tree = self.create_treeview(self.security_tab, self.security_columns)
+        self.security_tree = self.create_paged_treeview('security', self.security_tab, self.security_columns, 'Kravtsov_Security', 'sec_item_id',
+                                                        filters=[("Status:", 'sec_item_status', SECURITY_STATUSES), ("Facility ID:", 'facility_id', None)])
         self.buttons['security'] = self.add_button_frame(self.security_tab, self.show_add_security_dialog, self.load_security, self.show_update_security_dialog, self.delete_security, None)
-        self.load_security()
 
-    def create_treeview(self, parent, columns):
-        tree = ttk.Treeview(parent, columns=columns, show='headings')
+    def create_paged_treeview(self, name, parent, columns, table, key, count_table=None, watch=None, filters=(), pager_class=KeysetPager):
+        self.create_filter_bar(name, parent, filters)
+        self.count_labels[name] = ttk.Label(parent, text="")
+        self.count_labels[name].pack(fill='x', padx=5, pady=(5, 0))
+
+        tree_frame = ttk.Frame(parent)
+        tree_frame.pack(expand=True, fill='both', padx=5, pady=5)
+        tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
         for col in columns:
             tree.heading(col, text=col)
-        tree.pack(expand=True, fill='both', padx=5, pady=5)
+        scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=tree.yview)
+        scrollbar.pack(side='right', fill='y')
+        tree.pack(side='left', expand=True, fill='both')
+
+        window = TreeviewWindow(tree, pager_class(table, key, count_table=count_table), self.executor)
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            window.on_scroll(first, last)
+        tree.configure(yscrollcommand=on_scroll)
+        self.windows[name] = window
+        self.changes.subscribe(watch or (table,), lambda: self.refresh_window(name))
         return tree
-    
+
+    def create_filter_bar(self, name, parent, filters):
+        bar = ttk.Frame(parent)
+        bar.pack(fill='x', padx=5, pady=(5, 0))
+        ttk.Label(bar, text="Search:").pack(side='left')
+        search_entry = ttk.Entry(bar, width=24)
+        search_entry.pack(side='left', padx=(2, 8))
+        search_entry.bind('<Return>', lambda event: self.apply_query(name))
+
+        widgets = {}
+        for label, filter_name, values in filters:
+            ttk.Label(bar, text=label).pack(side='left')
+            if values is None:
+                widget = ttk.Entry(bar, width=12)
+                widget.bind('<Return>', lambda event: self.apply_query(name))
+            elif isinstance(values, str):
+                widget = ttk.Combobox(bar, width=14)
+                fill = lambda widget=widget, name=values: self.executor.query(
+                    name, (), lambda rows: widget.config(values=[''] + [row[0] for row in rows]))
+                widget.config(postcommand=fill)
+                fill()
+            else:
+                widget = ttk.Combobox(bar, values=('',) + tuple(values), width=14, state='readonly')
+            widget.pack(side='left', padx=(2, 8))
+            widgets[filter_name] = widget
+
+        ttk.Button(bar, text="Apply", command=lambda: self.apply_query(name)).pack(side='left', padx=2)
+        ttk.Button(bar, text="Clear", command=lambda: self.clear_query(name)).pack(side='left', padx=2)
+        self.queries[name] = {'search': search_entry, 'filters': widgets, 'order': None, 'descending': False}
+
+    def apply_query(self, name):
+        query = self.queries[name]
+        try:
+            filters = build_filters(name, query['search'].get(),
+                                    **{filter_name: widget.get() for filter_name, widget in query['filters'].items()})
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.windows[name].pager.set_query(filters, query['order'], query['descending'])
+        getattr(self, f"load_{name}")()
+
+    def clear_query(self, name):
+        query = self.queries[name]
+        query['search'].delete(0, 'end')
+        for widget in query['filters'].values():
+            widget.set('')
+        query['order'], query['descending'] = None, False
+        self.apply_query(name)
+
+    def sort_by(self, name, column):
+        query = self.queries[name]
+        pager = self.windows[name].pager
+        if column == pager.key:
+            column = None
+        elif column not in SORTABLE[name]:
+            return
+        if query['order'] == column:
+            query['descending'] = not query['descending']
+        else:
+            query['order'], query['descending'] = column, False
+        self.apply_query(name)
+
+    def find_anything(self):
+        text = self.find_entry.get().strip()
+        if text:
+            self.executor.call(lambda service: service.search(text), self.show_search_results)
+
+    def show_search_results(self, results):
+        if self.search_results is None or not self.search_results.winfo_exists():
+            self.search_results = tk.Toplevel(self.root)
+            self.search_results.title("Search Results")
+            self.search_results.geometry("600x400")
+            tree = ttk.Treeview(self.search_results, columns=('Type', 'ID', 'Match'), show='headings')
+            for col, width in (('Type', 90), ('ID', 70), ('Match', 420)):
+                tree.heading(col, text=col)
+                tree.column(col, width=width)
+            tree.pack(expand=True, fill='both', padx=5, pady=5)
+            tree.bind('<Double-1>', lambda event: self.open_search_result())
+            tree.bind('<Return>', lambda event: self.open_search_result())
+            self.search_tree = tree
+        self.search_results.lift()
+        self.search_tree.delete(*self.search_tree.get_children())
+        for index, result in enumerate(results):
+            self.search_tree.insert('', 'end', iid=str(index), values=(result['entity'], result['id'], result['label']))
+        if not results:
+            self.search_tree.insert('', 'end', values=('', '', "No matches."))
+
+    def open_search_result(self):
+        selected = self.search_tree.selection()
+        if not selected:
+            return
+        entity, id_value, _ = self.search_tree.item(selected[0])['values']
+        if entity:
+            self.jump_to(entity, int(id_value))
+
+    def jump_to(self, name, id_value):
+        tab = getattr(self, f"{name}_tab")
+        self.loaded_tabs.add(str(tab))
+        self.pending_locate[name] = id_value
+        self.clear_query(name)
+        self.notebook.select(tab)
+
+    def load_window(self, name, columns):
+        window = self.windows[name]
+        query = self.queries[name]
+        table, key, table_columns, _ = ENTITIES[name]
+        sort_columns = dict(zip(columns, (key,) + table_columns + DERIVED_COLUMNS.get(name, ())))
+        window.tree.config(columns=columns)
+        for col in columns:
+            arrow = ''
+            if sort_columns[col] == (query['order'] or key):
+                arrow = ' \u25bc' if query['descending'] else ' \u25b2'
+            window.tree.heading(col, text=col + arrow, command=lambda column=sort_columns[col]: self.sort_by(name, column))
+        def loaded(count):
+            self.count_labels[name].config(text=format_count(count))
+            if self.on_first_paint is not None:
+                callback, self.on_first_paint = self.on_first_paint, None
+                self.root.update_idletasks()
+                callback()
+        window.reset(loaded, self.pending_locate.pop(name, None))
+
+    def refresh_window(self, name):
+        self.windows[name].refresh(lambda count: self.count_labels[name].config(text=format_count(count)))
+
+    def sweep_now(self):
+        def swept(metrics):
+            self.changes.poll()
+            messagebox.showinfo("Sweep", format_metrics(metrics).capitalize())
+        self.executor.call(lambda service: service.sweep(), swept)
+
+    def show_diagnostics(self):
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.lift()
+            return
+        self.diagnostics = tk.Toplevel(self.root)
+        self.diagnostics.title("Diagnostics")
+        self.diagnostics.geometry("800x700")
+
+        columns = ('Operation', 'Calls', 'Statements', 'p50 ms', 'p95 ms', 'p99 ms', 'Max ms')
+        operations = ttk.Treeview(self.diagnostics, columns=columns, show='headings', height=10)
+        for col in columns:
+            operations.heading(col, text=col)
+            operations.column(col, width=260 if col == 'Operation' else 80, anchor='w' if col == 'Operation' else 'e')
+        operations.pack(expand=True, fill='both', padx=5, pady=5)
+
+        ttk.Label(self.diagnostics, text=f"Statements slower than {self.tracer.slow_ms:g} ms"
+                  + (f" (logged to {self.tracer.slow_log})" if self.tracer.slow_log else "") + ":").pack(fill='x', padx=5)
+        columns = ('At', 'Operation', 'ms', 'Rows', 'Statement')
+        slow = ttk.Treeview(self.diagnostics, columns=columns, show='headings', height=8)
+        for col, width in (('At', 130), ('Operation', 160), ('ms', 70), ('Rows', 60), ('Statement', 380)):
+            slow.heading(col, text=col)
+            slow.column(col, width=width)
+        slow.pack(expand=True, fill='both', padx=5, pady=5)
+        slow.bind('<Double-1>', lambda event: self.show_slow_plan(slow))
+
+        ttk.Label(self.diagnostics, text="Named queries:").pack(fill='x', padx=5)
+        columns = ('Query', 'Calls', 'Total ms', 'Mean ms')
+        queries = ttk.Treeview(self.diagnostics, columns=columns, show='headings', height=8)
+        for col in columns:
+            queries.heading(col, text=col)
+            queries.column(col, width=260 if col == 'Query' else 100, anchor='w' if col == 'Query' else 'e')
+        queries.pack(expand=True, fill='both', padx=5, pady=5)
+
+        def reset():
+            self.tracer.reset()
+            reset_counters()
+        ttk.Button(self.diagnostics, text="Reset", command=reset).pack(side='right', padx=5, pady=5)
+
+        def refresh():
+            if not self.diagnostics.winfo_exists():
+                return
+            operations.delete(*operations.get_children())
+            for name, summary in self.tracer.summary().items():
+                operations.insert('', 'end', values=(name, summary['count'], summary['statements'], summary['p50_ms'],
+                                                     summary['p95_ms'], summary['p99_ms'], summary['max_ms']))
+            slow.delete(*slow.get_children())
+            self.slow_entries = self.tracer.slow_statements()[::-1]
+            for index, entry in enumerate(self.slow_entries):
+                slow.insert('', 'end', iid=str(index), values=(entry['at'].strftime('%H:%M:%S'), entry['operation'],
+                                                               entry['ms'], entry['rows'], entry['sql']))
+            queries.delete(*queries.get_children())
+            for name, counter in counters().items():
+                queries.insert('', 'end', values=(name, counter['calls'], counter['total_ms'], counter['mean_ms']))
+            self.root.after(DIAGNOSTICS_REFRESH_MS, refresh)
+        refresh()
+
+    def show_slow_plan(self, tree):
+        selected = tree.selection()
+        if selected:
+            entry = self.slow_entries[int(selected[0])]
+            plan = '\n'.join(entry['plan']) or "(no plan captured)"
+            messagebox.showinfo("Query Plan", f"{entry['sql']}\n\n{plan}")
+
+    def update_busy_indicator(self, pending):
+        if pending:
+            self.status_label.config(text=f"Working... ({pending} queued)")
+            self.busy_bar.start(10)
+            self.cancel_btn.config(state='normal')
+        else:
+            self.status_label.config(text="Ready")
+            self.busy_bar.stop()
+            self.cancel_btn.config(state='disabled')
+
+    def show_db_error(self, error):
+        if isinstance(error, sqlite3.OperationalError) and str(error) == 'interrupted':
+            self.status_label.config(text="Query cancelled.")
+            return
+        messagebox.showerror("Error", str(error))
+
+    def run_service(self, task, dialog=None):
+        def done(_):
+            self.changes.poll()
+            if dialog is not None:
+                dialog.destroy()
+        self.executor.call(task, done)
+
+    def fill_entries(self, entries, fields, entity, row):
+        # Update dialogs list their fields in the entity's column order. Values are looked
+        # up by column name, since the row also carries columns the dialog doesn't edit.
+        for (label, _), column in zip(fields, ENTITIES[entity][2]):
+            entries[label].insert(0, row[column] if row[column] is not None else "")
+
     def update_treeview(self, tree, columns, data):
+            for name, window in self.windows.items():
+                if window.tree is tree:
+                    window.detach()
+                    self.count_labels[name].config(text=f"{len(data)} rows")
             tree.delete(*tree.get_children())
             tree.config(columns=columns)
             for col in columns:
@@ -115,6 +448,18 @@ class EventManagementGUI:
         delete_btn.pack(side='left', padx=5)
 
         extra_btns = []
+        if parent == self.events_tab:
+            purge_btn = ttk.Button(btn_frame, text="Purge Past...", command=self.show_purge_events_dialog)
+            purge_btn.pack(side='left', padx=5)
+            extra_btns = [purge_btn]
+        if parent == self.tickets_tab:
+            generate_btn = ttk.Button(btn_frame, text="Generate Inventory",
+                       command=self.show_generate_tickets_dialog)
+            generate_btn.pack(side='left', padx=5)
+            sell_btn = ttk.Button(btn_frame, text="Sell Tickets",
+                       command=self.show_sell_tickets_dialog)
+            sell_btn.pack(side='left', padx=5)
+            extra_btns = [generate_btn, sell_btn]
         if parent == self.facilities_tab:
             assign_staff_btn = ttk.Button(btn_frame, text="Assign Staff", 
                     command=self.show_assign_facility_staff_dialog)
@@ -122,12 +467,21 @@ class EventManagementGUI:
             assign_event_btn = ttk.Button(btn_frame, text="Assign to Event", 
                     command=self.show_assign_facility_event_dialog)
             assign_event_btn.pack(side='left', padx=5)
-            extra_btns = [assign_staff_btn, assign_event_btn]
+            schedule_btn = ttk.Button(btn_frame, text="Schedule Events...",
+                    command=self.show_schedule_facilities_dialog)
+            schedule_btn.pack(side='left', padx=5)
+            timeline_btn = ttk.Button(btn_frame, text="Timeline",
+                    command=lambda: self.show_timeline('facilities'))
+            timeline_btn.pack(side='left', padx=5)
+            extra_btns = [assign_staff_btn, assign_event_btn, schedule_btn, timeline_btn]
         if parent == self.equipment_tab:
             assign_event_btn = ttk.Button(btn_frame, text="Assign to Event",
                        command=self.show_assign_equipment_event_dialog)
             assign_event_btn.pack(side='left', padx=5)
-            extra_btns = [assign_event_btn]
+            timeline_btn = ttk.Button(btn_frame, text="Timeline",
+                       command=lambda: self.show_timeline('equipment'))
+            timeline_btn.pack(side='left', padx=5)
+            extra_btns = [assign_event_btn, timeline_btn]
         
         lookup_btn = None
         if lookup_command is not None:
@@ -143,46 +497,91 @@ class EventManagementGUI:
               if btn:
                   btn.config(state=state)
     
+    def import_data(self, entity):
+        path = filedialog.askopenfilename(
+            title=f"Import {entity}",
+            filetypes=[("CSV or JSON", "*.csv *.json *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+
+        rejects_path = f"{path}.rejects.csv"
+
+        def imported(stats):
+            message = format_stats(entity, stats)
+            if stats['rejected']:
+                message += f"\nRejected rows were written to {rejects_path}"
+            messagebox.showinfo("Import", message)
+            self.changes.poll()
+
+        def failed(e):
+            messagebox.showerror("Error", f"Import failed: {str(e)}")
+
+        self.executor.submit(lambda conn: import_file(conn, entity, path, rejects_path=rejects_path), imported, failed)
+
     def load_events(self):
-        self.cursor.execute("SELECT * FROM Kravtsov_Events")
-        data = self.cursor.fetchall()
-        self.update_treeview(self.events_tree, self.events_columns, data)
+        self.load_window('events', self.events_columns)
         self.set_button_state('events', 'normal')
 
     def load_tickets(self):
-        self.cursor.execute("SELECT * FROM Kravtsov_Tickets")
-        data = self.cursor.fetchall()
-        self.update_treeview(self.tickets_tree, self.tickets_columns, data)
+        self.load_window('tickets', self.tickets_columns)
 
     def load_users(self):
-        self.cursor.execute("SELECT * FROM Kravtsov_Users")
-        data = self.cursor.fetchall()
-        self.update_treeview(self.users_tree, self.users_columns, data)
+        self.load_window('users', self.users_columns)
         self.set_button_state('users', 'normal')
 
     def load_staff(self):
-        self.cursor.execute("SELECT * FROM Kravtsov_Staff")
-        data = self.cursor.fetchall()
-        self.update_treeview(self.staff_tree, self.staff_columns, data)
+        self.load_window('staff', self.staff_columns)
         self.set_button_state('staff', 'normal')
 
     def load_facilities(self):
-        self.cursor.execute("SELECT * FROM Kravtsov_Facilities")
-        data = self.cursor.fetchall()
-        self.update_treeview(self.facilities_tree, self.facilities_columns, data)
+        self.load_window('facilities', self.facilities_columns)
         self.set_button_state('facilities', 'normal')
 
     def load_equipment(self):
-         self.cursor.execute("SELECT * FROM Kravtsov_Equipment")
-         data = self.cursor.fetchall()
-         self.update_treeview(self.equipment_tree, self.equipment_columns, data)
+         self.load_window('equipment', self.equipment_columns)
          self.set_button_state('equipment', 'normal')
 
     def load_security(self):
-        self.cursor.execute("SELECT * FROM Kravtsov_Security")
-        data = self.cursor.fetchall()
-        self.update_treeview(self.security_tree, self.security_columns, data)
+        self.load_window('security', self.security_columns)
         
+    def delete_selected(self, name, noun, plural):
+        tree = self.windows[name].tree
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("Warning", f"Please select one or more {plural} to delete.")
+            return
+
+        ids = [tree.item(item, "values")[0] for item in selected]
+        question = (f"Are you sure you want to delete this {noun}?" if len(ids) == 1
+                    else f"Are you sure you want to delete these {len(ids)} {plural}?")
+        if messagebox.askyesno("Confirm", question):
+            self.executor.call(lambda service: service.delete_many(name, ids), self.show_removed)
+
+    def show_removed(self, removed):
+        self.changes.poll()
+        messagebox.showinfo("Deleted", format_removed(removed))
+
+    def show_purge_events_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Purge Past Events")
+
+        ttk.Label(dialog, text="Delete events that ended before (YYYY-MM-DD):").grid(row=0, column=0, padx=5, pady=5)
+        cutoff_entry = ttk.Entry(dialog)
+        cutoff_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        def purge():
+            cutoff = cutoff_entry.get()
+            if not messagebox.askyesno("Confirm", f"Delete all events that ended before {cutoff}, with their tickets and bookings?"):
+                return
+
+            def purged(removed):
+                dialog.destroy()
+                self.show_removed(removed)
+
+            self.executor.call(lambda service: service.purge_events(cutoff), purged)
+
+        ttk.Button(dialog, text="Purge", command=purge).grid(row=1, column=0, columnspan=2, pady=10)
+
     def show_add_event_dialog(self):
         dialog = tk.Toplevel(self.root)
         dialog.title("Add Event")
@@ -205,23 +604,14 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
         
         def save():
-            try:
-                query = """
-                INSERT INTO Kravtsov_Events (event_name, event_type, event_start, event_end, event_holder)
-                VALUES (?, ?, ?, ?, ?)
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Type:"].get(),
-                    entries["Event Start (YYYY-MM-DD HH:MM:SS):"].get(),
-                    entries["Event End (YYYY-MM-DD HH:MM:SS):"].get(),
-                    entries["Holder:"].get()
-                ))
-                self.conn.commit()
-                self.load_events()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'event_name': entries["Name:"].get(),
+                'event_type': entries["Type:"].get(),
+                'event_start': entries["Event Start (YYYY-MM-DD HH:MM:SS):"].get(),
+                'event_end': entries["Event End (YYYY-MM-DD HH:MM:SS):"].get(),
+                'event_holder': entries["Holder:"].get()
+            }
+            self.run_service(lambda service: service.create('events', values), dialog)
         
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
@@ -252,51 +642,23 @@ class EventManagementGUI:
                 entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Events WHERE event_id = ?"
-        event = self.cursor.execute(query, (event_id,)).fetchone()
-        for i, value in enumerate(event[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('events', event_id),
+                           lambda row: self.fill_entries(entries, fields, 'events', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Events
-                SET event_name = ?, event_type = ?, event_start = ?, event_end = ?, event_holder = ?
-                WHERE event_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Type:"].get(),
-                    entries["Event Start (YYYY-MM-DD HH:MM:SS):"].get(),
-                    entries["Event End (YYYY-MM-DD HH:MM:SS):"].get(),
-                    entries["Holder:"].get(),
-                    event_id
-                ))
-                self.conn.commit()
-                self.load_events()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'event_name': entries["Name:"].get(),
+                'event_type': entries["Type:"].get(),
+                'event_start': entries["Event Start (YYYY-MM-DD HH:MM:SS):"].get(),
+                'event_end': entries["Event End (YYYY-MM-DD HH:MM:SS):"].get(),
+                'event_holder': entries["Holder:"].get()
+            }
+            self.run_service(lambda service: service.update('events', event_id, values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
     def delete_event(self):
-        selected_item = self.events_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select an event to delete.")
-            return
-
-        event_id = self.events_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this event?")
-        if confirm:
-            try:
-                self.relationship_handlers.cleanup_relationships('Kravtsov_Events', 'event_id', event_id)
-                query = "DELETE FROM Kravtsov_Events WHERE event_id = ?"
-                self.cursor.execute(query, (event_id,))
-                self.conn.commit()
-                self.load_events()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+        self.delete_selected('events', "event", "events")
 
     def show_add_ticket_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -320,23 +682,14 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
         def save():
-            try:
-                query = """
-                INSERT INTO Kravtsov_Tickets (event_id, user_id, ticket_type, seat, status)
-                VALUES (?, ?, ?, ?, ?)
-                """
-                self.cursor.execute(query, (
-                    entries["Event ID:"].get(),
-                    entries["User ID:"].get(),
-                    entries["Type:"].get(),
-                    entries["Seat:"].get(),
-                    entries["Status:"].get()
-                ))
-                self.conn.commit()
-                self.load_tickets()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'event_id': entries["Event ID:"].get(),
+                'user_id': entries["User ID:"].get() or None,
+                'ticket_type': entries["Type:"].get(),
+                'seat': entries["Seat:"].get(),
+                'status': entries["Status:"].get()
+            }
+            self.run_service(lambda service: service.create('tickets', values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
@@ -367,50 +720,105 @@ class EventManagementGUI:
                 entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Tickets WHERE ticket_id = ?"
-        ticket = self.cursor.execute(query, (ticket_id,)).fetchone()
-        for i, value in enumerate(ticket[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('tickets', ticket_id),
+                           lambda row: self.fill_entries(entries, fields, 'tickets', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Tickets
-                SET event_id = ?, user_id = ?, ticket_type = ?, seat = ?, status = ?
-                WHERE ticket_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Event ID:"].get(),
-                    entries["User ID:"].get(),
-                    entries["Type:"].get(),
-                    entries["Seat:"].get(),
-                    entries["Status:"].get(),
-                    ticket_id
-                ))
-                self.conn.commit()
-                self.load_tickets()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'event_id': entries["Event ID:"].get(),
+                'user_id': entries["User ID:"].get() or None,
+                'ticket_type': entries["Type:"].get(),
+                'seat': entries["Seat:"].get(),
+                'status': entries["Status:"].get()
+            }
+            self.run_service(lambda service: service.update('tickets', ticket_id, values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
-    def delete_ticket(self):
-        selected_item = self.tickets_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select a ticket to delete.")
-            return
+    def show_generate_tickets_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Generate Ticket Inventory")
 
-        ticket_id = self.tickets_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this ticket?")
-        if confirm:
+        fields = [
+            ("Event ID:", None),
+            ("Type:", ['one_day', 'multiple_days']),
+            ("Sitting:", None),
+            ("Sitting VIP:", None),
+            ("Standing:", None),
+            ("Standing VIP:", None)
+        ]
+
+        entries = {}
+        for i, (label, values) in enumerate(fields):
+            ttk.Label(dialog, text=label).grid(row=i, column=0, padx=5, pady=5)
+            if values:
+                entries[label] = ttk.Combobox(dialog, values=values)
+            else:
+                entries[label] = ttk.Entry(dialog)
+            entries[label].grid(row=i, column=1, padx=5, pady=5)
+
+        def save():
+            event_id = entries["Event ID:"].get()
+            ticket_type = entries["Type:"].get()
+            seat_counts = {
+                'sitting': entries["Sitting:"].get(),
+                'sitting_vip': entries["Sitting VIP:"].get(),
+                'standing': entries["Standing:"].get(),
+                'standing_vip': entries["Standing VIP:"].get()
+            }
+
+            def generated(counts):
+                messagebox.showinfo("Success", f"Generated {sum(counts.values())} unsold tickets.")
+                self.changes.poll()
+                dialog.destroy()
+
+            self.executor.call(
+                lambda service: service.generate_tickets(event_id, seat_counts, ticket_type), generated)
+
+        ttk.Button(dialog, text="Generate", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
+
+    def show_sell_tickets_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Sell Tickets")
+
+        fields = [
+            ("Event ID:", None),
+            ("User ID:", None),
+            ("Seat:", ['sitting', 'sitting_vip', 'standing', 'standing_vip']),
+            ("Quantity:", None)
+        ]
+
+        entries = {}
+        for i, (label, values) in enumerate(fields):
+            ttk.Label(dialog, text=label).grid(row=i, column=0, padx=5, pady=5)
+            if values:
+                entries[label] = ttk.Combobox(dialog, values=values)
+            else:
+                entries[label] = ttk.Entry(dialog)
+            entries[label].grid(row=i, column=1, padx=5, pady=5)
+        entries["Quantity:"].insert(0, '1')
+
+        def save():
             try:
-                query = "DELETE FROM Kravtsov_Tickets WHERE ticket_id = ?"
-                self.cursor.execute(query, (ticket_id,))
-                self.conn.commit()
-                self.load_tickets()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+                event_id = int(entries["Event ID:"].get())
+                user_id = int(entries["User ID:"].get())
+                quantity = int(entries["Quantity:"].get())
+            except ValueError:
+                messagebox.showerror("Error", "Event ID, User ID and Quantity must be numbers.")
+                return
+            seat = entries["Seat:"].get()
+
+            def sold(ticket_ids):
+                messagebox.showinfo("Success", f"Sold tickets: {', '.join(map(str, ticket_ids))}")
+                self.changes.poll()
+                dialog.destroy()
+
+            self.executor.call(lambda service: service.sell_tickets(event_id, seat, quantity, user_id), sold)
+
+        ttk.Button(dialog, text="Sell", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
+
+    def delete_ticket(self):
+        self.delete_selected('tickets', "ticket", "tickets")
 
     def show_add_user_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -428,17 +836,11 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
         def save():
-            try:
-                query = "INSERT INTO Kravtsov_Users (name, email) VALUES (?, ?)"
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Email:"].get()
-                ))
-                self.conn.commit()
-                self.load_users()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'name': entries["Name:"].get(),
+                'email': entries["Email:"].get()
+            }
+            self.run_service(lambda service: service.create('users', values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
@@ -463,28 +865,15 @@ class EventManagementGUI:
             entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Users WHERE user_id = ?"
-        user = self.cursor.execute(query, (user_id,)).fetchone()
-        for i, value in enumerate(user[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('users', user_id),
+                           lambda row: self.fill_entries(entries, fields, 'users', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Users
-                SET name = ?, email = ?
-                WHERE user_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Email:"].get(),
-                    user_id
-                ))
-                self.conn.commit()
-                self.load_users()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'name': entries["Name:"].get(),
+                'email': entries["Email:"].get()
+            }
+            self.run_service(lambda service: service.update('users', user_id, values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
     
@@ -498,35 +887,13 @@ class EventManagementGUI:
 
         self.set_button_state('users', 'disabled')
         
-        query = """
-        SELECT t.ticket_id, e.event_name, e.event_start, t.ticket_type, t.seat, t.status
-        FROM Kravtsov_Tickets t
-        JOIN Kravtsov_Events e ON t.event_id = e.event_id
-        WHERE t.user_id = ?
-        ORDER BY e.event_start
-        """
-        self.cursor.execute(query, (user_id,))
-        data = self.cursor.fetchall()
         columns = ('Ticket ID', 'Event Name', 'Event Start', 'Ticket Type', 'Seat', 'Status')
-        self.update_treeview(self.users_tree, columns, data)
+        self.executor.call(lambda service: service.user_tickets(user_id),
+                           lambda rows: self.update_treeview(self.users_tree, columns, [tuple(row.values()) for row in rows]))
 
 
     def delete_user(self):
-        selected_item = self.users_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select a user to delete.")
-            return
-
-        user_id = self.users_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this user?")
-        if confirm:
-            try:
-                query = "DELETE FROM Kravtsov_Users WHERE user_id = ?"
-                self.cursor.execute(query, (user_id,))
-                self.conn.commit()
-                self.load_users()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+        self.delete_selected('users', "user", "users")
 
     def show_add_staff_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -549,25 +916,16 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
         def save():
-            try:
-                query = """
-                INSERT INTO Kravtsov_Staff (staff_name, staff_email, phone_number, position, schedule_start, schedule_end, salary)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Email:"].get(),
-                    entries["Phone:"].get(),
-                    entries["Position:"].get(),
-                    entries["Schedule Start (HH:MM):"].get(),
-                    entries["Schedule End (HH:MM):"].get(),
-                    entries["Salary:"].get()
-                ))
-                self.conn.commit()
-                self.load_staff()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'staff_name': entries["Name:"].get(),
+                'staff_email': entries["Email:"].get(),
+                'phone_number': entries["Phone:"].get(),
+                'position': entries["Position:"].get(),
+                'schedule_start': entries["Schedule Start (HH:MM):"].get(),
+                'schedule_end': entries["Schedule End (HH:MM):"].get(),
+                'salary': entries["Salary:"].get()
+            }
+            self.run_service(lambda service: service.create('staff', values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
@@ -600,34 +958,20 @@ class EventManagementGUI:
                 entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Staff WHERE staff_id = ?"
-        staff = self.cursor.execute(query, (staff_id,)).fetchone()
-        for i, value in enumerate(staff[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('staff', staff_id),
+                           lambda row: self.fill_entries(entries, fields, 'staff', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Staff
-                SET staff_name = ?, staff_email = ?, phone_number = ?, 
-                    position = ?, schedule_start = ?, schedule_end = ?, salary = ?
-                WHERE staff_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Email:"].get(),
-                    entries["Phone:"].get(),
-                    entries["Position:"].get(),
-                    entries["Schedule Start (HH:MM):"].get(),
-                    entries["Schedule End (HH:MM):"].get(),
-                    entries["Salary:"].get(),
-                    staff_id
-                ))
-                self.conn.commit()
-                self.load_staff()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'staff_name': entries["Name:"].get(),
+                'staff_email': entries["Email:"].get(),
+                'phone_number': entries["Phone:"].get(),
+                'position': entries["Position:"].get(),
+                'schedule_start': entries["Schedule Start (HH:MM):"].get(),
+                'schedule_end': entries["Schedule End (HH:MM):"].get(),
+                'salary': entries["Salary:"].get()
+            }
+            self.run_service(lambda service: service.update('staff', staff_id, values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
@@ -640,37 +984,9 @@ class EventManagementGUI:
         event_id = self.events_tree.item(selected_item, "values")[0]
         self.set_button_state('events', 'disabled')
 
-        query = """
-        SELECT 
-            s.staff_name,
-            s.position,
-            s.schedule_start,
-            s.schedule_end
-        FROM Kravtsov_Staff s
-        JOIN Kravtsov_Events e ON e.event_id = ?
-        WHERE
-        CASE
-            WHEN strftime('%H:%M', s.schedule_start) < strftime('%H:%M', s.schedule_end) THEN
-                NOT (
-                    strftime('%H:%M', e.event_end) <= strftime('%H:%M', s.schedule_start)
-                    OR
-                    strftime('%H:%M', e.event_start) > strftime('%H:%M', s.schedule_end)
-                )
-            ELSE
-                NOT (
-                    (strftime('%H:%M', e.event_end) <= strftime('%H:%M', s.schedule_start) 
-                    AND strftime('%H:%M', e.event_start) < strftime('%H:%M', s.schedule_end))
-                    OR
-                    (strftime('%H:%M', e.event_start) > strftime('%H:%M', s.schedule_end) 
-                    AND strftime('%H:%M', e.event_end) >= strftime('%H:%M', s.schedule_start))
-                 )
-        END
-        ORDER BY e.event_start
-        """
-        self.cursor.execute(query, (event_id,))
-        data = self.cursor.fetchall()
-        columns = ('Staff Name', 'Position', 'Schedule Start', 'Schedule End')
-        self.update_treeview(self.events_tree, columns, data)
+        columns = ('Staff ID', 'Staff Name', 'Position', 'Schedule Start', 'Schedule End')
+        self.executor.call(lambda service: service.available_staff(event_id),
+                           lambda rows: self.update_treeview(self.events_tree, columns, [tuple(row.values()) for row in rows]))
 
     def lookup_staff_facilities(self):
         selected_item = self.staff_tree.selection()
@@ -681,34 +997,12 @@ class EventManagementGUI:
         staff_id = self.staff_tree.item(selected_item, "values")[0]
         self.set_button_state('staff', 'disabled')
         
-        query = """
-        SELECT f.facility_id, f.facility_name, f.facility_status
-        FROM Kravtsov_Facilities f
-        JOIN Kravtsov_Facilities_Staff fs ON f.facility_id = fs.facility_id
-        WHERE fs.staff_id = ?
-        """
-        self.cursor.execute(query, (staff_id,))
-        data = self.cursor.fetchall()
         columns = ('Facility ID', 'Facility Name', 'Facility Status')
-        self.update_treeview(self.staff_tree, columns, data)
+        self.executor.call(lambda service: service.staff_facilities(staff_id),
+                           lambda rows: self.update_treeview(self.staff_tree, columns, [tuple(row.values()) for row in rows]))
 
     def delete_staff(self):
-        selected_item = self.staff_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select a staff member to delete.")
-            return
-
-        staff_id = self.staff_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this staff member?")
-        if confirm:
-            try:
-                self.relationship_handlers.cleanup_relationships('Kravtsov_Staff', 'staff_id', staff_id)
-                query = "DELETE FROM Kravtsov_Staff WHERE staff_id = ?"
-                self.cursor.execute(query, (staff_id,))
-                self.conn.commit()
-                self.load_staff()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+        self.delete_selected('staff', "staff member", "staff members")
 
     def show_add_facility_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -729,20 +1023,11 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
         def save():
-            try:
-                query = """
-                INSERT INTO Kravtsov_Facilities (facility_name, facility_status)
-                VALUES (?, ?)
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Status:"].get()
-                ))
-                self.conn.commit()
-                self.load_facilities()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'facility_name': entries["Name:"].get(),
+                'facility_status': entries["Status:"].get()
+            }
+            self.run_service(lambda service: service.create('facilities', values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
     
@@ -770,28 +1055,15 @@ class EventManagementGUI:
                 entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Facilities WHERE facility_id = ?"
-        facility = self.cursor.execute(query, (facility_id,)).fetchone()
-        for i, value in enumerate(facility[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('facilities', facility_id),
+                           lambda row: self.fill_entries(entries, fields, 'facilities', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Facilities
-                SET facility_name = ?, facility_status = ?
-                WHERE facility_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Status:"].get(),
-                    facility_id
-                ))
-                self.conn.commit()
-                self.load_facilities()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'facility_name': entries["Name:"].get(),
+                'facility_status': entries["Status:"].get()
+            }
+            self.run_service(lambda service: service.update('facilities', facility_id, values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
@@ -805,39 +1077,55 @@ class EventManagementGUI:
 
         self.set_button_state('facilities', 'disabled')
     
-        query = """
-        SELECT 
-            e.event_id, e.event_name, e.event_type, 
-            e.event_start, e.event_end,
-            fe.usage_start, fe.usage_end,
-            e.event_holder
-        FROM Kravtsov_Facilities_Events fe
-        JOIN Kravtsov_Events e ON e.event_id = fe.event_id
-        WHERE fe.facility_id = ?
-        ORDER BY fe.usage_start
-        """
-        self.cursor.execute(query, (facility_id,))
-        data = self.cursor.fetchall()
         columns = ('Event ID', 'Event Name', 'Event Type', 'Event Start', 'Event End', 'Usage Start', 'Usage End', 'Event Holder')
-        self.update_treeview(self.facilities_tree, columns, data)
+        self.executor.call(lambda service: service.facility_events(facility_id),
+                           lambda rows: self.update_treeview(self.facilities_tree, columns, [tuple(row.values()) for row in rows]))
 
-    def delete_facility(self):
-        selected_item = self.facilities_tree.selection()
+    def show_timeline(self, name, days=TIMELINE_DAYS):
+        tree = getattr(self, f"{name}_tree")
+        selected_item = tree.selection()
         if not selected_item:
-            messagebox.showwarning("Warning", "Please select a facility to delete.")
+            messagebox.showwarning("Warning", "Please select a resource to show its timeline.")
             return
 
-        facility_id = self.facilities_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this facility?")
-        if confirm:
-            try:
-                self.relationship_handlers.cleanup_relationships('Kravtsov_Facilities', 'facility_id', facility_id)
-                query = "DELETE FROM Kravtsov_Facilities WHERE facility_id = ?"
-                self.cursor.execute(query, (facility_id,))
-                self.conn.commit()
-                self.load_facilities()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+        resource_id, resource_name = tree.item(selected_item[0], "values")[:2]
+        start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        end = start + timedelta(days=days)
+        self.executor.call(lambda service: service.resource_timeline(name, int(resource_id), start, end),
+                           lambda bookings: self.draw_timeline(f"{resource_name} - next {days} days", start, end, bookings))
+
+    def draw_timeline(self, title, start, end, bookings):
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        width, height, margin = 700, 60, 10
+        canvas = tk.Canvas(dialog, width=width, height=height, background='white')
+        canvas.pack(fill='x', padx=5, pady=5)
+
+        scale = (width - 2 * margin) / (end - start).total_seconds()
+        x = lambda moment: margin + max(0, min((moment - start).total_seconds(), (end - start).total_seconds())) * scale
+        day = start.replace(hour=0)
+        while day <= end:
+            if day >= start:
+                canvas.create_line(x(day), 5, x(day), height - 5, fill='#ddd')
+                canvas.create_text(x(day) + 2, height - 8, text=f"{day:%d/%m}", anchor='w', font=('TkDefaultFont', 7))
+            day += timedelta(days=1)
+        canvas.create_line(x(datetime.now()), 0, x(datetime.now()), height, fill='red')
+        for booking in bookings:
+            canvas.create_rectangle(x(booking['usage_start']), 12, x(booking['usage_end']), 36,
+                                    fill='#4a90d9', outline='#2a6099')
+
+        columns = ('Event ID', 'Event Name', 'Usage Start', 'Usage End')
+        listing = ttk.Treeview(dialog, columns=columns, show='headings', height=8)
+        for col in columns:
+            listing.heading(col, text=col)
+        listing.pack(expand=True, fill='both', padx=5, pady=5)
+        for booking in bookings:
+            listing.insert('', 'end', values=tuple(booking.values()))
+        if not bookings:
+            listing.insert('', 'end', values=('', "No bookings.", '', ''))
+
+    def delete_facility(self):
+        self.delete_selected('facilities', "facility", "facilities")
 
     def show_add_equipment_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -858,20 +1146,11 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
         def save():
-            try:
-                query = """
-                INSERT INTO Kravtsov_Equipment (item_name, item_status)
-                VALUES (?, ?)
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Status:"].get()
-                ))
-                self.conn.commit()
-                self.load_equipment()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'item_name': entries["Name:"].get(),
+                'item_status': entries["Status:"].get()
+            }
+            self.run_service(lambda service: service.create('equipment', values), dialog)
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
     def show_update_equipment_dialog(self):
@@ -898,28 +1177,15 @@ class EventManagementGUI:
                 entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Equipment WHERE item_id = ?"
-        equipment = self.cursor.execute(query, (equipment_id,)).fetchone()
-        for i, value in enumerate(equipment[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('equipment', equipment_id),
+                           lambda row: self.fill_entries(entries, fields, 'equipment', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Equipment
-                SET item_name = ?, item_status = ?
-                WHERE item_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Status:"].get(),
-                    equipment_id
-                ))
-                self.conn.commit()
-                self.load_equipment()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'item_name': entries["Name:"].get(),
+                'item_status': entries["Status:"].get()
+            }
+            self.run_service(lambda service: service.update('equipment', equipment_id, values), dialog)
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
     def lookup_equipment_events(self):
@@ -932,39 +1198,12 @@ class EventManagementGUI:
 
         self.set_button_state('equipment', 'disabled')
 
-        query = """
-        SELECT 
-            e.event_id, e.event_name, e.event_type,
-            e.event_start, e.event_end,
-            ee.usage_start, ee.usage_end,
-            e.event_holder
-        FROM Kravtsov_Equipment_Events ee
-        JOIN Kravtsov_Events e ON e.event_id = ee.event_id
-        WHERE ee.item_id = ?
-        ORDER BY ee.usage_start
-        """
-        self.cursor.execute(query, (equipment_id,))
-        data = self.cursor.fetchall()
         columns = ('Event ID', 'Event Name', 'Event Type', 'Event Start', 'Event End', 'Usage Start', 'Usage End', 'Event Holder')
-        self.update_treeview(self.equipment_tree, columns, data)
+        self.executor.call(lambda service: service.equipment_events(equipment_id),
+                           lambda rows: self.update_treeview(self.equipment_tree, columns, [tuple(row.values()) for row in rows]))
 
     def delete_equipment(self):
-        selected_item = self.equipment_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select an equipment to delete.")
-            return
-
-        equipment_id = self.equipment_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this equipment?")
-        if confirm:
-            try:
-                self.relationship_handlers.cleanup_relationships('Kravtsov_Equipment', 'item_id', equipment_id)
-                query = "DELETE FROM Kravtsov_Equipment WHERE item_id = ?"
-                self.cursor.execute(query, (equipment_id,))
-                self.conn.commit()
-                self.load_equipment()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+        self.delete_selected('equipment', "equipment item", "equipment items")
 
     def show_add_security_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -986,21 +1225,12 @@ class EventManagementGUI:
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
         def save():
-            try:
-                query = """
-                INSERT INTO Kravtsov_Security (sec_item_name, sec_item_status, facility_id)
-                VALUES (?, ?, ?)
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Status:"].get(),
-                    entries["Facility ID:"].get()
-                ))
-                self.conn.commit()
-                self.load_security()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'sec_item_name': entries["Name:"].get(),
+                'sec_item_status': entries["Status:"].get(),
+                'facility_id': entries["Facility ID:"].get()
+            }
+            self.run_service(lambda service: service.create('security', values), dialog)
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
     def show_update_security_dialog(self):
@@ -1028,48 +1258,21 @@ class EventManagementGUI:
                 entries[label] = ttk.Entry(dialog)
             entries[label].grid(row=i, column=1, padx=5, pady=5)
 
-        query = "SELECT * FROM Kravtsov_Security WHERE sec_item_id = ?"
-        security = self.cursor.execute(query, (security_id,)).fetchone()
-        for i, value in enumerate(security[1:]):
-            entries[fields[i][0]].insert(0, value if value is not None else "")
+        self.executor.call(lambda service: service.get('security', security_id),
+                           lambda row: self.fill_entries(entries, fields, 'security', row))
 
         def save():
-            try:
-                query = """
-                UPDATE Kravtsov_Security
-                SET sec_item_name = ?, sec_item_status = ?, facility_id = ?
-                WHERE sec_item_id = ?
-                """
-                self.cursor.execute(query, (
-                    entries["Name:"].get(),
-                    entries["Status:"].get(),
-                    entries["Facility ID:"].get(),
-                    security_id
-                ))
-                self.conn.commit()
-                self.load_security()
-                dialog.destroy()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+            values = {
+                'sec_item_name': entries["Name:"].get(),
+                'sec_item_status': entries["Status:"].get(),
+                'facility_id': entries["Facility ID:"].get()
+            }
+            self.run_service(lambda service: service.update('security', security_id, values), dialog)
 
         ttk.Button(dialog, text="Save", command=save).grid(row=len(fields), column=0, columnspan=2, pady=10)
 
     def delete_security(self):
-        selected_item = self.security_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select a security item to delete.")
-            return
-
-        security_id = self.security_tree.item(selected_item, "values")[0]
-        confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this security item?")
-        if confirm:
-            try:
-                query = "DELETE FROM Kravtsov_Security WHERE sec_item_id = ?"
-                self.cursor.execute(query, (security_id,))
-                self.conn.commit()
-                self.load_security()
-            except sqlite3.Error as e:
-                messagebox.showerror("Error", str(e))
+        self.delete_selected('security', "security item", "security items")
     
     def show_assign_facility_staff_dialog(self):
         selected_facility = self.facilities_tree.selection()
@@ -1082,24 +1285,21 @@ class EventManagementGUI:
         dialog = tk.Toplevel(self.root)
         dialog.title("Assign Staff to Facility")
         
-        self.cursor.execute("SELECT staff_id, staff_name FROM Kravtsov_Staff")
-        staff_list = self.cursor.fetchall()
-        
-        ttk.Label(dialog, text="Select Staff:").grid(row=0, column=0, padx=5, pady=5)
-        staff_var = tk.StringVar()
-        staff_combo = ttk.Combobox(dialog, textvariable=staff_var)
-        staff_combo['values'] = [f"{id} - {name}" for id, name in staff_list]
-        staff_combo.grid(row=0, column=1, padx=5, pady=5)
-        
+        ttk.Label(dialog, text="Select Staff (name or ID):").grid(row=0, column=0, padx=5, pady=5)
+        staff_picker = TypeaheadPicker(dialog, self.executor, self.lookups, 'staff')
+        staff_picker.grid(row=0, column=1, padx=5, pady=5)
+
         def save():
-            if not staff_var.get():
+            staff_id = staff_picker.selected_id()
+            if staff_id is None:
                 messagebox.showwarning("Warning", "Please select a staff member.")
                 return
-                
-            staff_id = int(staff_var.get().split(" - ")[0])
-            if self.relationship_handlers.assign_staff_to_facility(facility_id, staff_id):
+
+            def assigned():
                 dialog.destroy()
-                self.load_facilities()
+                self.changes.poll()
+
+            self.relationship_handlers.assign_staff_to_facility(facility_id, staff_id, assigned)
         
         ttk.Button(dialog, text="Assign", command=save).grid(row=1, column=0, columnspan=2, pady=10)
 
@@ -1113,14 +1313,10 @@ class EventManagementGUI:
         
         dialog = tk.Toplevel(self.root)
         dialog.title("Assign Facility to Event")
-        self.cursor.execute("SELECT event_id, event_name FROM Kravtsov_Events")
-        event_list = self.cursor.fetchall()
         
-        ttk.Label(dialog, text="Select Event:").grid(row=0, column=0, padx=5, pady=5)
-        event_var = tk.StringVar()
-        event_combo = ttk.Combobox(dialog, textvariable=event_var)
-        event_combo['values'] = [f"{id} - {name}" for id, name in event_list]
-        event_combo.grid(row=0, column=1, padx=5, pady=5)
+        ttk.Label(dialog, text="Select Event (name or ID):").grid(row=0, column=0, padx=5, pady=5)
+        event_picker = TypeaheadPicker(dialog, self.executor, self.lookups, 'events', upcoming=True)
+        event_picker.grid(row=0, column=1, padx=5, pady=5)
         
         ttk.Label(dialog, text="Usage Start (YYYY-MM-DD HH:MM:SS):").grid(row=1, column=0, padx=5, pady=5)
         start_entry = ttk.Entry(dialog)
@@ -1131,18 +1327,82 @@ class EventManagementGUI:
         end_entry.grid(row=2, column=1, padx=5, pady=5)
         
         def save():
-            if not event_var.get():
+            event_id = event_picker.selected_id()
+            if event_id is None:
                 messagebox.showwarning("Warning", "Please select an event.")
                 return
-                
-            event_id = int(event_var.get().split(" - ")[0])
-            if self.relationship_handlers.assign_facility_to_event(
-                facility_id, event_id, start_entry.get(), end_entry.get()):
+
+            def assigned():
                 dialog.destroy()
-                self.load_facilities()
+                self.changes.poll()
+
+            self.relationship_handlers.assign_facility_to_event(
+                facility_id, event_id, start_entry.get(), end_entry.get(), assigned)
         
         ttk.Button(dialog, text="Assign", command=save).grid(row=3, column=0, columnspan=2, pady=10)
 
+    def show_schedule_facilities_dialog(self):
+        # Selected facilities are the candidates; with none selected, every facility that
+        # is not private is.
+        facility_ids = [int(self.facilities_tree.item(item, "values")[0])
+                        for item in self.facilities_tree.selection()] or None
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Schedule Events on Facilities")
+
+        ttk.Label(dialog, text="Event IDs (e.g. 1-40, 52):").grid(row=0, column=0, padx=5, pady=5)
+        ids_entry = ttk.Entry(dialog, width=40)
+        ids_entry.grid(row=0, column=1, padx=5, pady=5)
+
+        ttk.Label(dialog, text="Setup Minutes (each side):").grid(row=1, column=0, padx=5, pady=5)
+        setup_entry = ttk.Entry(dialog)
+        setup_entry.insert(0, "0")
+        setup_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        candidates = f"the {len(facility_ids)} selected facilities" if facility_ids else "all facilities that are not private"
+        ttk.Label(dialog, text=f"Candidates: {candidates}").grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+
+        columns = ('Event ID', 'Facility ID', 'Usage Start', 'Usage End', 'Note')
+        report = ttk.Treeview(dialog, columns=columns, show='headings', height=12)
+        for col in columns:
+            report.heading(col, text=col)
+        report.grid(row=4, column=0, columnspan=2, sticky='nsew', padx=5, pady=5)
+        summary = ttk.Label(dialog, text="Preview shows the plan without booking anything.")
+        summary.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
+
+        def schedule(dry_run):
+            try:
+                event_ids = parse_ids(ids_entry.get())
+            except ValueError:
+                messagebox.showwarning("Warning", "Event IDs must be numbers or ranges like 1-40.")
+                return
+            if not event_ids:
+                messagebox.showwarning("Warning", "Please enter the events to schedule.")
+                return
+            if not dry_run and not messagebox.askyesno("Confirm", f"Book facilities for {len(event_ids)} events?"):
+                return
+
+            def scheduled(result):
+                report.delete(*report.get_children())
+                note = "booked" if result['applied'] else "planned"
+                for placed in result['placed']:
+                    report.insert('', 'end', values=(placed['event_id'], placed['facility_id'],
+                                                     placed['usage_start'], placed['usage_end'], note))
+                for unplaced in result['unplaced']:
+                    report.insert('', 'end', values=(unplaced['event_id'], '', '', '', unplaced['reason']))
+                summary.config(text=f"{len(result['placed'])} {note} on {result['facilities_used']} facilities, "
+                                    f"{len(result['unplaced'])} could not be placed.")
+                if result['applied']:
+                    self.changes.poll()
+
+            self.executor.call(lambda service: service.schedule_facilities(
+                event_ids, facility_ids, setup_minutes=setup_entry.get(), dry_run=dry_run), scheduled)
+
+        buttons = ttk.Frame(dialog)
+        buttons.grid(row=3, column=0, columnspan=2, pady=5)
+        ttk.Button(buttons, text="Preview", command=lambda: schedule(True)).pack(side='left', padx=5)
+        ttk.Button(buttons, text="Apply", command=lambda: schedule(False)).pack(side='left', padx=5)
+
     def show_assign_equipment_event_dialog(self):
         selected_equipment = self.equipment_tree.selection()
         if not selected_equipment:
@@ -1154,14 +1414,10 @@ class EventManagementGUI:
         dialog = tk.Toplevel(self.root)
         dialog.title("Assign Equipment to Event")
 
-        self.cursor.execute("SELECT event_id, event_name FROM Kravtsov_Events")
-        event_list = self.cursor.fetchall()
 
-        ttk.Label(dialog, text="Select Event:").grid(row=0, column=0, padx=5, pady=5)
-        event_var = tk.StringVar()
-        event_combo = ttk.Combobox(dialog, textvariable=event_var)
-        event_combo['values'] = [f"{id} - {name}" for id, name in event_list]
-        event_combo.grid(row=0, column=1, padx=5, pady=5)
+        ttk.Label(dialog, text="Select Event (name or ID):").grid(row=0, column=0, padx=5, pady=5)
+        event_picker = TypeaheadPicker(dialog, self.executor, self.lookups, 'events', upcoming=True)
+        event_picker.grid(row=0, column=1, padx=5, pady=5)
 
         ttk.Label(dialog, text="Usage Start (YYYY-MM-DD HH:MM:SS):").grid(row=1, column=0, padx=5, pady=5)
         start_entry = ttk.Entry(dialog)
@@ -1172,155 +1428,176 @@ class EventManagementGUI:
         end_entry.grid(row=2, column=1, padx=5, pady=5)
 
         def save():
-            if not event_var.get():
+            event_id = event_picker.selected_id()
+            if event_id is None:
                 messagebox.showwarning("Warning", "Please select an event.")
                 return
 
-            event_id = int(event_var.get().split(" - ")[0])
-            if self.relationship_handlers.assign_equipment_to_event(
-                    equipment_id, event_id, start_entry.get(), end_entry.get()):
+            def assigned():
                 dialog.destroy()
-                self.load_equipment()
+                self.changes.poll()
+
+            self.relationship_handlers.assign_equipment_to_event(
+                equipment_id, event_id, start_entry.get(), end_entry.get(), assigned)
 
         ttk.Button(dialog, text="Assign", command=save).grid(row=3, column=0, columnspan=2, pady=10)
 
 class RelationshipHandlers:
-    def __init__(self, cursor, conn):
-        self.cursor = cursor
-        self.conn = conn
+    def __init__(self, executor):
+        self.executor = executor
+
+    def assign_staff_to_facility(self, facility_id, staff_id, on_success):
+        self._run(lambda service: service.assign_staff_to_facility(facility_id, staff_id),
+                  "Staff assigned to facility successfully.",
+                  "Could not assign staff to facility", on_success)
+
+    def assign_facility_to_event(self, facility_id, event_id, usage_start_str, usage_end_str, on_success):
+        self._run(lambda service: service.assign_facility_to_event(facility_id, event_id, usage_start_str, usage_end_str),
+                  "Facility assigned to event successfully.",
+                  "Could not assign facility to event", on_success)
+
+    def assign_equipment_to_event(self, item_id, event_id, usage_start_str, usage_end_str, on_success):
+        self._run(lambda service: service.assign_equipment_to_event(item_id, event_id, usage_start_str, usage_end_str),
+                  "Equipment assigned to event successfully.",
+                  "Could not assign equipment to event", on_success)
+
+    def _run(self, task, success_message, error_prefix, on_success):
+        def done(_):
+            messagebox.showinfo("Success", success_message)
+            on_success()
+
+        def failed(e):
+            if isinstance(e, ServiceError):
+                messagebox.showerror("Error", str(e))
+            else:
+                messagebox.showerror("Error", f"{error_prefix}: {str(e)}")
+
+        self.executor.call(task, done, failed)
+
+class LookupCache:
+    # Recent picker lookups, least recently used first. Cleared when the ChangeFeed sees
+    # events or staff change; entries also age out, since "upcoming" moves with the clock.
+    def __init__(self, size=LOOKUP_CACHE_SIZE, max_age=LOOKUP_CACHE_SECONDS):
+        self.size = size
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class TypeaheadPicker:
+    # Editable combobox whose choices are looked up as the user types: a lookup runs
+    # TYPEAHEAD_DELAY_MS after the last keystroke, and answers for text that has since
+    # changed are dropped, as are answers arriving after the dialog has closed. Events
+    # can be limited to those not yet over.
+    def __init__(self, parent, executor, cache, entity, upcoming=None):
+        self.executor = executor
+        self.cache = cache
+        self.entity = entity
+        self.frame = ttk.Frame(parent)
+        self.combo = ttk.Combobox(self.frame, width=40)
+        self.combo.pack(side='left')
+        self.combo.bind('<KeyRelease>', self._typed)
+        self.combo.bind('<Destroy>', self._destroyed)
+        self.upcoming = None
+        if upcoming is not None:
+            self.upcoming = tk.BooleanVar(value=upcoming)
+            ttk.Checkbutton(self.frame, text="Upcoming only", variable=self.upcoming,
+                            command=self.lookup).pack(side='left', padx=(5, 0))
+        self._pending = None
+        self.lookup()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def _typed(self, event):
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        if self._pending is not None:
+            self.combo.after_cancel(self._pending)
+        self._pending = self.combo.after(TYPEAHEAD_DELAY_MS, self.lookup)
+
+    def _destroyed(self, event):
+        if self._pending is not None:
+            self.combo.after_cancel(self._pending)
+            self._pending = None
+
+    def lookup(self):
+        self._pending = None
+        text = self.combo.get().strip()
+        upcoming = self.upcoming is not None and bool(self.upcoming.get())
+        key = (self.entity, text.lower(), upcoming)
+        choices = self.cache.get(key)
+        if choices is not None:
+            self._show(text, choices)
+            return
 
-    def assign_staff_to_facility(self, facility_id, staff_id):
-        try:
-            check_query = """
-            SELECT COUNT(*) FROM Kravtsov_Facilities_Staff
-            WHERE facility_id = ? AND staff_id = ?
-            """
-            self.cursor.execute(check_query, (facility_id, staff_id))
-            if self.cursor.fetchone()[0] > 0:
-                messagebox.showinfo("Info", "Staff is already assigned to this facility.")
-                return False
-
-            query = """
-            INSERT INTO Kravtsov_Facilities_Staff (facility_id, staff_id)
-            VALUES (?, ?)
-            """
-            self.cursor.execute(query, (facility_id, staff_id))
-            self.conn.commit()
-            messagebox.showinfo("Success", "Staff assigned to facility successfully.")
-            return True
-        except sqlite3.Error as e:
-            messagebox.showerror("Error", f"Could not assign staff to facility: {str(e)}")
-            return False
-
-    def assign_facility_to_event(self, facility_id, event_id, usage_start_str, usage_end_str):
-        try:
-            usage_start = datetime.strptime(usage_start_str, '%Y-%m-%d %H:%M:%S')
-            usage_end = datetime.strptime(usage_end_str, '%Y-%m-%d %H:%M:%S')
-
-            availability_query = """
-            SELECT COUNT(*) FROM Kravtsov_Facilities_Events
-            WHERE facility_id = ? AND NOT (
-                usage_end <= ? OR usage_start >= ?
-            )
-            """
-            self.cursor.execute(availability_query, (facility_id, usage_start_str, usage_end_str))
-            if self.cursor.fetchone()[0] > 0:
-                messagebox.showerror("Error", "Facility is already in use during this time period.")
-                return False
-
-            query = """
-            INSERT INTO Kravtsov_Facilities_Events (facility_id, event_id, usage_start, usage_end)
-            VALUES (?, ?, ?, ?)
-            """
-            self.cursor.execute(query, (facility_id, event_id, usage_start_str, usage_end_str))
-
-            update_status = """
-            UPDATE Kravtsov_Facilities
-            SET facility_status = 'occupied'
-            WHERE facility_id = ?
-            """
-            self.cursor.execute(update_status, (facility_id,))
-
-
-            self.conn.commit()
-            messagebox.showinfo("Success", "Facility assigned to event successfully.")
-            return True
-        except ValueError:
-            messagebox.showerror("Error", "Invalid date/time format.")
-            return False
-        except sqlite3.Error as e:
-            self.conn.rollback()
-            messagebox.showerror("Error", f"Could not assign facility to event: {str(e)}")
-            return False
-
-    def assign_equipment_to_event(self, item_id, event_id, usage_start_str, usage_end_str):
-          try:
-            usage_start = datetime.strptime(usage_start_str.strip(), '%Y-%m-%d %H:%M:%S')
-            usage_end = datetime.strptime(usage_end_str.strip(), '%Y-%m-%d %H:%M:%S')
-
-
-            availability_query = """
-            SELECT COUNT(*) FROM Kravtsov_Equipment_Events
-            WHERE item_id = ? AND NOT (
-                usage_end <= ? OR usage_start >= ?
-            )
-            """
-            self.cursor.execute(availability_query, (item_id, usage_start_str, usage_end_str))
-            if self.cursor.fetchone()[0] > 0:
-                messagebox.showerror("Error", "Equipment is already in use during this time period.")
-                return False
-
-            query = """
-            INSERT INTO Kravtsov_Equipment_Events (item_id, event_id, usage_start, usage_end)
-            VALUES (?, ?, ?, ?)
-            """
-            self.cursor.execute(query, (item_id, event_id, usage_start_str, usage_end_str))
-
-            update_status = """
-            UPDATE Kravtsov_Equipment
-            SET item_status = 'occupied'
-            WHERE item_id = ?
-            """
-            self.cursor.execute(update_status, (item_id,))
-
-            self.conn.commit()
-            messagebox.showinfo("Success", "Equipment assigned to event successfully.")
-            return True
-          except ValueError:
-             messagebox.showerror("Error", "Invalid date/time format.")
-             return False
-          except sqlite3.Error as e:
-             self.conn.rollback()
-             messagebox.showerror("Error", f"Could not assign equipment to event: {str(e)}")
-             return False
-
-    def cleanup_relationships(self, table_name, id_column, id_value):
-        relationship_tables = {
-            'Kravtsov_Facilities': [
-                ('Kravtsov_Facilities_Staff', 'facility_id'),
-                ('Kravtsov_Facilities_Events', 'facility_id')
-            ],
-            'Kravtsov_Staff': [
-                ('Kravtsov_Facilities_Staff', 'staff_id')
-            ],
-             'Kravtsov_Equipment': [
-                ('Kravtsov_Equipment_Events', 'item_id')
-            ],
-            'Kravtsov_Events': [
-                ('Kravtsov_Facilities_Events', 'event_id'),
-                 ('Kravtsov_Equipment_Events', 'event_id')
-            ]
-        }
+        def found(results):
+            choices = [f"{result['id']} - {result['label']}" for result in results]
+            self.cache.put(key, choices)
+            self._show(text, choices)
+        self.executor.call(lambda service: service.suggest(self.entity, text, upcoming), found)
 
-        if table_name in relationship_tables:
-            for rel_table, rel_column in relationship_tables[table_name]:
-                try:
-                    query = f"DELETE FROM {rel_table} WHERE {rel_column} = ?"
-                    self.cursor.execute(query, (id_value,))
-                except sqlite3.Error as e:
-                    messagebox.showerror("Error", f"Could not clean up relationships: {str(e)}")
+    def _show(self, text, choices):
+        if self.combo.winfo_exists() and self.combo.get().strip() == text:
+            self.combo['values'] = choices
 
-if __name__ == "__main__":
+    def selected_id(self):
+        value = self.combo.get().split(" - ")[0].strip()
+        return int(value) if value.isdigit() else None
+
+
+def measure_startup(db_path=None):
+    started = time.perf_counter()
     root = tk.Tk()
-    app = EventManagementGUI(root)
-    root.mainloop()
\ No newline at end of file
+    marks = {'tk': time.perf_counter()}
+
+    def painted():
+        marks['first_paint'] = time.perf_counter()
+        previous = started
+        for name in ('tk', 'setup_database', 'widgets', 'first_paint'):
+            print(f"{name:>15}: {(marks[name] - previous) * 1000:8.1f} ms")
+            previous = marks[name]
+        print(f"{'time to paint':>15}: {(marks['first_paint'] - started) * 1000:8.1f} ms")
+        app.executor.close()
+        app.sweeper.close()
+        root.after(0, root.destroy)
+
+    app = EventManagementGUI(root, db_path, on_first_paint=painted)
+    marks.update(app.startup_marks)
+    root.mainloop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stadium management GUI.")
+    parser.add_argument('db', nargs='?', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="report time to first paint of the initial tab and exit")
+    parser.add_argument('--slow-query-ms', type=float, default=DEFAULT_SLOW_MS,
+                        help="statements slower than this are kept with their query plan")
+    parser.add_argument('--slow-query-log', help="also append slow statements to this file as JSON lines")
+    args = parser.parse_args()
+
+    if args.measure_startup:
+        measure_startup(args.db)
+    else:
+        root = tk.Tk()
+        app = EventManagementGUI(root, args.db, slow_ms=args.slow_query_ms, slow_log=args.slow_query_log)
+        root.mainloop()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import argparse
+import os
+from datetime import datetime
+
+from db_connection import connect, database_path, TIMESTAMP_FORMAT
+
+ARCHIVE_SCHEMA = 'archive'
+DEFAULT_BATCH_SIZE = 500
+
+# Tables that move to the archive with their event: (primary key, column linking to the
+# event, indexes created in the archive copy). Events come last so the hot DELETE can
+# cascade once the child rows are safely copied.
+ARCHIVED_TABLES = {
+    'Kravtsov_Tickets': ('ticket_id', 'event_id', [('event_id',), ('user_id',)]),
+    'Kravtsov_Facilities_Events': (None, 'event_id', [('event_id',), ('facility_id', 'usage_start')]),
+    'Kravtsov_Equipment_Events': (None, 'event_id', [('event_id',), ('item_id', 'usage_start')]),
+    'Kravtsov_Events': ('event_id', 'event_id', [('event_start',)]),
+}
+
+
+def archive_path(path=None):
+    if os.environ.get('STADIUM_ARCHIVE_PATH'):
+        return os.environ['STADIUM_ARCHIVE_PATH']
+    root, _ = os.path.splitext(database_path(path))
+    return f"{root}.archive.db"
+
+
+def combined(table):
+    # Temp view over hot plus archived rows of `table`.
+    return f"{table}_All"
+
+
+def is_attached(conn):
+    return any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+
+
+def attach_archive(conn, path=None):
+    if is_attached(conn):
+        return
+    if path is None:
+        main_file = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main')
+        path = archive_path(main_file or None)
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode = WAL")
+
+    # The archive copies keep the hot column names, order and declared types (so the
+    # TIMESTAMP converter still applies) but none of the constraints or triggers.
+    for table, (key, _, indexes) in ARCHIVED_TABLES.items():
+        columns = [(row[1], row[2]) for row in conn.execute(f"PRAGMA main.table_info({table})")]
+        definitions = [f"{name} {declared}{' PRIMARY KEY' if name == key else ''}" for name, declared in columns]
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{table} ({', '.join(definitions)})")
+        archived = {row[1] for row in conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({table})")}
+        for name, declared in columns:
+            if name not in archived:
+                conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {declared}")
+        for index in indexes:
+            name = f"idx_{table.lower().replace('kravtsov_', '')}_{'_'.join(index)}"
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.{name} ON {table} ({', '.join(index)})")
+        names = ', '.join(name for name, _ in columns)
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {combined(table)} AS "
+                     f"SELECT {names} FROM main.{table} UNION ALL SELECT {names} FROM {ARCHIVE_SCHEMA}.{table}")
+
+
+def _columns(conn, table):
+    return ', '.join(row[1] for row in conn.execute(f"PRAGMA main.table_info({table})"))
+
+
+def _copy(conn, table, column):
+    # Copy the hot rows whose `column` is in temp.archive_keys. Re-running a batch after
+    # a crash replaces what an earlier attempt already copied instead of duplicating it.
+    key = ARCHIVED_TABLES[table][0]
+    columns = _columns(conn, table)
+    if key is None:
+        conn.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.{table} WHERE {column} IN (SELECT id FROM temp.archive_keys)")
+    cursor = conn.execute(
+        f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({columns}) "
+        f"SELECT {columns} FROM main.{table} WHERE {column} IN (SELECT id FROM temp.archive_keys)")
+    return cursor.rowcount
+
+
+def _move_batch(conn, select, params, tables, delete):
+    # One transaction per batch: rows are written to the archive before they leave the
+    # hot tables. With WAL the two files do not commit atomically, so a crash in between
+    # leaves a row in both; the next run copies it again and deletes it from hot.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_keys (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.archive_keys")
+        conn.execute(f"INSERT INTO temp.archive_keys (id) {select}", params)
+        if conn.execute("SELECT COUNT(*) FROM temp.archive_keys").fetchone()[0] == 0:
+            conn.rollback()
+            return {}
+        moved = {table: _copy(conn, table, column) for table, column in tables}
+        for statement in delete:
+            conn.execute(statement)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return moved
+
+
+def _move(conn, select, params, tables, delete, batch_size, progress=None):
+    totals = {}
+    while True:
+        moved = _move_batch(conn, f"{select} LIMIT {int(batch_size)}", params, tables, delete)
+        if not moved:
+            return totals
+        for table, count in moved.items():
+            totals[table] = totals.get(table, 0) + count
+        if progress is not None:
+            progress(totals)
+
+
+def archive_events(conn, before, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    # Events that ended before `before` move with their tickets and bookings. Deleting the
+    # hot event cascades to its tickets and bookings.
+    attach_archive(conn)
+    tables = [(table, column) for table, (_, column, _) in ARCHIVED_TABLES.items()]
+    delete = [
+        "DELETE FROM main.Kravtsov_Events WHERE event_id IN (SELECT id FROM temp.archive_keys)",
+        "DELETE FROM main.Kravtsov_Ticket_Counts WHERE event_id IN (SELECT id FROM temp.archive_keys)",
+    ]
+    select = "SELECT event_id FROM main.Kravtsov_Events WHERE event_end < ? ORDER BY event_id"
+    return _move(conn, select, (before,), tables, delete, batch_size, progress)
+
+
+def archive_expired_tickets(conn, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    # Expired tickets of events that are still hot.
+    attach_archive(conn)
+    delete = ["DELETE FROM main.Kravtsov_Tickets WHERE ticket_id IN (SELECT id FROM temp.archive_keys)"]
+    select = "SELECT ticket_id FROM main.Kravtsov_Tickets WHERE status = 'expired' ORDER BY ticket_id"
+    return _move(conn, select, (), [('Kravtsov_Tickets', 'ticket_id')], delete, batch_size, progress)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move finished events and expired tickets into the archive database.")
+    parser.add_argument('--before', required=True, help="archive events that ended before this date (YYYY-MM-DD)")
+    parser.add_argument('--db', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    parser.add_argument('--archive', help="archive file (default: $STADIUM_ARCHIVE_PATH or <db>.archive.db)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--vacuum', action='store_true', help="compact the hot database afterwards")
+    args = parser.parse_args()
+
+    try:
+        before = datetime.strptime(args.before, '%Y-%m-%d')
+    except ValueError:
+        before = datetime.strptime(args.before, TIMESTAMP_FORMAT)
+
+    conn = connect(args.db)
+    attach_archive(conn, args.archive or archive_path(args.db))
+    show = lambda totals: print("  " + ", ".join(f"{table}: {count}" for table, count in totals.items()), flush=True)
+    print(f"Archiving events that ended before {before:%Y-%m-%d %H:%M:%S}...")
+    events = archive_events(conn, before, args.batch_size, show)
+    print("Archiving expired tickets...")
+    expired = archive_expired_tickets(conn, args.batch_size, show)
+    conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+    if args.vacuum:
+        conn.execute("VACUUM")
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    for table in ARCHIVED_TABLES:
+        count = events.get(table, 0) + expired.get(table, 0)
+        print(f"{table:>28}: {count} archived")
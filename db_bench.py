@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db_connection import connect
+from db_generate import DEFAULT_TICKETS, generate, scale_counts
+from db_paging import KeysetPager
+from db_services import StadiumService, ConflictError
+from db_setup import setup_database, CHANGE_TRACKED_TABLES
+from db_status import StatusPager
+
+# What each GUI tab pages: (table or view, key, table holding the row count, pager).
+TABS = {
+    'events': ('Kravtsov_Events_Inventory', 'event_id', 'Kravtsov_Events', KeysetPager),
+    'tickets': ('Kravtsov_Tickets', 'ticket_id', None, KeysetPager),
+    'users': ('Kravtsov_Users', 'user_id', None, KeysetPager),
+    'staff': ('Kravtsov_Staff', 'staff_id', None, KeysetPager),
+    'facilities': ('Kravtsov_Facilities_Status', 'facility_id', 'Kravtsov_Facilities', StatusPager),
+    'equipment': ('Kravtsov_Equipment_Status', 'item_id', 'Kravtsov_Equipment', StatusPager),
+    'security': ('Kravtsov_Security', 'sec_item_id', None, KeysetPager),
+}
+# Writes go far past the generated period so they never collide with generated bookings.
+FUTURE = datetime(2100, 1, 1)
+DEFAULT_REPEAT = 20
+DEFAULT_THRESHOLD = 1.5
+
+
+def timed(task, repeat):
+    # `task` receives the run number so writes can pick a fresh row each time.
+    timings = []
+    for run in range(repeat):
+        started = time.perf_counter()
+        task(run)
+        timings.append(time.perf_counter() - started)
+    return {'min_ms': round(min(timings) * 1000, 3), 'median_ms': round(statistics.median(timings) * 1000, 3),
+            'max_ms': round(max(timings) * 1000, 3), 'runs': repeat}
+
+
+def _ids(conn, table, key, count, rng):
+    ids = [row[0] for row in conn.execute(f"SELECT {key} FROM {table} ORDER BY {key}")]
+    return rng.sample(ids, min(count, len(ids)))
+
+
+def load_tab(conn, name, order=None, filters=(), after=None):
+    # What load_<name> runs on the executor thread: the row count and the first page.
+    table, key, count_table, pager_class = TABS[name]
+    pager = pager_class(table, key, count_table=count_table)
+    pager.set_query(filters, order)
+    cursor = conn.cursor()
+    rows = pager.first_page(cursor) if after is None else pager.page_after(cursor, after)
+    return pager.count(cursor), rows
+
+
+def run_benchmarks(conn, repeat=DEFAULT_REPEAT, seed=1):
+    rng = random.Random(seed)
+    service = StadiumService(conn)
+    results = {}
+    pick = lambda table, key: _ids(conn, table, key, repeat, rng)
+    event_ids = pick('Kravtsov_Events', 'event_id')
+    user_ids = pick('Kravtsov_Users', 'user_id')
+    staff_ids = pick('Kravtsov_Staff', 'staff_id')
+    facility_ids = pick('Kravtsov_Facilities', 'facility_id')
+    item_ids = pick('Kravtsov_Equipment', 'item_id')
+    at = lambda ids, run: ids[run % len(ids)]
+
+    # Reads: each tab's first page, a page from the middle, and the sorted/filtered views.
+    for name, (table, key, _, _) in TABS.items():
+        results[f'load_{name}'] = timed(lambda run: load_tab(conn, name), repeat)
+        middle = conn.execute(f"SELECT MAX({key}) / 2 FROM {table}").fetchone()[0] or 0
+        results[f'scroll_{name}'] = timed(lambda run: load_tab(conn, name, after=middle), repeat)
+    results['load_events_by_start'] = timed(lambda run: load_tab(conn, 'events', 'event_start'), repeat)
+    results['load_events_by_holder'] = timed(lambda run: load_tab(conn, 'events', 'event_holder'), repeat)
+    results['load_staff_by_salary'] = timed(lambda run: load_tab(conn, 'staff', 'salary'), repeat)
+    results['load_tickets_sold'] = timed(lambda run: load_tab(conn, 'tickets', filters=[("status = ?", ['sold'])]), repeat)
+
+    results['lookup_staff_events'] = timed(lambda run: service.available_staff(at(event_ids, run)), repeat)
+    results['lookup_user_tickets'] = timed(lambda run: service.user_tickets(at(user_ids, run)), repeat)
+    results['lookup_staff_facilities'] = timed(lambda run: service.staff_facilities(at(staff_ids, run)), repeat)
+    results['lookup_facilities_events'] = timed(lambda run: service.facility_events(at(facility_ids, run)), repeat)
+    results['lookup_equipment_events'] = timed(lambda run: service.equipment_events(at(item_ids, run)), repeat)
+
+    # Overlap checks behind RelationshipHandlers: cold rebuilds the resource's interval
+    # index from the table, warm reuses it, conflict is a refused booking end to end.
+    busy = conn.execute("SELECT facility_id, usage_start, usage_end FROM Kravtsov_Facilities_Events "
+                        "GROUP BY facility_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    if busy is not None:
+        facility_id, usage_start, usage_end = busy
+        def cold(run):
+            service.bookings.reload()
+            service.bookings.is_free('facility', facility_id, usage_start, usage_end)
+        results['overlap_check_cold'] = timed(cold, repeat)
+        results['overlap_check_warm'] = timed(
+            lambda run: service.bookings.is_free('facility', facility_id, usage_start, usage_end), repeat)
+        def conflict(run):
+            try:
+                service.assign_facility_to_event(facility_id, event_ids[0], usage_start, usage_end)
+            except ConflictError:
+                return
+            raise AssertionError("Overlapping booking was accepted")
+        results['overlap_conflict'] = timed(conflict, repeat)
+
+    # Writes, each on a fresh slot or row.
+    slot = lambda run: (FUTURE + timedelta(hours=3 * run), FUTURE + timedelta(hours=3 * run + 2))
+    results['assign_facility_to_event'] = timed(
+        lambda run: service.assign_facility_to_event(at(facility_ids, 0), at(event_ids, run), *slot(run)), repeat)
+    results['assign_equipment_to_event'] = timed(
+        lambda run: service.assign_equipment_to_event(at(item_ids, 0), at(event_ids, run), *slot(run)), repeat)
+    assigned = {tuple(row) for row in conn.execute("SELECT facility_id, staff_id FROM Kravtsov_Facilities_Staff")}
+    pairs = [(facility_id, staff_id) for staff_id in staff_ids for facility_id in facility_ids
+             if (facility_id, staff_id) not in assigned][:repeat]
+    if len(pairs) == repeat:
+        results['assign_staff_to_facility'] = timed(lambda run: service.assign_staff_to_facility(*pairs[run]), repeat)
+
+    ticket_ids = pick('Kravtsov_Tickets', 'ticket_id')
+    results['delete_ticket'] = timed(lambda run: service.delete('tickets', ticket_ids[run]), len(ticket_ids))
+    results['delete_user'] = timed(lambda run: service.delete('users', user_ids[run]), len(user_ids))
+    results['delete_staff'] = timed(lambda run: service.delete('staff', staff_ids[run]), len(staff_ids))
+    results['delete_event'] = timed(lambda run: service.delete('events', event_ids[run]), len(event_ids))
+    results['delete_facility'] = timed(lambda run: service.delete('facilities', facility_ids[run]), len(facility_ids))
+    results['delete_equipment'] = timed(lambda run: service.delete('equipment', item_ids[run]), len(item_ids))
+    return results
+
+
+def table_counts(conn):
+    return dict(conn.execute(f"SELECT table_name, row_count FROM Kravtsov_Table_Versions "
+                             f"WHERE table_name IN ({', '.join('?' * len(CHANGE_TRACKED_TABLES))}) ORDER BY table_name",
+                             CHANGE_TRACKED_TABLES))
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # [(name, baseline median, current median, ratio)] for benchmarks in both runs,
+    # with the regressions (ratio above `threshold`) listed first.
+    rows = []
+    for name, result in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before and before['median_ms'] > 0:
+            rows.append((name, before['median_ms'], result['median_ms'], result['median_ms'] / before['median_ms']))
+    return sorted(rows, key=lambda row: (row[3] <= threshold, row[0]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every load, lookup, assign, overlap and delete path headlessly.")
+    parser.add_argument('--db', help="benchmark a copy of this database instead of generating one")
+    parser.add_argument('--tickets', type=int, default=DEFAULT_TICKETS, help="scale of the generated database")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="median slowdown counted as a regression (exit status 1)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        if args.db:
+            # Read-only, so benchmarking never switches the source to WAL or migrates it.
+            source, copy = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True), sqlite3.connect(path)
+            source.backup(copy)
+            source.close()
+            copy.close()
+            setup_database(path)
+            conn = connect(path)
+        else:
+            setup_database(path)
+            conn = connect(path)
+            generate(conn, scale_counts(args.tickets), args.seed)
+        counts = table_counts(conn)
+        started = time.perf_counter()
+        benchmarks = run_benchmarks(conn, args.repeat, args.seed)
+        conn.close()
+
+    results = {
+        'source': args.db or f"generated --tickets {args.tickets} --seed {args.seed}",
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'repeat': args.repeat,
+        'rows': counts,
+        'seconds': round(time.perf_counter() - started, 2),
+        'benchmarks': benchmarks,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        for name, result in benchmarks.items():
+            print(f"{name:>28}: {result['median_ms']:9.3f} ms median  {result['max_ms']:9.3f} ms max")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compared = compare(results, json.load(f), args.threshold)
+        regressions = [row for row in compared if row[3] > args.threshold]
+        for name, before, after, ratio in compared:
+            flag = '  REGRESSION' if ratio > args.threshold else ''
+            print(f"{name:>28}: {before:9.3f} -> {after:9.3f} ms ({ratio:.2f}x){flag}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
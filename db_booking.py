@@ -0,0 +1,132 @@
+import bisect
+from collections import defaultdict
+
+from db_connection import to_epoch
+from db_queries import register, run
+
+
+class IntervalIndex:
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.event_ids = []
+        self.max_length = 0
+        self.disjoint = True
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, end, event_id):
+        i = bisect.bisect_right(self.starts, start)
+        if self.disjoint and (end <= start or (i > 0 and self.ends[i - 1] > start) or (i < len(self.starts) and self.starts[i] < end)):
+            self.disjoint = False
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.event_ids.insert(i, event_id)
+        self.max_length = max(self.max_length, end - start)
+
+    def remove(self, event_id):
+        for i in reversed(range(len(self.event_ids))):
+            if self.event_ids[i] == event_id:
+                del self.starts[i], self.ends[i], self.event_ids[i]
+
+    def conflicts(self, start, end):
+        hi = bisect.bisect_left(self.starts, end)
+        if self.disjoint:
+            lo = bisect.bisect_right(self.ends, start, 0, hi)
+            candidates = range(lo, hi)
+        else:
+            lo = bisect.bisect_right(self.starts, start - self.max_length, 0, hi)
+            candidates = [i for i in range(lo, hi) if self.ends[i] > start]
+        return [(self.starts[i], self.ends[i], self.event_ids[i]) for i in candidates]
+
+    def is_free(self, start, end):
+        hi = bisect.bisect_left(self.starts, end)
+        if self.disjoint:
+            return hi == 0 or self.ends[hi - 1] <= start
+        return not self.conflicts(start, end)
+
+
+class BookingEngine:
+    RESOURCES = {
+        'facility': ('Kravtsov_Facilities_Events', 'facility_id'),
+        'equipment': ('Kravtsov_Equipment_Events', 'item_id'),
+    }
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.indexes = {}
+        self.event_resources = defaultdict(set)
+        self.versions = None
+
+    def index(self, kind, resource_id):
+        key = (kind, int(resource_id))
+        if key not in self.indexes:
+            run(self.cursor, f'{kind}_bookings', (key[1],))
+            self.indexes[key] = IntervalIndex()
+            for usage_start, usage_end, event_id in self.cursor.fetchall():
+                self._add(key, event_id, to_epoch(usage_start), to_epoch(usage_end))
+        return self.indexes[key]
+
+    def load(self, kind):
+        run(self.cursor, f'{kind}_bookings_all')
+        for key in [key for key in self.indexes if key[0] == kind]:
+            self.drop(*key)
+        for resource_id, usage_start, usage_end, event_id in self.cursor.fetchall():
+            key = (kind, resource_id)
+            self.indexes.setdefault(key, IntervalIndex())
+            self._add(key, event_id, to_epoch(usage_start), to_epoch(usage_end))
+
+    def reload(self):
+        self.indexes.clear()
+        self.event_resources.clear()
+
+    def sync(self):
+        # The indexes are dropped only when a booking table's version has moved, so
+        # commits that touch nothing booked (ticket sales, sweep marks) keep them.
+        versions = self.table_versions()
+        if versions != self.versions:
+            self.reload()
+            self.versions = versions
+
+    def table_versions(self):
+        return run(self.cursor, 'booking_versions').fetchall()
+
+    def applied(self, versions):
+        # This connection's own booking write has been applied to the indexes: record
+        # the versions it left (read inside its transaction) so sync keeps them.
+        self.versions = versions
+
+    def is_free(self, kind, resource_id, start, end):
+        return self.index(kind, resource_id).is_free(to_epoch(start), to_epoch(end))
+
+    def conflicts(self, kind, resource_id, start, end):
+        return self.index(kind, resource_id).conflicts(to_epoch(start), to_epoch(end))
+
+    def add(self, kind, resource_id, event_id, start, end):
+        key = (kind, int(resource_id))
+        if key in self.indexes:
+            self._add(key, int(event_id), to_epoch(start), to_epoch(end))
+
+    def remove_event(self, event_id):
+        event_id = int(event_id)
+        for key in self.event_resources.pop(event_id, ()):
+            if key in self.indexes:
+                self.indexes[key].remove(event_id)
+
+    def drop(self, kind, resource_id):
+        self.indexes.pop((kind, int(resource_id)), None)
+
+    def _add(self, key, event_id, start, end):
+        self.indexes[key].add(start, end, event_id)
+        self.event_resources[event_id].add(key)
+
+
+register('booking_versions', f"""
+    SELECT table_name, version FROM Kravtsov_Table_Versions
+    WHERE table_name IN ({', '.join(f"'{table}'" for table, _ in BookingEngine.RESOURCES.values())})
+    ORDER BY table_name
+""")
+for kind, (table, column) in BookingEngine.RESOURCES.items():
+    register(f'{kind}_bookings', f"SELECT usage_start, usage_end, event_id FROM {table} WHERE {column} = ?")
+    register(f'{kind}_bookings_all', f"SELECT {column}, usage_start, usage_end, event_id FROM {table} ORDER BY {column}, usage_start")
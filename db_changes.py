@@ -0,0 +1,50 @@
+from db_queries import run
+
+
+def table_versions(conn):
+    return dict(run(conn, 'table_versions'))
+
+
+class ChangeFeed:
+    def __init__(self, root, executor, interval=1000):
+        self.root = root
+        self.executor = executor
+        self.interval = interval
+        self.subscribers = []
+        self.versions = None
+        self._polling = False
+        self._again = False
+        self.poll()
+        self.root.after(self.interval, self._tick)
+
+    def subscribe(self, tables, callback):
+        self.subscribers.append((set(tables), callback))
+
+    def poll(self):
+        if self._polling:
+            self._again = True
+            return
+        self._polling = True
+        self.executor.submit(table_versions, self._changed, self._failed, background=True)
+
+    def _tick(self):
+        try:
+            self.poll()
+        finally:
+            self.root.after(self.interval, self._tick)
+
+    def _changed(self, versions):
+        self._polling = False
+        if self.versions is not None:
+            changed = {table for table, version in versions.items() if self.versions.get(table) != version}
+            for tables, callback in self.subscribers:
+                if tables & changed:
+                    callback()
+        self.versions = versions
+        if self._again:
+            self._again = False
+            self.poll()
+
+    def _failed(self, error):
+        self._polling = False
+        self._again = False
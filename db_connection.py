@@ -0,0 +1,64 @@
+import calendar
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+DEFAULT_DB_PATH = 'event_management.db'
+DEFAULT_CACHE_SIZE_KB = 65536
+DEFAULT_MMAP_SIZE = 268435456
+DEFAULT_BUSY_TIMEOUT = 5.0
+# Compiled statements kept per connection; Python's default of 128 is smaller than the
+# query registry plus the paging statements a session builds.
+DEFAULT_STATEMENT_CACHE = 512
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+EPOCH = datetime(1970, 1, 1)
+
+
+# TIMESTAMP columns hold integer seconds since the epoch. Datetimes are naive wall-clock
+# values, so they are converted as if they were UTC and come back unchanged.
+def to_epoch(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.strptime(value.strip(), TIMESTAMP_FORMAT)
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(value):
+    return EPOCH + timedelta(seconds=int(value))
+
+
+def convert_timestamp(value):
+    try:
+        return from_epoch(value)
+    except ValueError:
+        return datetime.strptime(value.decode(), TIMESTAMP_FORMAT)
+
+
+sqlite3.register_adapter(datetime, to_epoch)
+sqlite3.register_converter('TIMESTAMP', convert_timestamp)
+
+
+def database_path(path=None):
+    return path or os.environ.get('STADIUM_DB_PATH', DEFAULT_DB_PATH)
+
+
+def connect(path=None, cache_size_kb=None, mmap_size=None, busy_timeout=DEFAULT_BUSY_TIMEOUT, cached_statements=None, **kwargs):
+    if cache_size_kb is None:
+        cache_size_kb = int(os.environ.get('STADIUM_DB_CACHE_KB', DEFAULT_CACHE_SIZE_KB))
+    if mmap_size is None:
+        mmap_size = int(os.environ.get('STADIUM_DB_MMAP_SIZE', DEFAULT_MMAP_SIZE))
+
+    if cached_statements is None:
+        cached_statements = int(os.environ.get('STADIUM_DB_STATEMENT_CACHE', DEFAULT_STATEMENT_CACHE))
+
+    kwargs.setdefault('detect_types', sqlite3.PARSE_DECLTYPES)
+    conn = sqlite3.connect(database_path(path), timeout=busy_timeout, cached_statements=cached_statements, **kwargs)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = {-int(cache_size_kb)}")
+    conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+    return conn
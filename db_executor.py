@@ -0,0 +1,94 @@
+import queue
+import threading
+
+from db_connection import connect
+from db_queries import run
+
+
+class DatabaseExecutor:
+    def __init__(self, root, path=None, service_factory=None, poll_interval=50, tracer=None):
+        self.root = root
+        self.path = path
+        self.service_factory = service_factory
+        self.service = None
+        self.poll_interval = poll_interval
+        self.tracer = tracer
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0
+        self.on_busy = None
+        self.on_error = None
+        self.conn = None
+        self._ready = threading.Event()
+        self.worker = threading.Thread(target=self._run, name='db-executor', daemon=True)
+        self.worker.start()
+        self._ready.wait()
+        self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, task, callback=None, errback=None, background=False):
+        if not background:
+            self.pending += 1
+            self._notify()
+        operation = self.tracer.caller() if self.tracer is not None else None
+        self.tasks.put((task, callback, errback, background, operation))
+
+    def call(self, task, callback=None, errback=None):
+        self.submit(lambda conn: task(self.service), callback, errback)
+
+    def query(self, name, params=(), callback=None, errback=None):
+        self.submit(lambda conn: run(conn, name, params).fetchall(), callback, errback)
+
+    def write(self, name, params=(), callback=None, errback=None):
+        def task(conn):
+            with conn:
+                return run(conn, name, params).rowcount
+        self.submit(task, callback, errback)
+
+    def cancel(self):
+        if self.pending and self.conn is not None:
+            self.conn.interrupt()
+
+    def close(self):
+        self.tasks.put(None)
+
+    def _run(self):
+        self.conn = connect(self.path) if self.tracer is None else self.tracer.connect(self.path)
+        if self.service_factory is not None:
+            self.service = self.service_factory(self.conn)
+        self._ready.set()
+        while True:
+            item = self.tasks.get()
+            if item is None:
+                break
+            task, callback, errback, background, operation = item
+            try:
+                if self.tracer is None:
+                    result = task(self.conn)
+                else:
+                    result = self.tracer.run(self.conn, operation, task)
+            except Exception as e:
+                if self.conn.in_transaction:
+                    self.conn.rollback()
+                self.results.put((errback or self.on_error, e, background))
+            else:
+                self.results.put((callback, result, background))
+        self.conn.close()
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    callback, result, background = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                if not background:
+                    self.pending -= 1
+                    self._notify()
+                if callback is not None:
+                    callback(result)
+        finally:
+            self.root.after(self.poll_interval, self._poll)
+
+    def _notify(self):
+        if self.on_busy is not None:
+            self.on_busy(self.pending)
@@ -0,0 +1,193 @@
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from db_connection import connect, TIMESTAMP_FORMAT
+from db_setup import setup_database, EVENT_TYPES, SEAT_TYPES, SECURITY_STATUSES
+
+DEFAULT_TICKETS = 100000
+DEFAULT_START = datetime(2025, 1, 1)
+SPAN_DAYS = 730
+CHUNK_SIZE = 50000
+
+FIRST_NAMES = ('Alice', 'Bob', 'Carol', 'David', 'Erin', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy',
+               'Mallory', 'Niaj', 'Olivia', 'Peggy', 'Rupert', 'Sybil', 'Trent', 'Victor', 'Walter', 'Yusuf')
+LAST_NAMES = ('Smith', 'Jones', 'Brown', 'Taylor', 'Wilson', 'Davies', 'Evans', 'Thomas', 'Johnson', 'Roberts',
+              'Kravtsov', 'Novak', 'Garcia', 'Martin', 'Moreau', 'Rossi', 'Silva', 'Tanaka', 'Walker', 'Young')
+WORDS = ('Cup', 'Final', 'Derby', 'Concert', 'Tour', 'Gala', 'Open', 'Classic', 'Festival', 'League')
+POSITIONS = ('Usher', 'Security', 'Catering', 'Steward', 'Technician', 'Medic', 'Event Coordinator', 'Manager')
+FACILITY_NAMES = ('Arena', 'Concourse', 'Lounge', 'Press Room', 'Meeting Room', 'Stand', 'Box', 'Hall')
+EQUIPMENT_NAMES = ('Sound System', 'Lighting Rig', 'Big Screen', 'Stage Deck', 'Camera', 'Generator', 'Barrier Set')
+SECURITY_NAMES = ('Camera', 'Gate', 'Turnstile', 'Scanner', 'Alarm')
+SEAT_WEIGHTS = (60, 10, 25, 5)
+SETUP = timedelta(hours=1)
+
+
+def scale_counts(tickets, **overrides):
+    # Every other table is sized from the ticket count so one number sets the scale;
+    # facilities and equipment grow with events to keep room for non-overlapping bookings.
+    events = max(10, tickets // 500)
+    counts = {
+        'tickets': tickets,
+        'events': events,
+        'users': max(10, tickets // 4),
+        'staff': max(20, events // 10),
+        'facilities': max(10, events // 20),
+        'equipment': max(10, events // 10),
+    }
+    counts.update((name, value) for name, value in overrides.items() if value is not None)
+    counts['security'] = counts['facilities'] * 2
+    return counts
+
+
+def _insert(conn, statement, rows, progress=None, table=None):
+    # Chunked so a ten-million-row table never builds one huge transaction.
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return total
+        with conn:
+            conn.executemany(statement, chunk)
+        total += len(chunk)
+        if progress is not None:
+            progress(table, total)
+
+
+def _schedule(rng):
+    start = rng.randrange(96) * 15
+    end = (start + rng.choice((240, 360, 480, 600))) % 1440
+    return f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}"
+
+
+def _events(rng, count, start):
+    # Sorted by start so bookings can be laid out in one pass.
+    events = []
+    for _ in range(count):
+        day = start + timedelta(days=rng.randrange(SPAN_DAYS))
+        event_start = day + timedelta(minutes=480 + rng.randrange(56) * 15)
+        event_end = event_start + timedelta(minutes=rng.choice((90, 120, 180, 240, 360, 480)))
+        events.append((event_start, event_end))
+    events.sort()
+    return events
+
+
+def _bookings(rng, events, resources, per_event):
+    # Bookings cover the event plus setup time on each side. Events arrive in start
+    # order, so a resource is free for the next one exactly when its last booking has
+    # ended; BookingEngine never sees an overlap in generated data.
+    last_end = {}
+    for event_id, (event_start, event_end) in enumerate(events, 1):
+        usage_start, usage_end = event_start - SETUP, event_end + SETUP
+        wanted = rng.randint(*per_event)
+        for resource_id in rng.sample(range(1, resources + 1), min(resources, wanted * 2)):
+            if wanted == 0:
+                break
+            if last_end.get(resource_id, datetime.min) <= usage_start:
+                last_end[resource_id] = usage_end
+                wanted -= 1
+                yield resource_id, event_id, usage_start, usage_end
+
+
+def _tickets(rng, events, tickets, users, as_of):
+    per_event, extra = divmod(tickets, len(events))
+    for event_id, (_, event_end) in enumerate(events, 1):
+        sold_share = rng.random() * 0.9
+        past = event_end <= as_of
+        for _ in range(per_event + (event_id <= extra)):
+            sold = rng.random() < sold_share
+            status = 'expired' if past else 'sold' if sold else 'unsold'
+            yield (event_id, rng.randint(1, users) if sold else None,
+                   'multiple_days' if rng.random() < 0.05 else 'one_day',
+                   rng.choices(SEAT_TYPES, SEAT_WEIGHTS)[0], status)
+
+
+def generate(conn, counts, seed=1, start=DEFAULT_START, as_of=None, progress=None):
+    # Deterministic for a given seed, counts and start. Tickets of events that ended
+    # before `as_of` (default: halfway through the generated period) are expired.
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM Kravtsov_Events)").fetchone()[0]:
+        raise ValueError("Database already has events; generate into an empty database.")
+    rng = random.Random(seed)
+    as_of = as_of or start + timedelta(days=SPAN_DAYS // 2)
+    events = _events(rng, counts['events'], start)
+    created = {}
+
+    created['Kravtsov_Users'] = _insert(conn, "INSERT INTO Kravtsov_Users (user_id, name, email) VALUES (?, ?, ?)", (
+        (i, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"user{i}@generated.test")
+        for i in range(1, counts['users'] + 1)), progress, 'Kravtsov_Users')
+    created['Kravtsov_Events'] = _insert(
+        conn, "INSERT INTO Kravtsov_Events (event_id, event_name, event_type, event_start, event_end, event_holder) "
+              "VALUES (?, ?, ?, ?, ?, ?)", (
+            (event_id, f"{rng.choice(WORDS)} {rng.choice(WORDS)} {event_id}", rng.choice(EVENT_TYPES),
+             event_start, event_end, f"{rng.choice(LAST_NAMES)} Promotions")
+            for event_id, (event_start, event_end) in enumerate(events, 1)), progress, 'Kravtsov_Events')
+    created['Kravtsov_Staff'] = _insert(
+        conn, "INSERT INTO Kravtsov_Staff (staff_id, staff_name, staff_email, phone_number, position, "
+              "schedule_start, schedule_end, salary) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+            (i, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"staff{i}@generated.test",
+             f"555-{rng.randrange(10000):04d}", rng.choice(POSITIONS), *_schedule(rng),
+             float(rng.randrange(25, 90) * 1000)) for i in range(1, counts['staff'] + 1)), progress, 'Kravtsov_Staff')
+    created['Kravtsov_Facilities'] = _insert(
+        conn, "INSERT INTO Kravtsov_Facilities (facility_id, facility_name, facility_status) VALUES (?, ?, ?)", (
+            (i, f"{rng.choice(FACILITY_NAMES)} {i}", 'private' if rng.random() < 0.1 else 'free')
+            for i in range(1, counts['facilities'] + 1)), progress, 'Kravtsov_Facilities')
+    created['Kravtsov_Equipment'] = _insert(
+        conn, "INSERT INTO Kravtsov_Equipment (item_id, item_name, item_status) VALUES (?, ?, 'free')", (
+            (i, f"{rng.choice(EQUIPMENT_NAMES)} {i}") for i in range(1, counts['equipment'] + 1)),
+        progress, 'Kravtsov_Equipment')
+    created['Kravtsov_Security'] = _insert(
+        conn, "INSERT INTO Kravtsov_Security (sec_item_id, sec_item_name, sec_item_status, facility_id) "
+              "VALUES (?, ?, ?, ?)", (
+            (i, f"{rng.choice(SECURITY_NAMES)} {i}", rng.choices(SECURITY_STATUSES, (90, 5, 5))[0],
+             rng.randint(1, counts['facilities'])) for i in range(1, counts['security'] + 1)),
+        progress, 'Kravtsov_Security')
+    created['Kravtsov_Facilities_Staff'] = _insert(
+        conn, "INSERT INTO Kravtsov_Facilities_Staff (facility_id, staff_id) VALUES (?, ?)", (
+            (facility_id, staff_id) for staff_id in range(1, counts['staff'] + 1)
+            for facility_id in rng.sample(range(1, counts['facilities'] + 1), min(counts['facilities'], rng.randint(1, 2)))),
+        progress, 'Kravtsov_Facilities_Staff')
+    created['Kravtsov_Facilities_Events'] = _insert(
+        conn, "INSERT INTO Kravtsov_Facilities_Events (facility_id, event_id, usage_start, usage_end) VALUES (?, ?, ?, ?)",
+        _bookings(rng, events, counts['facilities'], (1, 3)), progress, 'Kravtsov_Facilities_Events')
+    created['Kravtsov_Equipment_Events'] = _insert(
+        conn, "INSERT INTO Kravtsov_Equipment_Events (item_id, event_id, usage_start, usage_end) VALUES (?, ?, ?, ?)",
+        _bookings(rng, events, counts['equipment'], (0, 4)), progress, 'Kravtsov_Equipment_Events')
+    created['Kravtsov_Tickets'] = _insert(
+        conn, "INSERT INTO Kravtsov_Tickets (event_id, user_id, ticket_type, seat, status) VALUES (?, ?, ?, ?, ?)",
+        _tickets(rng, events, counts['tickets'], counts['users'], as_of), progress, 'Kravtsov_Tickets')
+
+    conn.execute("ANALYZE")
+    return created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill an empty database with deterministic synthetic data.")
+    parser.add_argument('--db', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    parser.add_argument('--tickets', type=int, default=DEFAULT_TICKETS, help="scale: every other table is sized from this")
+    for name in ('events', 'users', 'staff', 'facilities', 'equipment'):
+        parser.add_argument(f'--{name}', type=int, help=f"override the number of {name}")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--start', default=DEFAULT_START.strftime('%Y-%m-%d'), help="first day of generated events (YYYY-MM-DD)")
+    parser.add_argument('--as-of', help="tickets of events ended before this are expired (YYYY-MM-DD HH:MM:SS)")
+    args = parser.parse_args()
+
+    counts = scale_counts(args.tickets, events=args.events, users=args.users, staff=args.staff,
+                          facilities=args.facilities, equipment=args.equipment)
+    setup_database(args.db)
+    conn = connect(args.db)
+    started = time.perf_counter()
+    try:
+        created = generate(conn, counts, args.seed, datetime.strptime(args.start, '%Y-%m-%d'),
+                           args.as_of and datetime.strptime(args.as_of, TIMESTAMP_FORMAT),
+                           lambda table, count: print(f"\r{table:>28}: {count}", end='', flush=True))
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    finally:
+        conn.close()
+    print()
+    for table, count in created.items():
+        print(f"{table:>28}: {count}")
+    print(f"{'seconds':>28}: {time.perf_counter() - started:.1f}")
@@ -0,0 +1,204 @@
+import argparse
+import csv
+import json
+import sqlite3
+import time
+from itertools import islice
+
+from db_connection import connect
+from db_queries import register, run, run_many
+from db_services import ENTITIES
+
+IMPORT_ENTITIES = ('events', 'tickets', 'users')
+
+REFERENCES = {
+    'tickets': [(0, 'Kravtsov_Events', 'event_id'), (1, 'Kravtsov_Users', 'user_id')],
+}
+
+# Rows go in through the '<entity>_insert' statement db_services registers; the
+# reference checks get one statement per referenced column.
+for entity, references in REFERENCES.items():
+    for _, table, column in references:
+        register(f'import_{entity}_{column}_found',
+                 f"SELECT {column} FROM {table} WHERE {column} IN (SELECT value FROM json_each(?))")
+
+
+def read_records(path):
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            yield from _json_array(f)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+
+def _json_array(f, size=1 << 16):
+    # Decodes a top-level JSON array one element at a time, so only the read buffer and
+    # the record being decoded are held in memory rather than the whole file. A record
+    # that runs past the end of the buffer is decoded again once more has been read.
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, state = '', 0, False, '['
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        end = pos
+        if pos < len(buffer) and state == 'value':
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = len(buffer)
+        if end == len(buffer) and not eof:
+            more = f.read(size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        char = buffer[pos:pos + 1]
+        if not char and state != '[':
+            raise ValueError("JSON array is not closed")
+        if state == 'value':
+            yield record
+            pos, state = end, 'next'
+        elif state == '[':
+            if char != '[':
+                raise ValueError("A .json file must hold an array of records")
+            pos, state = pos + 1, 'first'
+        elif char == ']':
+            return
+        elif state == 'first':
+            state = 'value'
+        elif char == ',':
+            pos, state = pos + 1, 'value'
+        else:
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+
+
+class RejectWriter:
+    # Writes rejected rows to a CSV file as they occur; the file is only created once
+    # there is something to put in it.
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        self.file = self.writer = None
+
+    def add(self, line, error, record):
+        self.count += 1
+        if self.path is None:
+            return
+        if self.writer is None:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(['line', 'error', 'record'])
+        self.writer.writerow([line, error, json.dumps(record)])
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def _missing_references(cursor, entity, rows):
+    missing = {}
+    for position, _, column in REFERENCES.get(entity, ()):
+        ids = list({row[position] for row in rows if row[position] is not None})
+        found = {row[0] for row in run(cursor, f'import_{entity}_{column}_found', (json.dumps(ids),))}
+        missing[position] = (column, found)
+    return missing
+
+
+def _insert_chunk(conn, entity, valid, rejects):
+    cursor = conn.cursor()
+    missing = _missing_references(cursor, entity, [row for _, row, _ in valid])
+    rows = []
+    for line, row, record in valid:
+        for position, (column, found) in missing.items():
+            if row[position] is not None and row[position] not in found:
+                rejects.add(line, f"{column} {row[position]} does not exist", record)
+                break
+        else:
+            rows.append((line, row, record))
+
+    try:
+        cursor.execute("SAVEPOINT import_chunk")
+        run_many(cursor, f'{entity}_insert', [row for _, row, _ in rows])
+        cursor.execute("RELEASE import_chunk")
+        return len(rows)
+    except sqlite3.IntegrityError:
+        cursor.execute("ROLLBACK TO import_chunk")
+        cursor.execute("RELEASE import_chunk")
+
+    inserted = 0
+    for line, row, record in rows:
+        try:
+            run(cursor, f'{entity}_insert', row)
+            inserted += 1
+        except sqlite3.IntegrityError as e:
+            rejects.add(line, str(e), record)
+    return inserted
+
+
+def import_records(conn, entity, records, batch_size=10000, rejects_path=None):
+    validate = ENTITIES[entity][3]
+    stats = {'read': 0, 'inserted': 0, 'rejected': 0}
+    rejects = RejectWriter(rejects_path)
+    started = time.perf_counter()
+
+    numbered = enumerate(records, start=1)
+    try:
+        conn.execute("BEGIN")
+        while True:
+            chunk = list(islice(numbered, batch_size))
+            if not chunk:
+                break
+            valid = []
+            for line, record in chunk:
+                try:
+                    valid.append((line, validate(record), record))
+                except ValueError as e:
+                    rejects.add(line, str(e), record)
+            stats['read'] += len(chunk)
+            stats['inserted'] += _insert_chunk(conn, entity, valid, rejects)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        rejects.close()
+
+    stats['rejected'] = rejects.count
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['inserted'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def import_file(conn, entity, path, batch_size=10000, rejects_path=None):
+    return import_records(conn, entity, read_records(path), batch_size, rejects_path)
+
+
+def format_stats(entity, stats):
+    return (f"{entity}: {stats['inserted']} of {stats['read']} rows imported, "
+            f"{stats['rejected']} rejected in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_second']:.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import events, tickets or users from CSV/JSON.")
+    parser.add_argument('entity', choices=IMPORT_ENTITIES)
+    parser.add_argument('path', help="a .csv, .json (array) or .jsonl file")
+    parser.add_argument('--db', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--rejects', help="write rejected rows to this CSV file")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    stats = import_file(conn, args.entity, args.path, args.batch_size, args.rejects or f"{args.path}.rejects.csv")
+    conn.close()
+    print(format_stats(args.entity, stats))
@@ -0,0 +1,269 @@
+from db_search import COUNT_LIMIT
+
+
+class KeysetPager:
+    def __init__(self, table, key, page_size=200, count_table=None):
+        self.table = table
+        self.key = key
+        self.page_size = page_size
+        self.count_table = count_table or table
+        self.filters = []
+        self.order = None
+        self.descending = False
+        self.columns = []
+
+    def set_query(self, filters=(), order=None, descending=False):
+        self.filters = list(filters)
+        self.order = order
+        self.descending = descending
+
+    def count(self, cursor):
+        if self.filters:
+            where, params = self._where([])
+            cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {self.table} {where} LIMIT ?)", params + [COUNT_LIMIT + 1])
+            return cursor.fetchone()[0]
+        cursor.execute("SELECT row_count FROM Kravtsov_Table_Versions WHERE table_name = ?", (self.count_table,))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+            row = cursor.fetchone()
+        return row[0]
+
+    def first_page(self, cursor):
+        return self._select(cursor, [], self.page_size)
+
+    def page_after(self, cursor, key_value, sort_value=None):
+        return self._select(cursor, [self._edge('>', key_value, sort_value)], self.page_size)
+
+    def page_before(self, cursor, key_value, sort_value=None):
+        return self._select(cursor, [self._edge('<', key_value, sort_value)], self.page_size, reverse=True)[::-1]
+
+    def window(self, cursor, first, last, limit, first_sort=None, last_sort=None):
+        conditions = []
+        if first is not None:
+            conditions.append(self._edge('>=', first, first_sort))
+        if last is not None:
+            conditions.append(self._edge('<=', last, last_sort))
+        return self._select(cursor, conditions, limit)
+
+    def sort_value(self, row):
+        # The sort column's value in a row this pager returned, or None when unsorted.
+        return row[self.columns.index(self.order)] if self.order is not None else None
+
+    def _edge(self, op, key_value, sort_value=None):
+        # Keyset condition relative to the row with key `key_value`, in display order.
+        # Callers holding that row pass its sort value, so the edge still works once the
+        # row itself is gone; with only the key, the sort value is looked up.
+        if self.descending:
+            op = op.replace('>', '_').replace('<', '>').replace('_', '<')
+        if self.order is None:
+            return f"{self.key} {op} ?", [key_value]
+        if sort_value is not None:
+            return f"({self.order}, {self.key}) {op} (?, ?)", [sort_value, key_value]
+        return (f"({self.order}, {self.key}) {op} (SELECT {self.order}, {self.key} FROM {self.table} WHERE {self.key} = ?)",
+                [key_value])
+
+    def _where(self, conditions):
+        conditions = conditions + self.filters
+        params = [param for _, condition_params in conditions for param in condition_params]
+        where = f"WHERE {' AND '.join(condition for condition, _ in conditions)}" if conditions else ''
+        return where, params
+
+    def _select(self, cursor, conditions, limit, reverse=False):
+        direction = 'DESC' if self.descending != reverse else 'ASC'
+        order = ', '.join(f"{column} {direction}" for column in ([self.order] if self.order else []) + [self.key])
+        where, params = self._where(conditions)
+        cursor.execute(f"SELECT * FROM {self.table} {where} ORDER BY {order} LIMIT ?", params + [limit])
+        self.columns = [column[0] for column in cursor.description]
+        return cursor.fetchall()
+
+
+class TreeviewWindow:
+    def __init__(self, tree, pager, executor, max_pages=5, threshold=0.1):
+        self.tree = tree
+        self.pager = pager
+        self.executor = executor
+        self.max_rows = pager.page_size * max_pages
+        self.threshold = threshold
+        self.active = False
+        self.at_start = True
+        self.at_end = True
+        self._busy = False
+        self._generation = 0
+        self._pending_refresh = None
+        self.rows = {}
+
+    def reset(self, callback=None, locate=None):
+        # With `locate`, open the window on the page holding that key (plus the page
+        # before it) and select the row instead of starting from the top.
+        self.active = True
+        self._busy = True
+        self._generation += 1
+        generation = self._generation
+
+        def fetch(conn):
+            cursor = conn.cursor()
+            before, rows = [], []
+            if locate is not None:
+                before = self.pager.page_before(cursor, locate)
+                rows = self.pager.window(cursor, locate, None, self.pager.page_size)
+            if not rows:
+                before, rows = [], self.pager.first_page(cursor)
+            return before, rows, self.pager.count(cursor)
+
+        def show(result):
+            if generation != self._generation:
+                return
+            before, rows, count = result
+            self.tree.delete(*self.tree.get_children())
+            self.rows = {}
+            self.at_start = len(before) < self.pager.page_size
+            self.at_end = len(rows) < self.pager.page_size
+            for row in before + rows:
+                self._insert('end', row)
+            if str(locate) in self.rows:
+                self.tree.selection_set(str(locate))
+                self.tree.see(str(locate))
+            else:
+                self.tree.yview_moveto(0)
+            self._done()
+            if callback is not None:
+                callback(count)
+
+        self.executor.submit(fetch, show, self._failed)
+
+    def refresh(self, callback=None):
+        # Re-read only the key range the window already shows and patch the tree in
+        # place, so the cost depends on the window size rather than the table size.
+        if not self.active:
+            return
+        if self._busy:
+            self._pending_refresh = callback or (lambda count: None)
+            return
+        children = self.tree.get_children()
+        if not children:
+            self.reset(callback)
+            return
+        first = None if self.at_start else self._edge(children[0])
+        last = None if self.at_end else self._edge(children[-1])
+        generation = self._generation
+        self._busy = True
+
+        def fetch(conn):
+            cursor = conn.cursor()
+            first_key, first_sort = first or (None, None)
+            last_key, last_sort = last or (None, None)
+            rows = self.pager.window(cursor, first_key, last_key, self.max_rows, first_sort, last_sort)
+            return rows, self.pager.count(cursor)
+
+        def show(result):
+            if generation != self._generation:
+                return
+            rows, count = result
+            if last is None:
+                self.at_end = len(rows) < self.max_rows
+            self._apply(rows)
+            self._done()
+            if callback is not None:
+                callback(count)
+
+        self.executor.submit(fetch, show, self._failed)
+
+    def detach(self):
+        self.active = False
+        self._busy = False
+        self._pending_refresh = None
+        self._generation += 1
+
+    def on_scroll(self, first, last):
+        if not self.active or self._busy:
+            return
+        if float(last) > 1 - self.threshold and not self.at_end:
+            self._fetch(self.pager.page_after, -1, self._show_next)
+        elif float(first) < self.threshold and not self.at_start:
+            self._fetch(self.pager.page_before, 0, self._show_previous)
+
+    def _fetch(self, page, edge, show):
+        children = self.tree.get_children()
+        if not children:
+            return
+        key_value, sort_value = self._edge(children[edge])
+        generation = self._generation
+        self._busy = True
+
+        def shown(rows):
+            if generation == self._generation:
+                show(rows)
+                self._done()
+
+        self.executor.submit(lambda conn: page(conn.cursor(), key_value, sort_value), shown, self._failed)
+
+    def _edge(self, iid):
+        # Key and sort value of a shown row, taken from the tree rather than the table
+        # so that paging from it still works after the row has been deleted.
+        return int(iid), self.pager.sort_value(self.rows[iid])
+
+    def _done(self):
+        self._busy = False
+        if self._pending_refresh is not None:
+            callback, self._pending_refresh = self._pending_refresh, None
+            self.refresh(callback)
+
+    def _failed(self, error):
+        self._busy = False
+        self._pending_refresh = None
+        if self.executor.on_error is not None:
+            self.executor.on_error(error)
+
+    def _show_next(self, rows):
+        children = self.tree.get_children()
+        self.at_end = len(rows) < self.pager.page_size
+        for row in rows:
+            self._insert('end', row)
+
+        overflow = len(children) + len(rows) - self.max_rows
+        if overflow > 0:
+            self._delete(children[:overflow])
+            self.tree.yview_scroll(-overflow, 'units')
+            self.at_start = False
+
+    def _show_previous(self, rows):
+        children = self.tree.get_children()
+        self.at_start = len(rows) < self.pager.page_size
+        for index, row in enumerate(rows):
+            self._insert(index, row)
+        if rows:
+            self.tree.yview_scroll(len(rows), 'units')
+
+        overflow = len(children) + len(rows) - self.max_rows
+        if overflow > 0:
+            self._delete(children[-overflow:])
+            self.at_end = False
+
+    def _apply(self, rows):
+        # An edited row may now sort elsewhere in the window (rows that left the key
+        # range are simply missing from `rows`), so the order is checked once patched.
+        order = [str(row[0]) for row in rows]
+        fresh = set(order)
+        self._delete([iid for iid in self.tree.get_children() if iid not in fresh])
+        for index, row in enumerate(rows):
+            iid = str(row[0])
+            if iid not in self.rows:
+                self._insert(index, row)
+            elif self.rows[iid] != row:
+                self.tree.item(iid, values=row)
+                self.rows[iid] = row
+        if list(self.tree.get_children()) != order:
+            for index, iid in enumerate(order):
+                self.tree.move(iid, '', index)
+
+    def _insert(self, index, row):
+        iid = str(row[0])
+        self.tree.insert('', index, iid=iid, values=row)
+        self.rows[iid] = row
+
+    def _delete(self, iids):
+        if iids:
+            self.tree.delete(*iids)
+            for iid in iids:
+                self.rows.pop(iid, None)
@@ -0,0 +1,267 @@
+import threading
+import time
+
+_CLAIM = """
+UPDATE Kravtsov_Tickets SET {assignment}
+WHERE ticket_id IN (
+    SELECT ticket_id FROM Kravtsov_Tickets
+    WHERE event_id = ? AND seat = ? AND status = 'unsold'
+      AND (hold_expires IS NULL OR hold_expires <= ?)
+    ORDER BY ticket_id LIMIT ?
+)
+AND status = 'unsold' AND (hold_expires IS NULL OR hold_expires <= ?)
+RETURNING ticket_id
+"""
+
+_TICKET_COUNTS = """
+SELECT event_id, seat, ticket_type, status, COUNT(*) FROM Kravtsov_Tickets
+GROUP BY event_id, seat, ticket_type, status
+"""
+
+# Every fixed statement, by name. Each name maps to exactly one SQL string, so the
+# connection's statement cache compiles it once and reuses it on every later call;
+# variable-length id lists are passed as one JSON array (json_each) for the same reason.
+# Statements derived from table metadata (one per entity, booking kind, ...) are added
+# with register() by the module that owns that metadata.
+QUERIES = {
+    'table_versions': "SELECT table_name, version FROM Kravtsov_Table_Versions",
+    'table_row_counts': "SELECT table_name, row_count FROM Kravtsov_Table_Versions",
+    'table_rows_added': "UPDATE Kravtsov_Table_Versions SET version = version + 1, row_count = row_count + ? WHERE table_name = ?",
+    'bulk_insert_begin': "INSERT INTO Kravtsov_Bulk_Inserts (table_name) VALUES (?)",
+    'bulk_insert_end': "DELETE FROM Kravtsov_Bulk_Inserts WHERE table_name = ?",
+
+    'event_exists': "SELECT 1 FROM Kravtsov_Events WHERE event_id = ?",
+    'event_windows': """
+        SELECT event_id, event_start, event_end FROM Kravtsov_Events
+        WHERE event_id IN (SELECT value FROM json_each(?))
+    """,
+    'events_on': """
+        SELECT event_id FROM Kravtsov_Events
+        WHERE event_start < ? AND event_end > ?
+        ORDER BY event_start
+    """,
+
+    'generate_tickets': """
+        WITH RECURSIVE seq(n) AS (
+            SELECT 1
+            UNION ALL
+            SELECT n + 1 FROM seq WHERE n < ?
+        )
+        INSERT INTO Kravtsov_Tickets (event_id, user_id, ticket_type, seat, status)
+        SELECT ?, NULL, ?, ?, 'unsold' FROM seq
+    """,
+    'sell_tickets': _CLAIM.format(assignment="status = 'sold', user_id = ?, held_by = NULL, hold_expires = NULL"),
+    'hold_tickets': _CLAIM.format(assignment="held_by = ?, hold_expires = ?"),
+    'confirm_held_tickets': """
+        UPDATE Kravtsov_Tickets SET status = 'sold', user_id = held_by, held_by = NULL, hold_expires = NULL
+        WHERE ticket_id IN (SELECT value FROM json_each(?))
+          AND held_by = ? AND status = 'unsold' AND hold_expires > ?
+        RETURNING ticket_id
+    """,
+    'release_held_tickets': """
+        UPDATE Kravtsov_Tickets SET held_by = NULL, hold_expires = NULL
+        WHERE held_by = ? AND status = 'unsold'
+    """,
+    'release_held_tickets_by_id': """
+        UPDATE Kravtsov_Tickets SET held_by = NULL, hold_expires = NULL
+        WHERE held_by = ? AND status = 'unsold' AND ticket_id IN (SELECT value FROM json_each(?))
+    """,
+    'ticket_counts': """
+        SELECT seat, ticket_type, status, count FROM Kravtsov_Ticket_Counts
+        WHERE event_id = ? AND count > 0
+        ORDER BY seat, ticket_type, status
+    """,
+    'ticket_counts_add': """
+        INSERT INTO Kravtsov_Ticket_Counts (event_id, seat, ticket_type, status, count) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT DO UPDATE SET count = count + excluded.count
+    """,
+    'ticket_counts_expected': _TICKET_COUNTS,
+    'ticket_counts_stored': "SELECT event_id, seat, ticket_type, status, count FROM Kravtsov_Ticket_Counts WHERE count != 0",
+    'ticket_counts_clear': "DELETE FROM Kravtsov_Ticket_Counts",
+    'ticket_counts_rebuild': f"INSERT INTO Kravtsov_Ticket_Counts (event_id, seat, ticket_type, status, count) {_TICKET_COUNTS}",
+    'expire_tickets': """
+        UPDATE Kravtsov_Tickets SET status = 'expired', held_by = NULL, hold_expires = NULL
+        WHERE ticket_id IN (
+            SELECT t.ticket_id FROM Kravtsov_Events e
+            CROSS JOIN Kravtsov_Tickets t ON t.event_id = e.event_id AND t.status IN ('unsold', 'sold')
+            WHERE e.event_end > ? AND e.event_end <= ? LIMIT ?
+        )
+    """,
+
+    'user_tickets': """
+        SELECT t.ticket_id, e.event_name, e.event_start, t.ticket_type, t.seat, t.status
+        FROM Kravtsov_Tickets t
+        JOIN Kravtsov_Events e ON t.event_id = e.event_id
+        WHERE t.user_id = ?
+        ORDER BY e.event_start
+    """,
+
+    'staff_positions': "SELECT DISTINCT position FROM Kravtsov_Staff ORDER BY position",
+    'staff_rows': """
+        SELECT staff_id, staff_name, position, schedule_start, schedule_end FROM Kravtsov_Staff
+        WHERE staff_id IN (SELECT value FROM json_each(?))
+    """,
+    # CROSS JOIN keeps the few windows outer, so each one is a seek on idx_staff_shifts_range.
+    'staff_in_windows': """
+        WITH windows(event_id, start_minute, end_minute) AS (
+            SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]')
+            FROM json_each(?)
+        )
+        SELECT w.event_id, sh.staff_id
+        FROM windows w
+        CROSS JOIN Kravtsov_Staff_Shifts sh ON sh.start_minute < w.end_minute AND sh.end_minute > w.start_minute
+    """,
+    'staff_facilities': """
+        SELECT f.facility_id, f.facility_name, f.facility_status
+        FROM Kravtsov_Facilities f
+        JOIN Kravtsov_Facilities_Staff fs ON f.facility_id = fs.facility_id
+        WHERE fs.staff_id = ?
+    """,
+    'staff_assigned': """
+        SELECT COUNT(*) FROM Kravtsov_Facilities_Staff
+        WHERE facility_id = ? AND staff_id = ?
+    """,
+    'assign_staff': "INSERT INTO Kravtsov_Facilities_Staff (facility_id, staff_id) VALUES (?, ?)",
+
+    'facility_events': """
+        SELECT
+            e.event_id, e.event_name, e.event_type,
+            e.event_start, e.event_end,
+            fe.usage_start, fe.usage_end,
+            e.event_holder
+        FROM Kravtsov_Facilities_Events fe
+        JOIN Kravtsov_Events e ON e.event_id = fe.event_id
+        WHERE fe.facility_id = ?
+        ORDER BY fe.usage_start
+    """,
+    'equipment_events': """
+        SELECT
+            e.event_id, e.event_name, e.event_type,
+            e.event_start, e.event_end,
+            ee.usage_start, ee.usage_end,
+            e.event_holder
+        FROM Kravtsov_Equipment_Events ee
+        JOIN Kravtsov_Events e ON e.event_id = ee.event_id
+        WHERE ee.item_id = ?
+        ORDER BY ee.usage_start
+    """,
+
+    # Facility scheduler: candidate facilities, those with a booking overlapping the
+    # batch's span, and the facility each event of the batch already holds.
+    'schedule_bookable_facilities': "SELECT facility_id FROM Kravtsov_Facilities WHERE facility_status != 'private' ORDER BY facility_id",
+    'schedule_facilities': """
+        SELECT facility_id FROM Kravtsov_Facilities
+        WHERE facility_id IN (SELECT value FROM json_each(?)) ORDER BY facility_id
+    """,
+    'schedule_busy_facilities': """
+        SELECT DISTINCT facility_id FROM Kravtsov_Facilities_Events
+        WHERE usage_end > ? AND usage_start < ?
+    """,
+    'schedule_event_facilities': """
+        SELECT event_id, MIN(facility_id) FROM Kravtsov_Facilities_Events
+        WHERE event_id IN (SELECT value FROM json_each(?)) GROUP BY event_id
+    """,
+
+    # Typeahead pickers: :match is an FTS prefix query, :now the moment 'upcoming' starts.
+    'pick_events': "SELECT event_id, event_name, event_start FROM Kravtsov_Events ORDER BY event_start DESC LIMIT :limit",
+    'pick_events_upcoming': """
+        SELECT event_id, event_name, event_start FROM Kravtsov_Events
+        WHERE event_end > :now ORDER BY event_end LIMIT :limit
+    """,
+    # Matches come newest event first: FTS5 walks its doclists in rowid order and stops at
+    # :limit, where ranking or sorting by date would visit every match of a short prefix.
+    'pick_events_match': """
+        SELECT e.event_id, e.event_name, e.event_start
+        FROM Kravtsov_Events_FTS f JOIN Kravtsov_Events e ON e.event_id = f.rowid
+        WHERE Kravtsov_Events_FTS MATCH :match ORDER BY f.rowid DESC LIMIT :limit
+    """,
+    'pick_events_match_upcoming': """
+        SELECT e.event_id, e.event_name, e.event_start
+        FROM Kravtsov_Events_FTS f JOIN Kravtsov_Events e ON e.event_id = f.rowid
+        WHERE Kravtsov_Events_FTS MATCH :match AND e.event_end > :now ORDER BY f.rowid DESC LIMIT :limit
+    """,
+    'pick_events_id': "SELECT event_id, event_name, event_start FROM Kravtsov_Events WHERE event_id = :id",
+    'pick_staff': "SELECT staff_id, staff_name, position FROM Kravtsov_Staff ORDER BY staff_name LIMIT :limit",
+    # Ranked inside the FTS table so only the :limit best matches are joined to Staff.
+    'pick_staff_match': """
+        SELECT s.staff_id, s.staff_name, s.position
+        FROM (
+            SELECT rowid, rank FROM Kravtsov_Staff_FTS
+            WHERE Kravtsov_Staff_FTS MATCH :match ORDER BY rank LIMIT :limit
+        ) f
+        JOIN Kravtsov_Staff s ON s.staff_id = f.rowid
+        ORDER BY f.rank
+    """,
+    'pick_staff_id': "SELECT staff_id, staff_name, position FROM Kravtsov_Staff WHERE staff_id = :id",
+
+    'delete_keys_create': "CREATE TEMP TABLE IF NOT EXISTS delete_keys (id INTEGER PRIMARY KEY)",
+    'delete_keys_clear': "DELETE FROM temp.delete_keys",
+    'delete_keys_list': "SELECT id FROM temp.delete_keys",
+    'delete_keys_from_ids': "INSERT OR IGNORE INTO temp.delete_keys (id) SELECT value FROM json_each(?)",
+    'delete_keys_ended_events': "INSERT OR IGNORE INTO temp.delete_keys (id) SELECT event_id FROM Kravtsov_Events WHERE event_end < ?",
+
+    'snapshot_state': "SELECT stale, valid_until FROM Kravtsov_Status_Snapshot",
+    'snapshot_mark': """
+        UPDATE Kravtsov_Status_Snapshot SET stale = 0, computed_at = ?,
+            valid_until = (SELECT MIN(until) FROM Kravtsov_Resource_Status WHERE until > ?)
+    """,
+    'sweep_mark': "SELECT swept_until FROM Kravtsov_Sweep_Marks WHERE task = ?",
+    'sweep_mark_set': """
+        INSERT INTO Kravtsov_Sweep_Marks (task, swept_until) VALUES (?, ?)
+        ON CONFLICT (task) DO UPDATE SET swept_until = MAX(swept_until, excluded.swept_until)
+    """,
+}
+
+_counters = {}
+_lock = threading.Lock()
+
+
+def register(name, sql):
+    # Registering the same statement twice is harmless (modules may be reloaded); a
+    # different statement under a taken name is a bug.
+    if QUERIES.setdefault(name, sql) != sql:
+        raise ValueError(f"Query {name} is already registered with different SQL.")
+    return name
+
+
+def run(conn, name, params=()):
+    # Execute query `name` on a connection or cursor and return the cursor. The time
+    # counted is the execute call: the whole statement for writes, the first step for reads.
+    sql = QUERIES[name]
+    started = time.perf_counter()
+    try:
+        return conn.execute(sql, params)
+    finally:
+        _count(name, time.perf_counter() - started)
+
+
+def run_many(conn, name, seq_of_params):
+    sql = QUERIES[name]
+    started = time.perf_counter()
+    try:
+        return conn.executemany(sql, seq_of_params)
+    finally:
+        _count(name, time.perf_counter() - started)
+
+
+def _count(name, seconds):
+    with _lock:
+        counter = _counters.get(name)
+        if counter is None:
+            _counters[name] = [1, seconds]
+        else:
+            counter[0] += 1
+            counter[1] += seconds
+
+
+def counters():
+    # {name: {'calls', 'total_ms', 'mean_ms'}}, most called first.
+    with _lock:
+        items = [(name, calls, seconds) for name, (calls, seconds) in _counters.items()]
+    return {name: {'calls': calls, 'total_ms': round(seconds * 1000, 3), 'mean_ms': round(seconds * 1000 / calls, 3)}
+            for name, calls, seconds in sorted(items, key=lambda item: (-item[1], item[0]))}
+
+
+def reset_counters():
+    with _lock:
+        _counters.clear()
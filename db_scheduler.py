@@ -0,0 +1,99 @@
+import bisect
+import json
+import math
+
+from db_booking import IntervalIndex
+from db_connection import to_epoch
+from db_queries import run
+
+KIND = 'facility'
+
+
+def parse_ids(text):
+    # "1-40, 52 60" -> [1, ..., 40, 52, 60], in the order given and without repeats.
+    ids = []
+    for part in str(text).replace(',', ' ').split():
+        first, _, last = part.partition('-')
+        ids.extend(range(int(first), int(last or first) + 1))
+    return list(dict.fromkeys(ids))
+
+
+def candidate_facilities(conn, facility_ids=None):
+    # The facilities a batch may use, in id order: the given ones that exist, or every
+    # facility that is not private.
+    if facility_ids is None:
+        return [row[0] for row in run(conn, 'schedule_bookable_facilities')]
+    wanted = sorted({int(facility_id) for facility_id in facility_ids})
+    return [row[0] for row in run(conn, 'schedule_facilities', (json.dumps(wanted),))]
+
+
+def _last_end(index, start):
+    # End of the latest booking that starts by `start`; on a free index that one has
+    # ended by then, so `start` minus it is the idle time a booking at `start` leaves.
+    i = bisect.bisect_right(index.starts, start)
+    return index.ends[i - 1] if i else -math.inf
+
+
+def plan_facilities(conn, bookings, event_ids, facility_ids, windows=None, setup=0):
+    # Greedy interval partitioning: requests are swept in start order and each goes to
+    # the free facility that has been idle the shortest time, so a new facility is only
+    # opened when every one in use is busy. Usage windows are the event's own times
+    # widened by `setup` seconds on each side unless `windows` ({event_id: (start, end)})
+    # gives them. Returns ([(event_id, facility_id, start, end)], [(event_id, reason)])
+    # with times in epoch seconds; nothing is written.
+    event_ids = list(dict.fromkeys(int(event_id) for event_id in event_ids))
+    spans = {event_id: (to_epoch(event_start) - setup, to_epoch(event_end) + setup)
+             for event_id, event_start, event_end in run(conn, 'event_windows', (json.dumps(event_ids),))}
+    for event_id, (start, end) in (windows or {}).items():
+        if int(event_id) in spans:
+            spans[int(event_id)] = (to_epoch(start), to_epoch(end))
+    held = dict(run(conn, 'schedule_event_facilities', (json.dumps(event_ids),)).fetchall())
+
+    requests, unplaced = [], []
+    for event_id in event_ids:
+        if event_id not in spans:
+            unplaced.append((event_id, "no such event"))
+        elif event_id in held:
+            unplaced.append((event_id, f"already has facility {held[event_id]}"))
+        else:
+            requests.append((*spans[event_id], event_id))
+    requests.sort()
+    if not requests:
+        return [], unplaced
+
+    # Only facilities with a booking inside the batch's span are checked booking by
+    # booking; the rest behave like empty rooms, tracked by the end of their last
+    # planned booking.
+    busy = {row[0] for row in run(conn, 'schedule_busy_facilities', (requests[0][0], max(r[1] for r in requests)))}
+    indexes = {facility_id: bookings.index(KIND, facility_id) for facility_id in facility_ids if facility_id in busy}
+    planned = {facility_id: IntervalIndex() for facility_id in indexes}
+    unused = [facility_id for facility_id in reversed(facility_ids) if facility_id not in busy]
+    free_at = []
+
+    placed = []
+    for start, end, event_id in requests:
+        options = []
+        i = bisect.bisect_right(free_at, (start, math.inf))
+        if i:
+            options.append((start - free_at[i - 1][0], free_at[i - 1][1]))
+        if unused:
+            options.append((math.inf, unused[-1]))
+        for facility_id, index in indexes.items():
+            if index.is_free(start, end) and planned[facility_id].is_free(start, end):
+                last_end = max(_last_end(index, start), _last_end(planned[facility_id], start))
+                options.append((start - last_end, facility_id))
+        if not options:
+            unplaced.append((event_id, f"all {len(facility_ids)} candidate facilities are in use"))
+            continue
+
+        _, facility_id = min(options)
+        if facility_id in planned:
+            planned[facility_id].add(start, end, event_id)
+        else:
+            if unused and unused[-1] == facility_id:
+                unused.pop()
+            else:
+                del free_at[i - 1]
+            bisect.insort(free_at, (end, facility_id))
+        placed.append((event_id, facility_id, start, end))
+    return placed, sorted(unplaced)
@@ -0,0 +1,181 @@
+import json
+import re
+from datetime import datetime, timedelta
+
+from db_queries import register, run
+
+TOKEN_PATTERN = re.compile(r'\w+')
+DATE_FORMAT = '%Y-%m-%d'
+COUNT_LIMIT = 10000
+
+SEARCH = {
+    'events': ('fts', 'Kravtsov_Events_FTS', 'event_id'),
+    'users': ('fts', 'Kravtsov_Users_FTS', 'user_id'),
+    'staff': ('fts', 'Kravtsov_Staff_FTS', 'staff_id'),
+    'tickets': ('ids', ('ticket_id', 'event_id', 'user_id')),
+    'facilities': ('fts', 'Kravtsov_Facilities_FTS', 'facility_id'),
+    'equipment': ('fts', 'Kravtsov_Equipment_FTS', 'item_id'),
+    'security': ('fts', 'Kravtsov_Security_FTS', 'sec_item_id'),
+}
+PICK_LIMIT = 20
+# The FTS prefix indexes start at two characters; a one-letter word would scan every term.
+MIN_PICK_PREFIX = 2
+
+# Typeahead pickers: how a row of the pick_<entity> queries is labelled.
+PICKERS = {
+    'events': lambda name, start: f"{name} ({start:%Y-%m-%d})",
+    'staff': lambda name, position: f"{name} ({position})",
+}
+
+
+def _day(value):
+    try:
+        return datetime.strptime(str(value).strip(), DATE_FORMAT)
+    except ValueError:
+        raise ValueError("Dates must be YYYY-MM-DD")
+
+def _next_day(value):
+    return _day(value) + timedelta(days=1)
+
+def _id(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("IDs must be integers")
+
+
+FILTERS = {
+    'events': {
+        'event_type': ("event_type = ?", str),
+        'start_from': ("event_start >= ?", _day),
+        'start_to': ("event_start < ?", _next_day),
+    },
+    'tickets': {
+        'status': ("status = ?", str),
+        'seat': ("seat = ?", str),
+        'event_id': ("event_id = ?", _id),
+    },
+    'users': {},
+    'staff': {
+        'position': ("position = ?", str),
+    },
+    'facilities': {
+        'facility_status': ("facility_status = ?", str),
+    },
+    'equipment': {
+        'item_status': ("item_status = ?", str),
+    },
+    'security': {
+        'sec_item_status': ("sec_item_status = ?", str),
+        'facility_id': ("facility_id = ?", _id),
+    },
+}
+
+# Only NOT NULL columns with an index: keyset paging compares (column, key) row values
+# and reads them in index order, which a single-column index gives since it ends in the
+# rowid. Computed columns (sold, unsold, derived status) cannot be indexed.
+SORTABLE = {
+    'events': ('event_name', 'event_start', 'event_end', 'event_holder'),
+    'tickets': ('status',),
+    'users': ('name', 'email'),
+    'staff': ('staff_name', 'staff_email', 'position', 'schedule_start', 'schedule_end', 'salary'),
+    'facilities': ('facility_name',),
+    'equipment': ('item_name',),
+    'security': ('sec_item_name', 'sec_item_status', 'facility_id'),
+}
+
+# Computed columns a tab's view shows after the entity's own columns.
+DERIVED_COLUMNS = {
+    'events': ('sold', 'unsold'),
+    'facilities': ('until',),
+    'equipment': ('until',),
+}
+
+
+def fts_query(text):
+    return ' '.join(f'"{token}"*' for token in TOKEN_PATTERN.findall(text))
+
+
+def search_filter(entity, text):
+    text = str(text or '').strip()
+    if not text:
+        return None
+    kind, *spec = SEARCH[entity]
+    if kind == 'fts':
+        fts_table, key = spec
+        query = fts_query(text)
+        if not query:
+            return None
+        return f"{key} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)", [query]
+    if not text.isdigit():
+        raise ValueError("Ticket search takes a ticket, event or user ID")
+    columns = spec[0]
+    return f"({' OR '.join(f'{column} = ?' for column in columns)})", [int(text)] * len(columns)
+
+
+# Per index: its best `limit` matches by bm25, and the indexed text of given rows.
+for entity, (kind, *spec) in SEARCH.items():
+    if kind == 'fts':
+        register(f'search_{entity}', f"SELECT rank, rowid FROM {spec[0]} WHERE {spec[0]} MATCH ? ORDER BY rank LIMIT ?")
+        register(f'search_{entity}_labels',
+                 f"SELECT rowid, * FROM {spec[0]} WHERE rowid IN (SELECT value FROM json_each(?))")
+
+
+def search_all(conn, text, limit=50):
+    # The overall top `limit` is among each index's own top `limit`, so every index is
+    # ranked in full but hands back no more rows than could make the cut.
+    query = fts_query(str(text or ''))
+    if not query:
+        return []
+    results = []
+    for entity, (kind, *_) in SEARCH.items():
+        if kind == 'fts':
+            results.extend((rank, entity, rowid) for rank, rowid in run(conn, f'search_{entity}', (query, limit)))
+    results = sorted(results)[:limit]
+
+    # Labels are read only for the rows that made the cut.
+    labels = {}
+    for entity in {entity for _, entity, _ in results}:
+        ids = [rowid for _, result_entity, rowid in results if result_entity == entity]
+        for rowid, *values in run(conn, f'search_{entity}_labels', (json.dumps(ids),)):
+            labels[entity, rowid] = ' - '.join(str(value) for value in values if value)
+    return [(entity, rowid, labels.get((entity, rowid), ''), rank) for rank, entity, rowid in results]
+
+
+def suggest(conn, entity, text='', now=None, limit=PICK_LIMIT):
+    # [(id, label)] for a typeahead picker: the row whose ID was typed, then rows matching
+    # every typed word of MIN_PICK_PREFIX or more characters as a prefix. With `now`, events
+    # are limited to those not ended by then; other pickers ignore it.
+    text = str(text or '').strip()
+    match = fts_query(' '.join(token for token in TOKEN_PATTERN.findall(text) if len(token) >= MIN_PICK_PREFIX))
+    name = f"pick_{entity}" + ('_match' if match else '') + ('_upcoming' if now is not None and entity == 'events' else '')
+    rows = run(conn, f"pick_{entity}_id", {'id': int(text)}).fetchall() if text.isdigit() else []
+    seen = {row[0] for row in rows}
+    rows += [row for row in run(conn, name, {'match': match, 'now': now, 'limit': limit}) if row[0] not in seen]
+    label = PICKERS[entity]
+    return [(id_value, label(*values)) for id_value, *values in rows[:limit]]
+
+
+def build_filters(entity, search=None, **criteria):
+    filters = []
+    found = search_filter(entity, search)
+    if found is not None:
+        filters.append(found)
+    for name, value in criteria.items():
+        if name not in FILTERS[entity]:
+            raise ValueError(f"Unknown filter for {entity}: {name}")
+        if value is None or str(value).strip() == '':
+            continue
+        condition, convert = FILTERS[entity][name]
+        filters.append((condition, [convert(value)]))
+    return filters
+
+
+def sort_column(entity, column):
+    if column is not None and column not in SORTABLE[entity]:
+        raise ValueError(f"Cannot sort {entity} by {column}")
+    return column
+
+
+def format_count(count):
+    return f"{COUNT_LIMIT}+ rows" if count > COUNT_LIMIT else f"{count} rows"
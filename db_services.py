@@ -0,0 +1,504 @@
+import json
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+from db_archive import ARCHIVED_TABLES, attach_archive, combined
+from db_booking import BookingEngine
+from db_connection import from_epoch, to_epoch, TIMESTAMP_FORMAT
+from db_paging import KeysetPager
+from db_queries import register, run, run_many
+from db_scheduler import candidate_facilities, plan_facilities
+from db_search import build_filters, sort_column, search_all, suggest, PICKERS, PICK_LIMIT
+from db_staff import available_staff, available_staff_on
+from db_sweeper import sweep
+from db_status import status_source, status_at, timeline, update_snapshot
+from db_setup import (EVENT_TYPES, TICKET_TYPES, SEAT_TYPES, TICKET_STATUSES,
+                      FACILITY_STATUSES, EQUIPMENT_STATUSES, SECURITY_STATUSES)
+from db_tickets import (generate_ticket_inventory, claim_tickets, confirm_held_tickets, release_held_tickets,
+                        ticket_counts, DEFAULT_HOLD_SECONDS)
+
+
+class ServiceError(Exception):
+    pass
+
+class NotFoundError(ServiceError):
+    pass
+
+class ValidationError(ServiceError, ValueError):
+    pass
+
+class ConflictError(ServiceError):
+    pass
+
+
+EMAIL_PATTERN = re.compile(r'@.*\.')
+SCHEDULE_PATTERN = re.compile(r'^([01]\d|2[0-3]):[0-5]\d$')
+
+def _value(record, field):
+    value = record.get(field)
+    return '' if value is None else str(value).strip()
+
+def _text(record, field):
+    value = _value(record, field)
+    if not value:
+        raise ValidationError(f"{field} is required")
+    return value
+
+def _choice(record, field, choices, default=None):
+    value = _value(record, field) or default
+    if value not in choices:
+        raise ValidationError(f"{field} must be one of {', '.join(choices)}")
+    return value
+
+def _timestamp(record, field):
+    if isinstance(record.get(field), datetime):
+        return record[field]
+    try:
+        return datetime.strptime(_text(record, field), TIMESTAMP_FORMAT)
+    except ValueError:
+        raise ValidationError(f"{field} must be YYYY-MM-DD HH:MM:SS")
+
+def _cutoff(value):
+    if isinstance(value, datetime):
+        return value
+    for fmt in (TIMESTAMP_FORMAT, '%Y-%m-%d'):
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            pass
+    raise ValidationError("Cutoff must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS")
+
+def _integer(record, field, required=True):
+    value = _value(record, field)
+    if not value and not required:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError(f"{field} must be an integer")
+
+def _email(record, field):
+    email = _text(record, field)
+    if not EMAIL_PATTERN.search(email):
+        raise ValidationError(f"{field} must look like name@domain.tld")
+    return email
+
+def _schedule(record, field):
+    value = _text(record, field)
+    if not SCHEDULE_PATTERN.match(value):
+        raise ValidationError(f"{field} must be HH:MM")
+    return value
+
+def validate_event(record):
+    event_start = _timestamp(record, 'event_start')
+    event_end = _timestamp(record, 'event_end')
+    if event_end <= event_start:
+        raise ValidationError("event_end must be after event_start")
+    return (
+        _text(record, 'event_name'),
+        _choice(record, 'event_type', EVENT_TYPES),
+        event_start,
+        event_end,
+        _text(record, 'event_holder'),
+    )
+
+def validate_ticket(record):
+    return (
+        _integer(record, 'event_id'),
+        _integer(record, 'user_id', required=False),
+        _choice(record, 'ticket_type', TICKET_TYPES),
+        _choice(record, 'seat', SEAT_TYPES),
+        _choice(record, 'status', TICKET_STATUSES, default='unsold'),
+    )
+
+def validate_user(record):
+    return (_text(record, 'name'), _email(record, 'email'))
+
+def validate_staff(record):
+    try:
+        salary = float(_text(record, 'salary'))
+    except ValueError:
+        raise ValidationError("salary must be a number")
+    return (
+        _text(record, 'staff_name'),
+        _email(record, 'staff_email'),
+        _text(record, 'phone_number'),
+        _text(record, 'position'),
+        _schedule(record, 'schedule_start'),
+        _schedule(record, 'schedule_end'),
+        salary,
+    )
+
+def validate_facility(record):
+    return (_text(record, 'facility_name'), _choice(record, 'facility_status', FACILITY_STATUSES))
+
+def validate_equipment(record):
+    return (_text(record, 'item_name'), _choice(record, 'item_status', EQUIPMENT_STATUSES))
+
+def validate_security(record):
+    return (
+        _text(record, 'sec_item_name'),
+        _choice(record, 'sec_item_status', SECURITY_STATUSES),
+        _integer(record, 'facility_id'),
+    )
+
+def parse_usage_window(usage_start, usage_end):
+    try:
+        start = _timestamp({'usage_start': usage_start}, 'usage_start')
+        end = _timestamp({'usage_end': usage_end}, 'usage_end')
+    except ValidationError:
+        raise ValidationError("Invalid date/time format.")
+    if end <= start:
+        raise ValidationError("Usage end must be after usage start.")
+    return start, end
+
+
+ENTITIES = {
+    'events': ('Kravtsov_Events', 'event_id',
+               ('event_name', 'event_type', 'event_start', 'event_end', 'event_holder'), validate_event),
+    'tickets': ('Kravtsov_Tickets', 'ticket_id',
+                ('event_id', 'user_id', 'ticket_type', 'seat', 'status'), validate_ticket),
+    'users': ('Kravtsov_Users', 'user_id', ('name', 'email'), validate_user),
+    'staff': ('Kravtsov_Staff', 'staff_id',
+              ('staff_name', 'staff_email', 'phone_number', 'position', 'schedule_start', 'schedule_end', 'salary'),
+              validate_staff),
+    'facilities': ('Kravtsov_Facilities', 'facility_id', ('facility_name', 'facility_status'), validate_facility),
+    'equipment': ('Kravtsov_Equipment', 'item_id', ('item_name', 'item_status'), validate_equipment),
+    'security': ('Kravtsov_Security', 'sec_item_id', ('sec_item_name', 'sec_item_status', 'facility_id'),
+                 validate_security),
+}
+
+BOOKING_KINDS = {'facilities': 'facility', 'equipment': 'equipment'}
+
+BOOKED_RESOURCES = {
+    'facility': ('Kravtsov_Facilities', 'facility_id', 'facility_status', 'Facility'),
+    'equipment': ('Kravtsov_Equipment', 'item_id', 'item_status', 'Equipment'),
+}
+
+for entity, (table, key, columns, _) in ENTITIES.items():
+    register(f'{entity}_page', f"SELECT * FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?")
+    register(f'{entity}_get', f"SELECT * FROM {table} WHERE {key} = ?")
+    register(f'{entity}_insert', f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})")
+    register(f'{entity}_update', f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE {key} = ?")
+    register(f'{entity}_delete_keys', f"DELETE FROM {table} WHERE {key} IN (SELECT id FROM temp.delete_keys)")
+    if table in ARCHIVED_TABLES:
+        register(f'{entity}_get_archived', f"SELECT * FROM {combined(table)} WHERE {key} = ?")
+
+for kind, (table, key, status_column, _) in BOOKED_RESOURCES.items():
+    booking_table, column = BookingEngine.RESOURCES[kind]
+    register(f'{kind}_book', f"INSERT INTO {booking_table} ({column}, event_id, usage_start, usage_end) VALUES (?, ?, ?, ?)")
+    register(f'{kind}_exists', f"SELECT 1 FROM {table} WHERE {key} = ?")
+    register(f'{kind}_mark_occupied', f"UPDATE {table} SET {status_column} = 'occupied' "
+                                      f"WHERE {key} = ? AND {status_column} = 'free'")
+
+register('user_tickets_archived', f"""
+    SELECT t.ticket_id, e.event_name, e.event_start, t.ticket_type, t.seat, t.status
+    FROM {combined('Kravtsov_Tickets')} t
+    JOIN {combined('Kravtsov_Events')} e ON t.event_id = e.event_id
+    WHERE t.user_id = ?
+    ORDER BY e.event_start
+""")
+
+
+def format_removed(removed):
+    if not removed:
+        return "Nothing was deleted."
+    return "Deleted " + ", ".join(f"{count} from {table.replace('Kravtsov_', '').replace('_', ' ')}"
+                                  for table, count in sorted(removed.items())) + "."
+
+
+class StadiumService:
+    def __init__(self, conn):
+        self.conn = conn
+        self.bookings = BookingEngine(conn.cursor())
+
+    @contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn.cursor()
+            # Writers keep the resource status snapshot current, so readers never have to.
+            update_snapshot(self.conn)
+        except sqlite3.IntegrityError as e:
+            self.conn.rollback()
+            if 'CHECK' in str(e) or 'NOT NULL' in str(e):
+                raise ValidationError(str(e)) from e
+            raise ConflictError(str(e)) from e
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def _entity(self, entity):
+        if entity not in ENTITIES:
+            raise NotFoundError(f"Unknown entity: {entity}")
+        return ENTITIES[entity]
+
+    def _rows(self, cursor):
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def list(self, entity, after=0, limit=200):
+        self._entity(entity)
+        return self._rows(run(self.conn, f'{entity}_page', (after, limit)))
+
+    def _source(self, entity, include_archive):
+        # With include_archive, read through the temp view over hot plus archived rows.
+        table = self._entity(entity)[0]
+        if not include_archive:
+            return table
+        if table not in ARCHIVED_TABLES:
+            raise ValidationError(f"{entity} are never archived")
+        attach_archive(self.conn)
+        return combined(table)
+
+    def find(self, entity, search=None, order=None, descending=False, after=None, limit=200,
+             include_archive=False, **filters):
+        table, key, _, _ = self._entity(entity)
+        if include_archive:
+            table = self._source(entity, True)
+        elif entity == 'events':
+            table = 'Kravtsov_Events_Inventory'
+        elif entity in BOOKING_KINDS:
+            table = status_source(self.conn, BOOKING_KINDS[entity])
+        try:
+            pager = KeysetPager(table, key, page_size=limit)
+            pager.set_query(build_filters(entity, search, **filters), sort_column(entity, order), descending)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+        cursor = self.conn.cursor()
+        rows = pager.first_page(cursor) if after is None else pager.page_after(cursor, after)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def resource_status(self, entity, at=None):
+        # Status of every facility or equipment item at `at` (default now), derived from
+        # the bookings rather than the stored flag.
+        kind = BOOKING_KINDS[entity]
+        moment = _cutoff(at) if at else None
+        return [{'id': resource_id, 'status': status, 'event_id': event_id, 'until': until}
+                for resource_id, (status, event_id, until) in sorted(status_at(self.conn, kind, moment).items())]
+
+    def resource_timeline(self, entity, resource_id, start, end):
+        kind = BOOKING_KINDS[entity]
+        start, end = parse_usage_window(start, end)
+        self.get(entity, resource_id)
+        return [{'event_id': event_id, 'event_name': name, 'usage_start': usage_start, 'usage_end': usage_end}
+                for event_id, name, usage_start, usage_end in timeline(self.conn, kind, resource_id, start, end)]
+
+    def sweep(self, full=False):
+        return sweep(self.conn, full=full)
+
+    def search(self, text, limit=50):
+        return [{'entity': entity, 'id': id_value, 'label': label, 'score': score}
+                for entity, id_value, label, score in search_all(self.conn, text, limit)]
+
+    def suggest(self, entity, text='', upcoming=False, limit=PICK_LIMIT):
+        if entity not in PICKERS:
+            raise NotFoundError(f"No picker for {entity}")
+        return [{'id': id_value, 'label': label}
+                for id_value, label in suggest(self.conn, entity, text, datetime.now() if upcoming else None, limit)]
+
+    def get(self, entity, id_value, include_archive=False):
+        self._source(entity, include_archive)
+        name = f'{entity}_get_archived' if include_archive else f'{entity}_get'
+        rows = self._rows(run(self.conn, name, (id_value,)))
+        if not rows:
+            raise NotFoundError(f"{entity} {id_value} not found")
+        return rows[0]
+
+    def create(self, entity, values):
+        row = self._entity(entity)[3](values)
+        with self.transaction() as cursor:
+            run(cursor, f'{entity}_insert', row)
+        return cursor.lastrowid
+
+    def update(self, entity, id_value, values):
+        validate = self._entity(entity)[3]
+        with self.transaction() as cursor:
+            row = validate({**self.get(entity, id_value), **values})
+            run(cursor, f'{entity}_update', row + (id_value,))
+        return self.get(entity, id_value)
+
+    def delete(self, entity, id_value):
+        removed = self.delete_many(entity, [id_value])
+        if not removed:
+            raise NotFoundError(f"{entity} {id_value} not found")
+        return removed
+
+    def delete_many(self, entity, ids):
+        self._entity(entity)
+        return self._delete_where(entity, 'delete_keys_from_ids', (json.dumps([int(i) for i in ids]),))
+
+    def purge_events(self, before):
+        cutoff = _cutoff(before)
+        return self._delete_where('events', 'delete_keys_ended_events', (cutoff,))
+
+    def _delete_where(self, entity, select, params):
+        # One set-based DELETE over a temp table of keys; the declared ON DELETE actions
+        # remove dependent rows in the same transaction. The per-table row counts the
+        # version triggers maintain give the number of rows each table lost. `select` names
+        # the registered query that fills temp.delete_keys.
+        self._entity(entity)
+        with self.transaction() as cursor:
+            self.bookings.sync()
+            before = dict(run(cursor, 'table_row_counts'))
+            run(cursor, 'delete_keys_create')
+            run(cursor, 'delete_keys_clear')
+            run(cursor, select, params)
+            ids = [row[0] for row in run(cursor, 'delete_keys_list')]
+            run(cursor, f'{entity}_delete_keys')
+            after = dict(run(cursor, 'table_row_counts'))
+            run(cursor, 'delete_keys_clear')
+            versions = self.bookings.table_versions()
+
+        for id_value in ids:
+            if entity == 'events':
+                self.bookings.remove_event(id_value)
+            elif entity in BOOKING_KINDS:
+                self.bookings.drop(BOOKING_KINDS[entity], id_value)
+        self.bookings.applied(versions)
+        return {name: before[name] - after[name] for name in before if before[name] != after.get(name)}
+
+    def user_tickets(self, user_id, include_archive=False):
+        self._source('tickets', include_archive)
+        name = 'user_tickets_archived' if include_archive else 'user_tickets'
+        return self._rows(run(self.conn, name, (user_id,)))
+
+    def available_staff(self, event_id):
+        self.get('events', event_id)
+        return self._staff_rows(available_staff(self.conn, [event_id])[int(event_id)])
+
+    def available_staff_on(self, day):
+        try:
+            available = available_staff_on(self.conn, day)
+        except ValueError as e:
+            raise ValidationError("day must be YYYY-MM-DD") from e
+        return {event_id: self._staff_rows(rows) for event_id, rows in available.items()}
+
+    def _staff_rows(self, rows):
+        columns = ('staff_id', 'staff_name', 'position', 'schedule_start', 'schedule_end')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def staff_facilities(self, staff_id):
+        return self._rows(run(self.conn, 'staff_facilities', (staff_id,)))
+
+    def facility_events(self, facility_id):
+        return self._rows(run(self.conn, 'facility_events', (facility_id,)))
+
+    def equipment_events(self, item_id):
+        return self._rows(run(self.conn, 'equipment_events', (item_id,)))
+
+    def assign_staff_to_facility(self, facility_id, staff_id):
+        with self.transaction() as cursor:
+            if run(cursor, 'staff_assigned', (facility_id, staff_id)).fetchone()[0] > 0:
+                raise ConflictError("Staff is already assigned to this facility.")
+            run(cursor, 'assign_staff', (facility_id, staff_id))
+
+    def assign_facility_to_event(self, facility_id, event_id, usage_start, usage_end):
+        self._book('facility', facility_id, event_id, usage_start, usage_end)
+
+    def assign_equipment_to_event(self, item_id, event_id, usage_start, usage_end):
+        self._book('equipment', item_id, event_id, usage_start, usage_end)
+
+    def _book(self, kind, resource_id, event_id, usage_start, usage_end):
+        start, end = parse_usage_window(usage_start, usage_end)
+        label = BOOKED_RESOURCES[kind][3]
+
+        with self.transaction() as cursor:
+            if run(cursor, f'{kind}_exists', (resource_id,)).fetchone() is None:
+                raise NotFoundError(f"{label} {resource_id} not found")
+            if run(cursor, 'event_exists', (event_id,)).fetchone() is None:
+                raise NotFoundError(f"Event {event_id} not found")
+            self.bookings.sync()
+            if not self.bookings.is_free(kind, resource_id, start, end):
+                raise ConflictError(f"{label} is already in use during this time period.")
+
+            run(cursor, f'{kind}_book', (resource_id, event_id, start, end))
+            # The stored flag follows the booking only while it is running; future
+            # bookings are picked up by the sweeper when they start.
+            if start <= datetime.now() < end:
+                run(cursor, f'{kind}_mark_occupied', (resource_id,))
+            versions = self.bookings.table_versions()
+
+        self.bookings.add(kind, resource_id, event_id, start, end)
+        self.bookings.applied(versions)
+
+    def schedule_facilities(self, event_ids, facility_ids=None, windows=None, setup_minutes=0, dry_run=False):
+        # Places a batch of events on candidate facilities (see plan_facilities) and books
+        # the plan in one transaction; a dry run only reports it. Events that cannot be
+        # placed are listed with the reason and left unbooked either way.
+        windows = {int(event_id): parse_usage_window(*window) for event_id, window in (windows or {}).items()}
+        setup_minutes = _integer({'setup_minutes': setup_minutes}, 'setup_minutes')
+        if setup_minutes < 0:
+            raise ValidationError("setup_minutes cannot be negative")
+
+        def plan(cursor):
+            self.bookings.sync()
+            candidates = candidate_facilities(cursor, facility_ids)
+            missing = {int(facility_id) for facility_id in facility_ids or ()} - set(candidates)
+            if missing:
+                raise NotFoundError(f"Facility {min(missing)} not found")
+            return plan_facilities(cursor, self.bookings, event_ids, candidates, windows, setup_minutes * 60)
+
+        if dry_run:
+            placed, unplaced = plan(self.conn.cursor())
+        else:
+            with self.transaction() as cursor:
+                placed, unplaced = plan(cursor)
+                run_many(cursor, 'facility_book', [(facility_id, event_id, start, end)
+                                                   for event_id, facility_id, start, end in placed])
+                now = to_epoch(datetime.now())
+                run_many(cursor, 'facility_mark_occupied', [(facility_id,) for _, facility_id, start, end in placed
+                                                            if start <= now < end])
+                versions = self.bookings.table_versions()
+            for event_id, facility_id, start, end in placed:
+                self.bookings.add('facility', facility_id, event_id, start, end)
+            self.bookings.applied(versions)
+
+        return {'applied': not dry_run,
+                'placed': [{'event_id': event_id, 'facility_id': facility_id,
+                            'usage_start': from_epoch(start), 'usage_end': from_epoch(end)}
+                           for event_id, facility_id, start, end in placed],
+                'unplaced': [{'event_id': event_id, 'reason': reason} for event_id, reason in unplaced],
+                'facilities_used': len({facility_id for _, facility_id, _, _ in placed})}
+
+    def generate_tickets(self, event_id, seat_counts, ticket_type='one_day'):
+        try:
+            return generate_ticket_inventory(self.conn, event_id, seat_counts, ticket_type)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+
+    def ticket_counts(self, event_id):
+        return [dict(zip(('seat', 'ticket_type', 'status', 'count'), row)) for row in ticket_counts(self.conn, event_id)]
+
+    def sell_tickets(self, event_id, seat, quantity, user_id):
+        return self._claim(event_id, seat, quantity, user_id)
+
+    def hold_tickets(self, event_id, seat, quantity, user_id, hold_seconds=DEFAULT_HOLD_SECONDS):
+        return self._claim(event_id, seat, quantity, user_id, hold_seconds)
+
+    def _claim(self, event_id, seat, quantity, user_id, hold_seconds=None):
+        try:
+            with self.transaction() as cursor:
+                ticket_ids = claim_tickets(cursor, event_id, seat, quantity, user_id, hold_seconds)
+                if len(ticket_ids) < int(quantity):
+                    raise ConflictError(f"Only {len(ticket_ids)} {seat} tickets are available for event {event_id}.")
+        except ValidationError:
+            raise
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+        return ticket_ids
+
+    def confirm_hold(self, user_id, ticket_ids):
+        with self.transaction() as cursor:
+            confirmed = confirm_held_tickets(cursor, user_id, ticket_ids)
+            if len(confirmed) < len(ticket_ids):
+                raise ConflictError("Some held tickets have expired or belong to another user.")
+        return confirmed
+
+    def release_hold(self, user_id, ticket_ids=None):
+        with self.transaction() as cursor:
+            return release_held_tickets(cursor, user_id, ticket_ids)
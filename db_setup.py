@@ -1,7 +1,466 @@
-import sqlite3
+import re
+import sys
 
-def setup_database():
-    conn = sqlite3.connect('event_management.db')
+from db_connection import connect
+from db_queries import QUERIES
+
+EVENT_TYPES = ('sports', 'music', 'exhibition')
+TICKET_TYPES = ('one_day', 'multiple_days')
+SEAT_TYPES = ('sitting', 'sitting_vip', 'standing', 'standing_vip')
+TICKET_STATUSES = ('unsold', 'sold', 'expired')
+FACILITY_STATUSES = ('free', 'occupied', 'private')
+EQUIPMENT_STATUSES = ('free', 'occupied')
+SECURITY_STATUSES = ('up', 'out_of_service', 'under_maintenance')
+
+def _shift_ranges_insert(condition):
+    # Shifts are stored as half-open [start, end) minute ranges; one that wraps past
+    # midnight (end <= start) becomes [start, 1440) plus [0, end).
+    return f'''
+            INSERT INTO Kravtsov_Staff_Shifts (staff_id, start_minute, end_minute)
+                SELECT staff_id, start_minute, CASE WHEN end_minute > start_minute THEN end_minute ELSE 1440 END
+                FROM Kravtsov_Staff_Minutes WHERE {condition}
+                UNION ALL
+                SELECT staff_id, 0, end_minute
+                FROM Kravtsov_Staff_Minutes WHERE {condition} AND end_minute <= start_minute AND end_minute > 0;'''
+
+CHANGE_TRACKED_TABLES = (
+    'Kravtsov_Events', 'Kravtsov_Tickets', 'Kravtsov_Users', 'Kravtsov_Staff', 'Kravtsov_Facilities',
+    'Kravtsov_Equipment', 'Kravtsov_Security', 'Kravtsov_Facilities_Staff', 'Kravtsov_Facilities_Events',
+    'Kravtsov_Equipment_Events',
+)
+
+def _version_triggers(table):
+    # Every write bumps the table's version; inserts and deletes also keep its row count.
+    name = table.lower().replace('kravtsov_', '')
+    bump = f"UPDATE Kravtsov_Table_Versions SET version = version + 1{{}} WHERE table_name = '{table}';"
+    return f'''
+        INSERT INTO Kravtsov_Table_Versions (table_name, version, row_count) SELECT '{table}', 0, COUNT(*) FROM {table};
+        CREATE TRIGGER trg_versions_{name}_insert AFTER INSERT ON {table}
+        BEGIN {bump.format(', row_count = row_count + 1')} END;
+        CREATE TRIGGER trg_versions_{name}_update AFTER UPDATE ON {table}
+        BEGIN {bump.format('')} END;
+        CREATE TRIGGER trg_versions_{name}_delete AFTER DELETE ON {table}
+        BEGIN {bump.format(', row_count = row_count - 1')} END;
+    '''
+
+STATUS_SOURCES = (
+    'Kravtsov_Facilities', 'Kravtsov_Equipment', 'Kravtsov_Facilities_Events', 'Kravtsov_Equipment_Events',
+)
+
+def _stale_triggers(table):
+    # Any change to a booking or resource invalidates the resource status snapshot.
+    name = table.lower().replace('kravtsov_', '')
+    stale = "UPDATE Kravtsov_Status_Snapshot SET stale = 1 WHERE stale = 0;"
+    return ''.join(f'''
+        CREATE TRIGGER trg_status_{name}_{event.lower()} AFTER {event} ON {table}
+        BEGIN {stale} END;''' for event in ('INSERT', 'UPDATE', 'DELETE'))
+
+def _bulk_guard(table):
+    # Per-row insert triggers skip rows while a bulk insert into `table` is running. The
+    # bulk writer adds the marker row and removes it again inside its own write
+    # transaction, so no other connection ever sees it, and applies the totals itself.
+    return f"WHEN NOT EXISTS (SELECT 1 FROM Kravtsov_Bulk_Inserts WHERE table_name = '{table}')"
+
+FTS_TABLES = (
+    ('Kravtsov_Events', 'event_id', ('event_name', 'event_holder')),
+    ('Kravtsov_Users', 'user_id', ('name', 'email')),
+    ('Kravtsov_Staff', 'staff_id', ('staff_name',)),
+    ('Kravtsov_Facilities', 'facility_id', ('facility_name',)),
+    ('Kravtsov_Equipment', 'item_id', ('item_name',)),
+    ('Kravtsov_Security', 'sec_item_id', ('sec_item_name',)),
+)
+
+def _fts_table(table, key, columns):
+    # External-content FTS5 index kept in step with its table by triggers.
+    fts = f"{table}_FTS"
+    name = table.lower().replace('kravtsov_', '')
+    names = ', '.join(columns)
+    new = ', '.join(f"NEW.{column}" for column in columns)
+    old = ', '.join(f"OLD.{column}" for column in columns)
+    return f'''
+        CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='{key}', prefix='2 3');
+        INSERT INTO {fts} ({fts}) VALUES ('rebuild');
+        CREATE TRIGGER trg_fts_{name}_insert AFTER INSERT ON {table}
+        BEGIN INSERT INTO {fts} (rowid, {names}) VALUES (NEW.{key}, {new}); END;
+        CREATE TRIGGER trg_fts_{name}_delete AFTER DELETE ON {table}
+        BEGIN INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.{key}, {old}); END;
+        CREATE TRIGGER trg_fts_{name}_update AFTER UPDATE OF {names} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.{key}, {old});
+            INSERT INTO {fts} (rowid, {names}) VALUES (NEW.{key}, {new});
+        END;
+    '''
+
+def _epoch_update(table, *columns):
+    # Text that does not parse is left alone; the TIMESTAMP converter still reads it.
+    assignments = ', '.join(f"{column} = CASE WHEN typeof({column}) = 'text' "
+                            f"THEN COALESCE(CAST(strftime('%s', {column}) AS INTEGER), {column}) ELSE {column} END"
+                            for column in columns)
+    condition = ' OR '.join(f"typeof({column}) = 'text'" for column in columns)
+    return f"UPDATE {table} SET {assignments} WHERE {condition};"
+
+ON_DELETE = {
+    'Kravtsov_Tickets': {'Kravtsov_Events': 'CASCADE', 'Kravtsov_Users': 'SET NULL'},
+    'Kravtsov_Security': {'Kravtsov_Facilities': 'CASCADE'},
+    'Kravtsov_Facilities_Staff': {'Kravtsov_Facilities': 'CASCADE', 'Kravtsov_Staff': 'CASCADE'},
+    'Kravtsov_Facilities_Events': {'Kravtsov_Facilities': 'CASCADE', 'Kravtsov_Events': 'CASCADE'},
+    'Kravtsov_Equipment_Events': {'Kravtsov_Equipment': 'CASCADE', 'Kravtsov_Events': 'CASCADE'},
+}
+REFERENCE_PATTERN = re.compile(r'REFERENCES\s+(\w+)\s*\(\w+\)(?!\s*ON\s+DELETE)', re.IGNORECASE)
+
+def _on_delete_rebuild(conn):
+    # Foreign key actions can only change by rebuilding the table: copy the rows into a
+    # table declared with the new actions, swap it in, then replay the old table's own
+    # indexes and triggers (which DROP TABLE removes) and its AUTOINCREMENT counter.
+    script = ["CREATE TEMP TABLE rebuild_sequence (name TEXT PRIMARY KEY, seq INTEGER);"]
+    for table, actions in ON_DELETE.items():
+        create, = conn.execute("SELECT sql FROM sqlite_schema WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        create = REFERENCE_PATTERN.sub(
+            lambda match: f"{match.group(0)} ON DELETE {actions[match.group(1)]}" if match.group(1) in actions else match.group(0),
+            create)
+        create = re.sub(rf'^CREATE TABLE\s+(IF NOT EXISTS\s+)?"?{table}"?', f'CREATE TABLE {table}_rebuild', create)
+        columns = ', '.join(row[1] for row in conn.execute(f"PRAGMA table_info({table})"))
+        dependents = [row[0] for row in conn.execute(
+            "SELECT sql FROM sqlite_schema WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL "
+            "ORDER BY type, name", (table,))]
+        script += [
+            f"{create};",
+            f"INSERT INTO {table}_rebuild ({columns}) SELECT {columns} FROM {table};",
+            f"INSERT INTO temp.rebuild_sequence SELECT name, seq FROM sqlite_sequence WHERE name = '{table}';",
+            f"DROP TABLE {table};",
+            f"ALTER TABLE {table}_rebuild RENAME TO {table};",
+            f"INSERT INTO temp.rebuild_sequence SELECT name, seq FROM sqlite_sequence WHERE name = '{table}' "
+            f"ON CONFLICT (name) DO UPDATE SET seq = MAX(seq, excluded.seq);",
+            f"DELETE FROM sqlite_sequence WHERE name = '{table}';",
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT name, seq FROM temp.rebuild_sequence WHERE name = '{table}';",
+        ] + [f"{sql};" for sql in dependents]
+    return '\n'.join(script + ["DROP TABLE temp.rebuild_sequence;"])
+
+MIGRATIONS = [
+    '''
+        CREATE INDEX IF NOT EXISTS idx_tickets_user ON Kravtsov_Tickets (user_id);
+        CREATE INDEX IF NOT EXISTS idx_tickets_event_status ON Kravtsov_Tickets (event_id, status);
+        CREATE INDEX IF NOT EXISTS idx_facilities_events_usage ON Kravtsov_Facilities_Events (facility_id, usage_start, usage_end);
+        CREATE INDEX IF NOT EXISTS idx_facilities_events_event ON Kravtsov_Facilities_Events (event_id);
+        CREATE INDEX IF NOT EXISTS idx_equipment_events_usage ON Kravtsov_Equipment_Events (item_id, usage_start, usage_end);
+        CREATE INDEX IF NOT EXISTS idx_equipment_events_event ON Kravtsov_Equipment_Events (event_id);
+        CREATE INDEX IF NOT EXISTS idx_facilities_staff_facility ON Kravtsov_Facilities_Staff (facility_id, staff_id);
+        CREATE INDEX IF NOT EXISTS idx_facilities_staff_staff ON Kravtsov_Facilities_Staff (staff_id, facility_id);
+        CREATE INDEX IF NOT EXISTS idx_security_facility ON Kravtsov_Security (facility_id);
+    ''',
+    '''
+        CREATE TABLE Kravtsov_Facilities_Events_rebuild (
+            facility_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            usage_start TIMESTAMP NOT NULL,
+            usage_end TIMESTAMP NOT NULL,
+            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id),
+            FOREIGN KEY (event_id) REFERENCES Kravtsov_Events(event_id)
+        );
+        INSERT INTO Kravtsov_Facilities_Events_rebuild (facility_id, event_id, usage_start, usage_end)
+            SELECT facility_id, event_id, usage_start, usage_end FROM Kravtsov_Facilities_Events;
+        DROP TABLE Kravtsov_Facilities_Events;
+        ALTER TABLE Kravtsov_Facilities_Events_rebuild RENAME TO Kravtsov_Facilities_Events;
+        CREATE INDEX idx_facilities_events_usage ON Kravtsov_Facilities_Events (facility_id, usage_start, usage_end);
+        CREATE INDEX idx_facilities_events_event ON Kravtsov_Facilities_Events (event_id);
+    ''',
+    '''
+        ALTER TABLE Kravtsov_Tickets ADD COLUMN held_by INTEGER REFERENCES Kravtsov_Users(user_id);
+        ALTER TABLE Kravtsov_Tickets ADD COLUMN hold_expires TIMESTAMP;
+        CREATE INDEX idx_tickets_event_seat_status ON Kravtsov_Tickets (event_id, seat, status);
+        CREATE INDEX idx_tickets_held_by ON Kravtsov_Tickets (held_by) WHERE held_by IS NOT NULL;
+    ''',
+    '''
+        CREATE TABLE Kravtsov_Ticket_Counts (
+            event_id INTEGER NOT NULL,
+            seat TEXT NOT NULL,
+            ticket_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (event_id, seat, ticket_type, status)
+        ) WITHOUT ROWID;
+        INSERT INTO Kravtsov_Ticket_Counts (event_id, seat, ticket_type, status, count)
+            SELECT event_id, seat, ticket_type, status, COUNT(*) FROM Kravtsov_Tickets
+            GROUP BY event_id, seat, ticket_type, status;
+
+        CREATE TRIGGER trg_ticket_counts_insert AFTER INSERT ON Kravtsov_Tickets
+        BEGIN
+            INSERT INTO Kravtsov_Ticket_Counts (event_id, seat, ticket_type, status, count)
+                VALUES (NEW.event_id, NEW.seat, NEW.ticket_type, NEW.status, 1)
+                ON CONFLICT DO UPDATE SET count = count + 1;
+        END;
+        CREATE TRIGGER trg_ticket_counts_delete AFTER DELETE ON Kravtsov_Tickets
+        BEGIN
+            UPDATE Kravtsov_Ticket_Counts SET count = count - 1
+            WHERE event_id = OLD.event_id AND seat = OLD.seat AND ticket_type = OLD.ticket_type AND status = OLD.status;
+        END;
+        CREATE TRIGGER trg_ticket_counts_update AFTER UPDATE OF event_id, seat, ticket_type, status ON Kravtsov_Tickets
+        WHEN OLD.event_id IS NOT NEW.event_id OR OLD.seat IS NOT NEW.seat
+          OR OLD.ticket_type IS NOT NEW.ticket_type OR OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE Kravtsov_Ticket_Counts SET count = count - 1
+            WHERE event_id = OLD.event_id AND seat = OLD.seat AND ticket_type = OLD.ticket_type AND status = OLD.status;
+            INSERT INTO Kravtsov_Ticket_Counts (event_id, seat, ticket_type, status, count)
+                VALUES (NEW.event_id, NEW.seat, NEW.ticket_type, NEW.status, 1)
+                ON CONFLICT DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE VIEW Kravtsov_Events_Inventory AS
+            SELECT e.event_id, e.event_name, e.event_type, e.event_start, e.event_end, e.event_holder,
+                COALESCE((SELECT SUM(c.count) FROM Kravtsov_Ticket_Counts c
+                          WHERE c.event_id = e.event_id AND c.status = 'sold'), 0) AS sold,
+                COALESCE((SELECT SUM(c.count) FROM Kravtsov_Ticket_Counts c
+                          WHERE c.event_id = e.event_id AND c.status = 'unsold'), 0) AS unsold
+            FROM Kravtsov_Events e;
+    ''',
+    f'''
+        CREATE TABLE Kravtsov_Staff_Shifts (
+            staff_id INTEGER NOT NULL REFERENCES Kravtsov_Staff(staff_id),
+            start_minute INTEGER NOT NULL CHECK (start_minute BETWEEN 0 AND 1439),
+            end_minute INTEGER NOT NULL CHECK (end_minute BETWEEN 1 AND 1440),
+            CHECK (end_minute > start_minute)
+        );
+        CREATE INDEX idx_staff_shifts_range ON Kravtsov_Staff_Shifts (start_minute, end_minute, staff_id);
+        CREATE INDEX idx_staff_shifts_staff ON Kravtsov_Staff_Shifts (staff_id);
+        CREATE VIEW Kravtsov_Staff_Minutes AS
+            SELECT staff_id,
+                CAST(substr(schedule_start, 1, 2) AS INTEGER) * 60 + CAST(substr(schedule_start, 4, 2) AS INTEGER) AS start_minute,
+                CAST(substr(schedule_end, 1, 2) AS INTEGER) * 60 + CAST(substr(schedule_end, 4, 2) AS INTEGER) AS end_minute
+            FROM Kravtsov_Staff;
+        {_shift_ranges_insert('1')}
+
+        CREATE TRIGGER trg_staff_shifts_insert AFTER INSERT ON Kravtsov_Staff
+        BEGIN
+            {_shift_ranges_insert('staff_id = NEW.staff_id')}
+        END;
+        CREATE TRIGGER trg_staff_shifts_update AFTER UPDATE OF staff_id, schedule_start, schedule_end ON Kravtsov_Staff
+        BEGIN
+            DELETE FROM Kravtsov_Staff_Shifts WHERE staff_id = OLD.staff_id;
+            {_shift_ranges_insert('staff_id = NEW.staff_id')}
+        END;
+        CREATE TRIGGER trg_staff_shifts_delete AFTER DELETE ON Kravtsov_Staff
+        BEGIN
+            DELETE FROM Kravtsov_Staff_Shifts WHERE staff_id = OLD.staff_id;
+        END;
+    ''',
+    f'''
+        {_epoch_update('Kravtsov_Events', 'event_start', 'event_end')}
+        {_epoch_update('Kravtsov_Facilities_Events', 'usage_start', 'usage_end')}
+        {_epoch_update('Kravtsov_Equipment_Events', 'usage_start', 'usage_end')}
+        {_epoch_update('Kravtsov_Tickets', 'hold_expires')}
+    ''',
+    '''
+        CREATE TABLE Kravtsov_Table_Versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            row_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+    ''' + ''.join(_version_triggers(table) for table in CHANGE_TRACKED_TABLES),
+    '''
+        CREATE INDEX idx_events_start ON Kravtsov_Events (event_start);
+        CREATE INDEX idx_events_name ON Kravtsov_Events (event_name);
+        CREATE INDEX idx_events_type_start ON Kravtsov_Events (event_type, event_start);
+        CREATE INDEX idx_tickets_status ON Kravtsov_Tickets (status);
+        CREATE INDEX idx_users_name ON Kravtsov_Users (name);
+        CREATE INDEX idx_staff_name ON Kravtsov_Staff (staff_name);
+        CREATE INDEX idx_staff_position ON Kravtsov_Staff (position);
+    ''' + ''.join(_fts_table(table, key, columns) for table, key, columns in FTS_TABLES[:3]),
+    ''.join(_fts_table(table, key, columns) for table, key, columns in FTS_TABLES[3:]),
+    _on_delete_rebuild,
+    '''
+        CREATE INDEX idx_events_end ON Kravtsov_Events (event_end);
+        CREATE INDEX idx_facilities_events_end ON Kravtsov_Facilities_Events (usage_end, facility_id);
+        CREATE INDEX idx_equipment_events_end ON Kravtsov_Equipment_Events (usage_end, item_id);
+        CREATE TABLE Kravtsov_Sweep_Marks (
+            task TEXT PRIMARY KEY,
+            swept_until TIMESTAMP NOT NULL
+        ) WITHOUT ROWID;
+    ''',
+    '''
+        CREATE INDEX idx_facilities_events_start ON Kravtsov_Facilities_Events (usage_start, facility_id);
+        CREATE INDEX idx_equipment_events_start ON Kravtsov_Equipment_Events (usage_start, item_id);
+        CREATE TABLE Kravtsov_Resource_Status (
+            kind TEXT NOT NULL,
+            resource_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            event_id INTEGER,
+            until TIMESTAMP,
+            PRIMARY KEY (kind, resource_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE Kravtsov_Status_Snapshot (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            stale INTEGER NOT NULL DEFAULT 1,
+            computed_at TIMESTAMP,
+            valid_until TIMESTAMP
+        );
+        INSERT INTO Kravtsov_Status_Snapshot (id) VALUES (1);
+        CREATE VIEW Kravtsov_Facilities_Status AS
+            SELECT f.facility_id, f.facility_name, COALESCE(s.status, f.facility_status) AS facility_status, s.until
+            FROM Kravtsov_Facilities f
+            LEFT JOIN Kravtsov_Resource_Status s ON s.kind = 'facility' AND s.resource_id = f.facility_id;
+        CREATE VIEW Kravtsov_Equipment_Status AS
+            SELECT q.item_id, q.item_name, COALESCE(s.status, q.item_status) AS item_status, s.until
+            FROM Kravtsov_Equipment q
+            LEFT JOIN Kravtsov_Resource_Status s ON s.kind = 'equipment' AND s.resource_id = q.item_id;
+    ''' + ''.join(_stale_triggers(table) for table in STATUS_SOURCES) + _version_triggers('Kravtsov_Resource_Status'),
+    '''
+        CREATE INDEX idx_events_holder ON Kravtsov_Events (event_holder);
+        CREATE INDEX idx_staff_schedule_start ON Kravtsov_Staff (schedule_start);
+        CREATE INDEX idx_staff_schedule_end ON Kravtsov_Staff (schedule_end);
+        CREATE INDEX idx_staff_salary ON Kravtsov_Staff (salary);
+        CREATE INDEX idx_facilities_name ON Kravtsov_Facilities (facility_name);
+        CREATE INDEX idx_equipment_name ON Kravtsov_Equipment (item_name);
+        CREATE INDEX idx_security_name ON Kravtsov_Security (sec_item_name);
+        CREATE INDEX idx_security_status ON Kravtsov_Security (sec_item_status);
+    ''',
+    f'''
+        CREATE TABLE Kravtsov_Bulk_Inserts (
+            table_name TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+        DROP TRIGGER trg_ticket_counts_insert;
+        CREATE TRIGGER trg_ticket_counts_insert AFTER INSERT ON Kravtsov_Tickets
+        {_bulk_guard('Kravtsov_Tickets')}
+        BEGIN
+            INSERT INTO Kravtsov_Ticket_Counts (event_id, seat, ticket_type, status, count)
+                VALUES (NEW.event_id, NEW.seat, NEW.ticket_type, NEW.status, 1)
+                ON CONFLICT DO UPDATE SET count = count + 1;
+        END;
+        DROP TRIGGER trg_versions_tickets_insert;
+        CREATE TRIGGER trg_versions_tickets_insert AFTER INSERT ON Kravtsov_Tickets
+        {_bulk_guard('Kravtsov_Tickets')}
+        BEGIN
+            UPDATE Kravtsov_Table_Versions SET version = version + 1, row_count = row_count + 1
+            WHERE table_name = 'Kravtsov_Tickets';
+        END;
+    ''',
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+INDEXED_QUERIES = {
+    'lookup_user_tickets': ('idx_tickets_user', QUERIES['user_tickets']),
+    'lookup_facilities_events': ('idx_facilities_events_usage', QUERIES['facility_events']),
+    'lookup_equipment_events': ('idx_equipment_events_usage', QUERIES['equipment_events']),
+    'lookup_staff_facilities': ('idx_facilities_staff_staff', QUERIES['staff_facilities']),
+    'facility_overlap': ('idx_facilities_events_usage', '''
+        SELECT COUNT(*) FROM Kravtsov_Facilities_Events
+        WHERE facility_id = ? AND usage_start < ? AND usage_end > ?
+    '''),
+    'equipment_overlap': ('idx_equipment_events_usage', '''
+        SELECT COUNT(*) FROM Kravtsov_Equipment_Events
+        WHERE item_id = ? AND usage_start < ? AND usage_end > ?
+    '''),
+    'event_tickets_by_status': ('idx_tickets_event_status', '''
+        SELECT COUNT(*) FROM Kravtsov_Tickets
+        WHERE event_id = ? AND status = ?
+    '''),
+    'available_staff_window': ('idx_staff_shifts_range', QUERIES['staff_in_windows']),
+    'claim_unsold_tickets': ('idx_tickets_event_seat_status', '''
+        SELECT ticket_id FROM Kravtsov_Tickets
+        WHERE event_id = ? AND seat = ? AND status = 'unsold'
+          AND (hold_expires IS NULL OR hold_expires <= ?)
+        ORDER BY ticket_id LIMIT ?
+    '''),
+    'events_page_by_start': ('idx_events_start', '''
+        SELECT event_id FROM Kravtsov_Events
+        WHERE (event_start, event_id) > (?, ?)
+        ORDER BY event_start, event_id LIMIT ?
+    '''),
+    'events_page_by_type': ('idx_events_type_start', '''
+        SELECT event_id FROM Kravtsov_Events
+        WHERE event_type = ? ORDER BY event_start, event_id LIMIT ?
+    '''),
+    'search_events': ('Kravtsov_Events_FTS', '''
+        SELECT rank, rowid FROM Kravtsov_Events_FTS
+        WHERE Kravtsov_Events_FTS MATCH ? LIMIT ?
+    '''),
+    'expire_past_tickets': ('idx_events_end', '''
+        SELECT t.ticket_id FROM Kravtsov_Events e
+        CROSS JOIN Kravtsov_Tickets t ON t.event_id = e.event_id AND t.status IN ('unsold', 'sold')
+        WHERE e.event_end > ? AND e.event_end <= ? LIMIT ?
+    '''),
+    'ended_facility_bookings': ('idx_facilities_events_end', '''
+        SELECT DISTINCT facility_id FROM Kravtsov_Facilities_Events
+        WHERE usage_end > ? AND usage_end <= ?
+    '''),
+    'ended_equipment_bookings': ('idx_equipment_events_end', '''
+        SELECT DISTINCT item_id FROM Kravtsov_Equipment_Events
+        WHERE usage_end > ? AND usage_end <= ?
+    '''),
+    'facility_status_at': ('idx_facilities_events_usage', '''
+        SELECT usage_end FROM Kravtsov_Facilities_Events
+        WHERE facility_id = ? AND usage_start <= ?
+        ORDER BY usage_start DESC LIMIT 1
+    '''),
+    'started_facility_bookings': ('idx_facilities_events_start', '''
+        SELECT DISTINCT facility_id FROM Kravtsov_Facilities_Events
+        WHERE usage_start > ? AND usage_start <= ? AND usage_end > ?
+    '''),
+    'staff_page_by_position': ('idx_staff_position', '''
+        SELECT staff_id FROM Kravtsov_Staff
+        WHERE position = ? ORDER BY staff_id LIMIT ?
+    '''),
+}
+
+# Every sortable tab column pages in index order; see SORTABLE in db_search.
+SORT_INDEXES = {
+    ('Kravtsov_Events', 'event_id'): {'event_name': 'idx_events_name', 'event_start': 'idx_events_start',
+                                      'event_end': 'idx_events_end', 'event_holder': 'idx_events_holder'},
+    ('Kravtsov_Tickets', 'ticket_id'): {'status': 'idx_tickets_status'},
+    ('Kravtsov_Users', 'user_id'): {'name': 'idx_users_name', 'email': 'sqlite_autoindex_Kravtsov_Users_1'},
+    ('Kravtsov_Staff', 'staff_id'): {'staff_name': 'idx_staff_name', 'staff_email': 'sqlite_autoindex_Kravtsov_Staff_1',
+                                     'position': 'idx_staff_position', 'schedule_start': 'idx_staff_schedule_start',
+                                     'schedule_end': 'idx_staff_schedule_end', 'salary': 'idx_staff_salary'},
+    ('Kravtsov_Facilities', 'facility_id'): {'facility_name': 'idx_facilities_name'},
+    ('Kravtsov_Equipment', 'item_id'): {'item_name': 'idx_equipment_name'},
+    ('Kravtsov_Security', 'sec_item_id'): {'sec_item_name': 'idx_security_name', 'sec_item_status': 'idx_security_status',
+                                           'facility_id': 'idx_security_facility'},
+}
+for (table, key), indexes in SORT_INDEXES.items():
+    for column, index in indexes.items():
+        INDEXED_QUERIES[f'{table[9:].lower()}_page_by_{column}'] = (index, f'''
+        SELECT * FROM {table}
+        WHERE ({column}, {key}) > (?, ?) ORDER BY {column}, {key} LIMIT ?
+    ''')
+
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version, SCHEMA_VERSION
+
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            script = MIGRATIONS[target - 1]
+            if callable(script):
+                script = script(conn)
+            conn.executescript(f"BEGIN; {script} PRAGMA user_version = {target}; COMMIT;")
+        violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            print(f"Warning: {len(violations)} rows violate foreign keys after migration.", file=sys.stderr)
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+    return version, SCHEMA_VERSION
+
+def check_query_plans(conn):
+    results = []
+    for name, (index, query) in INDEXED_QUERIES.items():
+        params = (None,) * query.count('?')
+        plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        # The named index must appear as a whole word; paged queries (LIMIT) must also read
+        # in its order rather than sort.
+        uses_index = any(re.search(rf'\b{index}\b', step) for step in plan)
+        if 'LIMIT' in query:
+            uses_index = uses_index and not any('TEMP B-TREE FOR' in step for step in plan)
+        results.append((name, index, uses_index, plan))
+    return results
+
+def setup_database(path=None):
+    conn = connect(path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        conn.close()
+        return
     cursor = conn.cursor()
     
     cursor.executescript('''
@@ -28,8 +487,8 @@ def setup_database():
             ticket_type TEXT NOT NULL CHECK (ticket_type IN ('one_day', 'multiple_days')),
             seat TEXT NOT NULL CHECK (seat IN ('sitting', 'sitting_vip', 'standing', 'standing_vip')),
             status TEXT NOT NULL DEFAULT 'unsold' CHECK (status IN ('unsold', 'sold', 'expired')),
-            FOREIGN KEY (event_id) REFERENCES Kravtsov_Events(event_id),
-            FOREIGN KEY (user_id) REFERENCES Kravtsov_Users(user_id)
+            FOREIGN KEY (event_id) REFERENCES Kravtsov_Events(event_id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES Kravtsov_Users(user_id) ON DELETE SET NULL
         );
 
         CREATE TABLE IF NOT EXISTS Kravtsov_Staff (
@@ -48,8 +507,8 @@ def setup_database():
         CREATE TABLE IF NOT EXISTS Kravtsov_Facilities_Staff (
             facility_id INTEGER NOT NULL,
             staff_id INTEGER NOT NULL,
-            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id),
-            FOREIGN KEY (staff_id) REFERENCES Kravtsov_Staff(staff_id)
+            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id) ON DELETE CASCADE,
+            FOREIGN KEY (staff_id) REFERENCES Kravtsov_Staff(staff_id) ON DELETE CASCADE
         );
                          
         CREATE TABLE IF NOT EXISTS Kravtsov_Facilities (
@@ -63,8 +522,8 @@ def setup_database():
             event_id INTEGER NOT NULL,
             usage_start TIMESTAMP NOT NULL,
             usage_end TIMESTAMP NOT NULL,
-            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id),
-            FOREIGN KEY (event_id) REFERENCES Kravtsov_Staff(event_id)
+            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id) ON DELETE CASCADE,
+            FOREIGN KEY (event_id) REFERENCES Kravtsov_Events(event_id) ON DELETE CASCADE
         );
 
         CREATE TABLE IF NOT EXISTS Kravtsov_Equipment (
@@ -78,8 +537,8 @@ def setup_database():
             event_id INTEGER NOT NULL,
             usage_start TIMESTAMP NOT NULL,
             usage_end TIMESTAMP NOT NULL,
-            FOREIGN KEY (item_id) REFERENCES Kravtsov_Equipment(item_id),
-            FOREIGN KEY (event_id) REFERENCES Kravtsov_Events(event_id)
+            FOREIGN KEY (item_id) REFERENCES Kravtsov_Equipment(item_id) ON DELETE CASCADE,
+            FOREIGN KEY (event_id) REFERENCES Kravtsov_Events(event_id) ON DELETE CASCADE
         );
 
         CREATE TABLE IF NOT EXISTS Kravtsov_Security (
@@ -87,12 +546,25 @@ def setup_database():
             sec_item_name TEXT NOT NULL,
             sec_item_status TEXT NOT NULL CHECK (sec_item_status IN ('up', 'out_of_service', 'under_maintenance')),
             facility_id INTEGER NOT NULL,
-            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id)
+            FOREIGN KEY (facility_id) REFERENCES Kravtsov_Facilities(facility_id) ON DELETE CASCADE
         );
     ''')
     
     conn.commit()
+    migrate(conn)
     conn.close()
 
 if __name__ == "__main__":
-    setup_database()
\ No newline at end of file
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    path = paths[0] if paths else None
+    setup_database(path)
+    if '--explain' in sys.argv:
+        conn = connect(path)
+        failed = False
+        for name, index, uses_index, plan in check_query_plans(conn):
+            print(f"{'OK  ' if uses_index else 'FAIL'} {name} ({index})")
+            for step in plan:
+                print(f"       {step}")
+            failed = failed or not uses_index
+        conn.close()
+        sys.exit(1 if failed else 0)
@@ -0,0 +1,73 @@
+import json
+import math
+from datetime import datetime, timedelta
+
+from db_connection import TIMESTAMP_FORMAT, from_epoch
+from db_queries import run
+
+MINUTES_PER_DAY = 1440
+BATCH_SIZE = 500
+
+
+def minutes_of_day(value):
+    hours, minutes = str(value).split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def shift_ranges(schedule_start, schedule_end):
+    start, end = minutes_of_day(schedule_start), minutes_of_day(schedule_end)
+    if end > start:
+        return [(start, end)]
+    return [(start, MINUTES_PER_DAY)] + ([(0, end)] if end > 0 else [])
+
+
+def _datetime(value):
+    if isinstance(value, int):
+        return from_epoch(value)
+    if isinstance(value, str):
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+    return value
+
+
+def event_ranges(event_start, event_end):
+    event_start, event_end = _datetime(event_start), _datetime(event_end)
+    duration = math.ceil((event_end - event_start).total_seconds() / 60)
+    if duration >= MINUTES_PER_DAY:
+        return [(0, MINUTES_PER_DAY)]
+    start = event_start.hour * 60 + event_start.minute
+    end = start + max(duration, 1)
+    if end <= MINUTES_PER_DAY:
+        return [(start, end)]
+    return [(start, MINUTES_PER_DAY), (0, end - MINUTES_PER_DAY)]
+
+
+def available_staff(conn, event_ids):
+    # One covering-index range join per batch of events (each event contributes one or
+    # two minute windows), then a single lookup of the staff rows all events share.
+    event_ids = list(dict.fromkeys(int(event_id) for event_id in event_ids))
+    available = {event_id: set() for event_id in event_ids}
+    for offset in range(0, len(event_ids), BATCH_SIZE):
+        batch = event_ids[offset:offset + BATCH_SIZE]
+        windows = []
+        for event_id, event_start, event_end in run(conn, 'event_windows', (json.dumps(batch),)):
+            windows.extend([event_id, start, end] for start, end in event_ranges(event_start, event_end))
+        if not windows:
+            continue
+        for event_id, staff_id in run(conn, 'staff_in_windows', (json.dumps(windows),)):
+            available[event_id].add(staff_id)
+
+    staff_ids = set().union(*available.values())
+    staff = {row[0]: row for row in run(conn, 'staff_rows', (json.dumps(sorted(staff_ids)),))} if staff_ids else {}
+    return {event_id: [staff[staff_id] for staff_id in sorted(ids) if staff_id in staff]
+            for event_id, ids in available.items()}
+
+
+def events_on(conn, day):
+    if isinstance(day, str):
+        day = datetime.strptime(day, '%Y-%m-%d')
+    start = datetime(day.year, day.month, day.day)
+    return [row[0] for row in run(conn, 'events_on', (start + timedelta(days=1), start))]
+
+
+def available_staff_on(conn, day):
+    return available_staff(conn, events_on(conn, day))
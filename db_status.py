@@ -0,0 +1,193 @@
+from datetime import datetime
+
+from db_booking import BookingEngine
+from db_connection import from_epoch
+from db_paging import KeysetPager
+from db_queries import register, run
+
+# Resource table, key and stored status column for each kind of booking in BookingEngine.RESOURCES.
+RESOURCE_STATUS = {
+    'facility': ('Kravtsov_Facilities', 'facility_id', 'facility_status'),
+    'equipment': ('Kravtsov_Equipment', 'item_id', 'item_status'),
+}
+STATUS_VIEWS = {
+    'facility': 'Kravtsov_Facilities_Status',
+    'equipment': 'Kravtsov_Equipment_Status',
+}
+RESOURCE_NAMES = {
+    'facility': 'facility_name',
+    'equipment': 'item_name',
+}
+# Connection-local stand-ins for STATUS_VIEWS over statuses computed on the spot, used
+# while the shared snapshot is out of date.
+LIVE_VIEWS = {
+    'facility': 'Kravtsov_Facilities_Live_Status',
+    'equipment': 'Kravtsov_Equipment_Live_Status',
+}
+
+
+def current_booking(kind, resource, column='usage_end'):
+    # Bookings of one resource never overlap (BookingEngine refuses them), so the only
+    # booking that can contain :at is the latest one starting at or before it: a single
+    # descending seek on the (resource, usage_start, usage_end) index.
+    booking_table, resource_column = BookingEngine.RESOURCES[kind]
+    return (f"(SELECT b.{column} FROM {booking_table} b WHERE b.{resource_column} = {resource} AND b.usage_start <= :at "
+            f"ORDER BY b.usage_start DESC LIMIT 1)")
+
+
+def _status_query(kind, condition='1'):
+    booking_table, resource_column = BookingEngine.RESOURCES[kind]
+    table, key, status_column = RESOURCE_STATUS[kind]
+    return f"""
+    SELECT resource_id,
+        CASE WHEN last_end > :at THEN 'occupied' WHEN stored = 'private' THEN 'private' ELSE 'free' END AS status,
+        CASE WHEN last_end > :at THEN last_event END AS event_id,
+        CASE WHEN last_end > :at THEN last_end ELSE next_start END AS until
+    FROM (
+        SELECT r.{key} AS resource_id, r.{status_column} AS stored,
+            {current_booking(kind, f'r.{key}')} AS last_end,
+            {current_booking(kind, f'r.{key}', 'event_id')} AS last_event,
+            (SELECT MIN(b.usage_start) FROM {booking_table} b
+             WHERE b.{resource_column} = r.{key} AND b.usage_start > :at) AS next_start
+        FROM {table} r WHERE {condition}
+    )
+    """
+
+
+def status_at(conn, kind, at=None, resource_ids=None):
+    # {resource_id: (status, event_id, until)} at time `at`; `until` is when that status
+    # next changes (None when no later booking exists).
+    params = {'at': at or datetime.now()}
+    name = f'{kind}_status'
+    if resource_ids is not None:
+        name = f'{kind}_status_of'
+        params['ids'] = '[' + ', '.join(str(int(resource_id)) for resource_id in resource_ids) + ']'
+    # The CASE columns carry no declared type, so `until` comes back as raw epoch seconds.
+    return {resource_id: (status, event_id, None if until is None else from_epoch(until))
+            for resource_id, status, event_id, until in run(conn, name, params)}
+
+
+def timeline(conn, kind, resource_id, start, end):
+    return run(conn, f'{kind}_timeline', (resource_id, end, start)).fetchall()
+
+
+def refresh_snapshot(conn, now=None):
+    now = (now or datetime.now()).replace(microsecond=0)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _refresh(conn, now)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return now
+
+
+def _refresh(conn, now):
+    # Rewrite only the snapshot rows whose status changed, so the table version (and
+    # with it the tabs watching it) moves only when something visible did.
+    now = now.replace(microsecond=0)
+    for kind in RESOURCE_STATUS:
+        run(conn, f'{kind}_snapshot_refresh', {'kind': kind, 'at': now})
+        run(conn, f'{kind}_snapshot_prune', (kind,))
+    run(conn, 'snapshot_mark', (now, now))
+
+
+def snapshot_fresh(conn, now=None):
+    # The snapshot is out of date once a booking or resource changed (triggers set
+    # `stale`) or the clock passed the earliest moment any status was due to change.
+    stale, valid_until = run(conn, 'snapshot_state').fetchone()
+    return not stale and (valid_until is None or valid_until > (now or datetime.now()))
+
+
+def ensure_snapshot(conn, now=None):
+    # For the sweeper: rebuild the snapshot in a transaction of its own if out of date.
+    if snapshot_fresh(conn, now):
+        return False
+    refresh_snapshot(conn, now)
+    return True
+
+
+def update_snapshot(conn, now=None):
+    # For writers: rebuild the snapshot inside the caller's open write transaction, so
+    # the bookings it just changed are reflected when it commits.
+    if snapshot_fresh(conn, now):
+        return False
+    _refresh(conn, now or datetime.now())
+    return True
+
+
+def status_source(conn, kind, now=None):
+    # The view a reader should page for `kind`. Readers never take the write lock: while
+    # the snapshot is out of date they compute the statuses into a temp table instead,
+    # which only touches this connection's temp database.
+    if snapshot_fresh(conn, now):
+        return STATUS_VIEWS[kind]
+    run(conn, 'live_status_table')
+    run(conn, f'{kind}_live_view')
+    started = not conn.in_transaction
+    run(conn, 'live_status_clear', (kind,))
+    run(conn, f'{kind}_live_fill', {'kind': kind, 'at': (now or datetime.now()).replace(microsecond=0)})
+    if started:
+        conn.commit()
+    return LIVE_VIEWS[kind]
+
+
+for kind, (table, key, status_column) in RESOURCE_STATUS.items():
+    booking_table, resource_column = BookingEngine.RESOURCES[kind]
+    register(f'{kind}_status', _status_query(kind))
+    register(f'{kind}_status_of', _status_query(kind, f"r.{key} IN (SELECT value FROM json_each(:ids))"))
+    register(f'{kind}_timeline', f"""
+        SELECT b.event_id, e.event_name, b.usage_start, b.usage_end
+        FROM {booking_table} b
+        LEFT JOIN Kravtsov_Events e ON e.event_id = b.event_id
+        WHERE b.{resource_column} = ? AND b.usage_start < ? AND b.usage_end > ?
+        ORDER BY b.usage_start
+    """)
+    register(f'{kind}_snapshot_refresh', f"""
+        INSERT INTO Kravtsov_Resource_Status (kind, resource_id, status, event_id, until)
+        SELECT :kind, resource_id, status, event_id, until FROM ({_status_query(kind)}) WHERE 1
+        ON CONFLICT (kind, resource_id) DO UPDATE SET
+            status = excluded.status, event_id = excluded.event_id, until = excluded.until
+        WHERE status IS NOT excluded.status OR event_id IS NOT excluded.event_id OR until IS NOT excluded.until
+    """)
+    register(f'{kind}_snapshot_prune', f"DELETE FROM Kravtsov_Resource_Status WHERE kind = ? "
+                                       f"AND resource_id NOT IN (SELECT {key} FROM {table})")
+    register(f'{kind}_live_fill', f"""
+        INSERT INTO temp.Kravtsov_Live_Status (kind, resource_id, status, event_id, until)
+        SELECT :kind, resource_id, status, event_id, until FROM ({_status_query(kind)})
+    """)
+    register(f'{kind}_live_view', f"""
+        CREATE TEMP VIEW IF NOT EXISTS {LIVE_VIEWS[kind]} AS
+            SELECT r.{key}, r.{RESOURCE_NAMES[kind]}, COALESCE(s.status, r.{status_column}) AS {status_column}, s.until
+            FROM {table} r
+            LEFT JOIN temp.Kravtsov_Live_Status s ON s.kind = '{kind}' AND s.resource_id = r.{key}
+    """)
+register('live_status_table', """
+    CREATE TEMP TABLE IF NOT EXISTS Kravtsov_Live_Status (
+        kind TEXT NOT NULL,
+        resource_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        event_id INTEGER,
+        until TIMESTAMP,
+        PRIMARY KEY (kind, resource_id)
+    ) WITHOUT ROWID
+""")
+register('live_status_clear', "DELETE FROM temp.Kravtsov_Live_Status WHERE kind = ?")
+
+
+class StatusPager(KeysetPager):
+    # Pages a Kravtsov_*_Status view, or its live stand-in while the snapshot is out of
+    # date (see status_source).
+    def __init__(self, table, key, page_size=200, count_table=None):
+        super().__init__(table, key, page_size, count_table)
+        self.kind = next(kind for kind, view in STATUS_VIEWS.items() if view == table)
+
+    def count(self, cursor):
+        if self.filters:
+            self.table = status_source(cursor.connection, self.kind)
+        return super().count(cursor)
+
+    def _select(self, cursor, conditions, limit, reverse=False):
+        self.table = status_source(cursor.connection, self.kind)
+        return super()._select(cursor, conditions, limit, reverse)
@@ -0,0 +1,199 @@
+import argparse
+import threading
+import time
+from datetime import datetime
+
+from db_booking import BookingEngine
+from db_connection import connect
+from db_queries import register, run
+from db_status import RESOURCE_STATUS, current_booking, ensure_snapshot
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_INTERVAL = 60.0
+SWEEP_TASK = 'sweep'
+
+
+def _batched(conn, name, params, batch_size):
+    # Run a self-limiting UPDATE in short write transactions until it touches nothing.
+    rows = batches = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if isinstance(params, dict):
+                count = run(conn, name, dict(params, limit=batch_size)).rowcount
+            else:
+                count = run(conn, name, params + (batch_size,)).rowcount
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if count <= 0:
+            return rows, batches
+        rows += count
+        batches += 1
+
+
+def _register(kind):
+    # The batched status updates for one kind of resource, limited by :limit.
+    booking_table, column = BookingEngine.RESOURCES[kind]
+    table, key, status_column = RESOURCE_STATUS[kind]
+    register(f'{kind}_sweep_free', f"""
+    UPDATE {table} SET {status_column} = 'free'
+    WHERE {key} IN (
+        SELECT r.{key} FROM (
+            SELECT DISTINCT {column} FROM {booking_table} WHERE usage_end > :since AND usage_end <= :at
+        ) ended
+        JOIN {table} r ON r.{key} = ended.{column} AND r.{status_column} = 'occupied'
+        WHERE COALESCE({current_booking(kind, f'r.{key}')} > :at, 0) = 0
+        LIMIT :limit
+    )
+    """)
+    # Full sweeps also free resources left 'occupied' with no booking that has ended
+    # since, e.g. by the old assign path when all their bookings lie in the future.
+    register(f'{kind}_sweep_free_all', f"""
+    UPDATE {table} SET {status_column} = 'free'
+    WHERE {key} IN (
+        SELECT r.{key} FROM {table} r
+        WHERE r.{status_column} = 'occupied' AND COALESCE({current_booking(kind, f'r.{key}')} > :at, 0) = 0
+        LIMIT :limit
+    )
+    """)
+    register(f'{kind}_sweep_occupy', f"""
+    UPDATE {table} SET {status_column} = 'occupied'
+    WHERE {key} IN (
+        SELECT r.{key} FROM (
+            SELECT DISTINCT {column} FROM {booking_table}
+            WHERE usage_start > :since AND usage_start <= :at AND usage_end > :at
+        ) started
+        JOIN {table} r ON r.{key} = started.{column} AND r.{status_column} = 'free'
+        LIMIT :limit
+    )
+    """)
+
+
+for kind in RESOURCE_STATUS:
+    _register(kind)
+
+
+def expire_tickets(conn, now, since=None, batch_size=DEFAULT_BATCH_SIZE):
+    # Walk idx_events_end over the events that ended in (since, now] and expire their
+    # unsold and sold tickets; any hold on them goes too. CROSS JOIN keeps events as the
+    # outer loop so the planner cannot start from the much larger status index.
+    return _batched(conn, 'expire_tickets', (since or 0, now), batch_size)
+
+
+def release_resources(conn, kind, now, since=None, batch_size=DEFAULT_BATCH_SIZE):
+    # Keep the stored status flag equal to the status at `now`: a resource is occupied
+    # while one of its bookings contains `now`. Only resources with a booking that ended
+    # or started in (since, now] can have changed; 'private' facilities are left alone.
+    # Without `since` every occupied resource is checked.
+    params = {'since': since or 0, 'at': now}
+    free = f'{kind}_sweep_free' if since is not None else f'{kind}_sweep_free_all'
+    freed, free_batches = _batched(conn, free, params, batch_size)
+    occupied, occupy_batches = _batched(conn, f'{kind}_sweep_occupy', params, batch_size)
+    return freed, occupied, free_batches + occupy_batches
+
+
+def sweep(conn, now=None, full=False, batch_size=DEFAULT_BATCH_SIZE):
+    # Incremental by default: only what ended since the previous sweep is looked at.
+    # `full` rescans from the beginning, e.g. after importing tickets for past events.
+    started = time.perf_counter()
+    now = (now or datetime.now()).replace(microsecond=0)
+    since = None
+    if not full:
+        row = run(conn, 'sweep_mark', (SWEEP_TASK,)).fetchone()
+        since = row[0] if row else None
+
+    metrics = {'now': now, 'since': since}
+    metrics['tickets_expired'], batches = expire_tickets(conn, now, since, batch_size)
+    for kind in RESOURCE_STATUS:
+        freed, occupied, resource_batches = release_resources(conn, kind, now, since, batch_size)
+        metrics[f'{kind}_freed'], metrics[f'{kind}_occupied'] = freed, occupied
+        batches += resource_batches
+
+    metrics['status_snapshot_refreshed'] = int(ensure_snapshot(conn, now))
+    with conn:
+        run(conn, 'sweep_mark_set', (SWEEP_TASK, now))
+    metrics['batches'] = batches
+    metrics['seconds'] = round(time.perf_counter() - started, 4)
+    return metrics
+
+
+def format_metrics(metrics):
+    touched = ', '.join(f"{name.replace('_', ' ')} {metrics[name]}" for name in metrics
+                        if name not in ('now', 'since', 'batches', 'seconds'))
+    return f"{touched} ({metrics['batches']} batches, {metrics['seconds'] * 1000:.1f} ms)"
+
+
+class Sweeper:
+    # Runs sweep() every `interval` seconds on its own thread and connection, so the
+    # batched writes never queue behind (or in front of) interactive work.
+    def __init__(self, path=None, interval=DEFAULT_INTERVAL, batch_size=DEFAULT_BATCH_SIZE, on_sweep=None, on_error=None):
+        self.path = path
+        self.interval = interval
+        self.batch_size = batch_size
+        self.on_sweep = on_sweep
+        self.on_error = on_error
+        self.last = None
+        self.runs = 0
+        self.totals = {}
+        self._wake = threading.Event()
+        self._full = False
+        self._stopped = False
+        self.worker = threading.Thread(target=self._run, name='db-sweeper', daemon=True)
+        self.worker.start()
+
+    def run_now(self, full=False):
+        self._full = self._full or full
+        self._wake.set()
+
+    def close(self):
+        self._stopped = True
+        self._wake.set()
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                if self._stopped:
+                    break
+                full, self._full = self._full, False
+                try:
+                    metrics = sweep(conn, full=full, batch_size=self.batch_size)
+                except Exception as e:
+                    if self.on_error is not None:
+                        self.on_error(e)
+                    continue
+                self.last = metrics
+                self.runs += 1
+                for name, value in metrics.items():
+                    if name not in ('now', 'since'):
+                        self.totals[name] = self.totals.get(name, 0) + value
+                if self.on_sweep is not None:
+                    self.on_sweep(metrics)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expire tickets of past events and release resources whose bookings ended.")
+    parser.add_argument('--db', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    parser.add_argument('--full', action='store_true', help="rescan everything instead of what ended since the last sweep")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--interval', type=float, help="keep sweeping every INTERVAL seconds")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        while True:
+            print(format_metrics(sweep(conn, full=args.full, batch_size=args.batch_size)), flush=True)
+            if not args.interval:
+                break
+            args.full = False
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
@@ -0,0 +1,127 @@
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from db_connection import connect
+from db_queries import run
+from db_setup import SEAT_TYPES, TICKET_TYPES
+
+DEFAULT_HOLD_SECONDS = 600
+# Batches this large mark themselves as a bulk insert, so the per-row counter and
+# version triggers skip them, and add the same totals once per seat instead.
+BULK_ROWS = 5000
+
+
+def generate_ticket_inventory(conn, event_id, seat_counts, ticket_type='one_day'):
+    if ticket_type not in TICKET_TYPES:
+        raise ValueError(f"Ticket type must be one of {', '.join(TICKET_TYPES)}.")
+    counts = {}
+    for seat, count in seat_counts.items():
+        if seat not in SEAT_TYPES:
+            raise ValueError(f"Seat must be one of {', '.join(SEAT_TYPES)}.")
+        count = int(count or 0)
+        if count < 0:
+            raise ValueError("Ticket counts cannot be negative.")
+        if count:
+            counts[seat] = count
+
+    cursor = conn.cursor()
+    if run(cursor, 'event_exists', (event_id,)).fetchone() is None:
+        raise ValueError(f"Event {event_id} does not exist.")
+
+    bulk = sum(counts.values()) >= BULK_ROWS
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        if bulk:
+            run(cursor, 'bulk_insert_begin', ('Kravtsov_Tickets',))
+        for seat, count in counts.items():
+            run(cursor, 'generate_tickets', (count, event_id, ticket_type, seat))
+            if bulk:
+                run(cursor, 'ticket_counts_add', (event_id, seat, ticket_type, 'unsold', count))
+        if bulk:
+            run(cursor, 'table_rows_added', (sum(counts.values()), 'Kravtsov_Tickets'))
+            run(cursor, 'bulk_insert_end', ('Kravtsov_Tickets',))
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return counts
+
+
+def _claim_request(seat, quantity):
+    if seat not in SEAT_TYPES:
+        raise ValueError(f"Seat must be one of {', '.join(SEAT_TYPES)}.")
+    quantity = int(quantity)
+    if quantity <= 0:
+        raise ValueError("Quantity must be positive.")
+    return quantity
+
+
+def _id_list(ids):
+    return json.dumps([int(id_value) for id_value in ids])
+
+
+def _now(now=None):
+    return (now or datetime.now()).replace(microsecond=0)
+
+
+def claim_tickets(cursor, event_id, seat, quantity, user_id, hold_seconds=None, now=None):
+    # The outer status/hold guard makes the UPDATE safe on its own; BEGIN IMMEDIATE in the
+    # caller just stops concurrent sellers from picking the same candidates and retrying.
+    # Lapsed holds count as free, so they need no cleanup before being resold.
+    quantity = _claim_request(seat, quantity)
+    now = now or datetime.now()
+    if hold_seconds is None:
+        name, params = 'sell_tickets', (user_id,)
+    else:
+        name, params = 'hold_tickets', (user_id, _now(now + timedelta(seconds=int(hold_seconds))))
+    run(cursor, name, params + (event_id, seat, _now(now), quantity, _now(now)))
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def confirm_held_tickets(cursor, user_id, ticket_ids, now=None):
+    if not ticket_ids:
+        return []
+    run(cursor, 'confirm_held_tickets', (_id_list(ticket_ids), user_id, _now(now)))
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def release_held_tickets(cursor, user_id, ticket_ids=None):
+    if ticket_ids is None:
+        return run(cursor, 'release_held_tickets', (user_id,)).rowcount
+    return run(cursor, 'release_held_tickets_by_id', (user_id, _id_list(ticket_ids))).rowcount
+
+
+def ticket_counts(conn, event_id):
+    return run(conn, 'ticket_counts', (event_id,)).fetchall()
+
+
+def verify_ticket_counts(conn):
+    expected = {row[:4]: row[4] for row in run(conn, 'ticket_counts_expected')}
+    stored = {row[:4]: row[4] for row in run(conn, 'ticket_counts_stored')}
+    return [(key, stored.get(key, 0), expected.get(key, 0))
+            for key in sorted(expected.keys() | stored.keys(), key=str)
+            if stored.get(key, 0) != expected.get(key, 0)]
+
+
+def rebuild_ticket_counts(conn):
+    with conn:
+        run(conn, 'ticket_counts_clear')
+        run(conn, 'ticket_counts_rebuild')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or rebuild the per-event ticket inventory counters.")
+    parser.add_argument('command', choices=('verify', 'rebuild'))
+    parser.add_argument('--db', help="database file (default: $STADIUM_DB_PATH or event_management.db)")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == 'rebuild':
+        rebuild_ticket_counts(conn)
+    mismatches = verify_ticket_counts(conn)
+    conn.close()
+    for (event_id, seat, ticket_type, status), stored, expected in mismatches:
+        print(f"event {event_id} {seat}/{ticket_type}/{status}: counter {stored}, actual {expected}")
+    print(f"{len(mismatches)} mismatched counters.")
+    raise SystemExit(1 if mismatches else 0)
@@ -0,0 +1,293 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from db_connection import connect, TIMESTAMP_FORMAT
+
+SUB_BUCKET_BITS = 5
+PROGRESS_STEPS = 1000
+DEFAULT_SLOW_MS = 100.0
+RECENT_STATEMENTS = 500
+RECENT_SLOW = 100
+UNATTRIBUTED = 'unattributed'
+
+# Frames from these files only carry work for someone else; an operation is named
+# after the first caller outside them.
+INFRASTRUCTURE = {'db_executor.py', 'db_paging.py', 'db_changes.py', 'db_trace.py'}
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class LatencyHistogram:
+    # HDR-style log-linear buckets over whole microseconds: exact below 2**SUB_BUCKET_BITS,
+    # then 2**(SUB_BUCKET_BITS - 1) buckets per power of two, so any reported value is
+    # within about 3% of the true one while memory stays a few hundred counters.
+    def __init__(self, bits=SUB_BUCKET_BITS):
+        self.bits = bits
+        self.sub_buckets = 1 << bits
+        self.half = self.sub_buckets // 2
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, micros):
+        if micros < self.sub_buckets:
+            return micros
+        shift = micros.bit_length() - self.bits
+        return self.sub_buckets + (shift - 1) * self.half + (micros >> shift) - self.half
+
+    def _value(self, index):
+        # Midpoint of the bucket, in microseconds.
+        if index < self.sub_buckets:
+            return index
+        shift, mantissa = divmod(index - self.sub_buckets, self.half)
+        shift += 1
+        return ((mantissa + self.half) << shift) + ((1 << shift) - 1) / 2
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1000000))
+        index = self._index(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, percent):
+        # Seconds at or below which `percent` of the recorded values fall.
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index) / 1000000, self.max)
+        return self.max
+
+    def summary(self):
+        ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+        return {'count': self.count, 'mean_ms': ms(self.total / self.count if self.count else None),
+                'p50_ms': ms(self.percentile(50)), 'p95_ms': ms(self.percentile(95)),
+                'p99_ms': ms(self.percentile(99)), 'max_ms': ms(self.max)}
+
+
+class TracedCursor(sqlite3.Cursor):
+    # Times execute and every fetch against the statement that produced the rows.
+    def execute(self, sql, parameters=()):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().execute(sql, parameters)
+        self._statement = tracer.begin(sql, parameters)
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            tracer.end(self._statement)
+
+    def executemany(self, sql, seq_of_parameters):
+        tracer = self.connection.tracer
+        if tracer is None:
+            return super().executemany(sql, seq_of_parameters)
+        self._statement = tracer.begin(sql, None)
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            tracer.end(self._statement)
+
+    def _fetch(self, fetch, *args):
+        statement = getattr(self, '_statement', None)
+        if statement is None:
+            return fetch(*args)
+        tracer = self.connection.tracer
+        tracer.resume(statement)
+        try:
+            rows = fetch(*args)
+        finally:
+            tracer.end(statement)
+        statement['rows'] += len(rows) if isinstance(rows, list) else rows is not None
+        return rows
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    # Connection.execute would run the statement on the C cursor directly, skipping
+    # TracedCursor, so the shortcuts go through cursor() explicitly. Nothing is traced
+    # until Tracer.connect has set `tracer` (connect() runs its PRAGMAs before that).
+    tracer = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if self.tracer is None:
+            return super().commit()
+        statement = self.tracer.begin('COMMIT', None)
+        try:
+            super().commit()
+        finally:
+            self.tracer.end(statement)
+
+
+class Tracer:
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS, slow_log=None, pass_through=()):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.pass_through = set(pass_through)
+        self.histograms = {}
+        self.statement_counts = {}
+        self.recent = deque(maxlen=RECENT_STATEMENTS)
+        self.slow = deque(maxlen=RECENT_SLOW)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def connect(self, path=None, **kwargs):
+        conn = connect(path, factory=TracedConnection, **kwargs)
+        conn.tracer = self
+        conn.set_trace_callback(self._traced)
+        conn.set_progress_handler(self._progress, PROGRESS_STEPS)
+        return conn
+
+    def caller(self, depth=1):
+        # The operation a task belongs to: the innermost public function outside the
+        # executor plumbing and `pass_through` helpers, e.g. lookup_staff_events, or a
+        # dialog's nested save as show_add_event_dialog.save. The walk stops at the Tk
+        # event loop that dispatched the callback.
+        frame = sys._getframe(depth + 1)
+        fallback = None
+        while frame is not None and not frame.f_globals.get('__name__', '').startswith('tkinter'):
+            code = frame.f_code
+            # co_qualname is new in Python 3.11; before that a nested save is just "save".
+            qualname = getattr(code, 'co_qualname', code.co_name)
+            name = qualname.split('.', 1)[-1].replace('<locals>.', '') if '.' in qualname else code.co_name
+            filename = os.path.basename(code.co_filename)
+            if filename in INFRASTRUCTURE:
+                if filename != 'db_executor.py':
+                    fallback = fallback or qualname
+            elif not code.co_name.startswith(('_', '<')) and code.co_name not in self.pass_through:
+                return name
+            frame = frame.f_back
+        return fallback or UNATTRIBUTED
+
+    def run(self, conn, name, task):
+        # Run task(conn) as operation `name`, recording its latency and checking the
+        # statements it ran against the slow-query threshold once it is done.
+        local = self._local
+        local.operation, local.statements, local.traced = name, [], 0
+        started = time.perf_counter()
+        try:
+            return task(conn)
+        finally:
+            seconds = time.perf_counter() - started
+            statements, traced = local.statements, local.traced
+            local.operation = local.statements = None
+            with self._lock:
+                self.histograms.setdefault(name, LatencyHistogram()).record(seconds)
+                self.statement_counts[name] = self.statement_counts.get(name, 0) + traced
+            self._check_slow(conn, statements)
+
+    def begin(self, sql, parameters):
+        statement = {'operation': getattr(self._local, 'operation', None) or UNATTRIBUTED,
+                     'sql': ' '.join(sql.split()), 'parameters': parameters, 'seconds': 0.0, 'rows': 0,
+                     'steps': 0, 'at': datetime.now()}
+        pending = getattr(self._local, 'statements', None)
+        if pending is not None:
+            pending.append(statement)
+        with self._lock:
+            self.recent.append(statement)
+        self.resume(statement)
+        return statement
+
+    def resume(self, statement):
+        statement['_started'] = time.perf_counter()
+        statement['_steps'] = getattr(self._local, 'steps', 0)
+
+    def end(self, statement):
+        statement['seconds'] += time.perf_counter() - statement.pop('_started')
+        statement['steps'] += (getattr(self._local, 'steps', 0) - statement.pop('_steps')) * PROGRESS_STEPS
+        if getattr(self._local, 'statements', None) is None:
+            self._check_slow(None, [statement])
+
+    def _traced(self, sql):
+        # Everything SQLite runs, including implicit BEGIN/COMMIT, executescript bodies
+        # and trigger programs, which the cursor wrappers never see.
+        self._local.traced = getattr(self._local, 'traced', 0) + 1
+
+    def _progress(self):
+        self._local.steps = getattr(self._local, 'steps', 0) + 1
+        return 0
+
+    def _check_slow(self, conn, statements):
+        for statement in statements:
+            if statement['seconds'] * 1000 < self.slow_ms:
+                continue
+            entry = {key: value for key, value in statement.items() if not key.startswith('_')}
+            entry['ms'] = round(entry.pop('seconds') * 1000, 3)
+            entry['plan'] = self._plan(conn, statement) if conn is not None else []
+            with self._lock:
+                self.slow.append(entry)
+            if self.slow_log:
+                with open(self.slow_log, 'a') as f:
+                    f.write(json.dumps(entry, default=_json_default) + '\n')
+
+    def _plan(self, conn, statement):
+        # Run on a plain cursor so capturing the plan is not itself traced.
+        if not statement['sql'].upper().startswith(EXPLAINABLE) or statement['parameters'] is None:
+            return []
+        try:
+            cursor = sqlite3.Cursor(conn)
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement['sql']}", statement['parameters'])
+            return [row[3] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+
+    def summary(self):
+        # {operation: histogram summary plus statements per call}, slowest p95 first.
+        with self._lock:
+            summaries = {name: dict(histogram.summary(), statements=round(self.statement_counts[name] / histogram.count, 1))
+                         for name, histogram in self.histograms.items()}
+        return dict(sorted(summaries.items(), key=lambda item: -(item[1]['p95_ms'] or 0)))
+
+    def slow_statements(self):
+        with self._lock:
+            return list(self.slow)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.statement_counts.clear()
+            self.recent.clear()
+            self.slow.clear()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
@@ -0,0 +1,138 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+
+from db_connection import connect
+from db_services import StadiumService, ConflictError
+from db_setup import setup_database
+
+SEATS = ('sitting', 'standing')
+
+
+def prepare_database(path, tickets_per_seat, users):
+    setup_database(path)
+    service = StadiumService(connect(path))
+    event_id = service.create('events', {
+        'event_name': 'Stress Match', 'event_type': 'sports', 'event_holder': 'Stress',
+        'event_start': '2030-01-01 18:00:00', 'event_end': '2030-01-01 21:00:00'})
+    service.generate_tickets(event_id, {seat: tickets_per_seat for seat in SEATS})
+    user_ids = [service.create('users', {'name': f'User {i}', 'email': f'user{i}@stress.test'}) for i in range(users)]
+    service.conn.close()
+    return event_id, user_ids
+
+
+def worker(path, event_id, user_ids, seed, hold_ratio, hold_seconds, results):
+    rng = random.Random(seed)
+    service = StadiumService(connect(path))
+    sold, abandoned = [], []
+    stats = Counter()
+    sold_out = set()
+    while len(sold_out) < len(SEATS):
+        seat = rng.choice([seat for seat in SEATS if seat not in sold_out])
+        user_id = rng.choice(user_ids)
+        quantity = rng.randint(1, 4)
+        try:
+            if rng.random() < hold_ratio:
+                held = service.hold_tickets(event_id, seat, quantity, user_id, hold_seconds)
+                if rng.random() < 0.5:
+                    # Walk away from the hold; the tickets must come back once it lapses.
+                    abandoned.extend(held)
+                    stats['abandoned'] += 1
+                    continue
+                claimed = [(ticket_id, user_id) for ticket_id in service.confirm_hold(user_id, held)]
+            else:
+                claimed = [(ticket_id, user_id) for ticket_id in service.sell_tickets(event_id, seat, quantity, user_id)]
+            sold.extend(claimed)
+            stats['sales'] += 1
+        except ConflictError:
+            stats['conflicts'] += 1
+            # Either fewer tickets are left than requested or the rest sit under live holds.
+            if not any(row['seat'] == seat and row['status'] == 'unsold' for row in service.ticket_counts(event_id)):
+                sold_out.add(seat)
+            elif quantity > 1:
+                continue
+            else:
+                time.sleep(0.05)
+        except sqlite3.OperationalError:
+            stats['busy'] += 1
+    service.conn.close()
+    results.put((sold, abandoned, dict(stats)))
+
+
+def verify(path, event_id, sold):
+    conn = connect(path)
+    rows = dict((ticket_id, user_id) for ticket_id, user_id in conn.execute(
+        "SELECT ticket_id, user_id FROM Kravtsov_Tickets WHERE event_id = ? AND status = 'sold'", (event_id,)))
+    total = conn.execute("SELECT COUNT(*) FROM Kravtsov_Tickets WHERE event_id = ?", (event_id,)).fetchone()[0]
+    conn.close()
+
+    claimed = Counter(ticket_id for ticket_id, _ in sold)
+    problems = []
+    double_sales = [ticket_id for ticket_id, count in claimed.items() if count > 1]
+    if double_sales:
+        problems.append(f"{len(double_sales)} tickets were sold more than once, e.g. {double_sales[:5]}")
+    if len(claimed) != len(rows):
+        problems.append(f"workers claimed {len(claimed)} tickets but {len(rows)} are sold in the database")
+    wrong_owner = [ticket_id for ticket_id, user_id in sold if rows.get(ticket_id) != user_id]
+    if wrong_owner:
+        problems.append(f"{len(wrong_owner)} tickets belong to a different user than the buyer")
+    if len(rows) != total:
+        problems.append(f"{total - len(rows)} tickets were left unsold")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process stress test for the ticket sale and hold path.")
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--tickets', type=int, default=5000, help="tickets per seat type")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--hold-ratio', type=float, default=0.3)
+    parser.add_argument('--hold-seconds', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stress.db')
+        event_id, user_ids = prepare_database(path, args.tickets, args.users)
+
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=worker, args=(path, event_id, user_ids, seed, args.hold_ratio,
+                                                                 args.hold_seconds, results))
+                   for seed in range(args.processes)]
+        started = time.perf_counter()
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        seconds = time.perf_counter() - started
+        for process in workers:
+            process.join()
+
+        sold = [claim for outcome in outcomes for claim in outcome[0]]
+        stats = sum((Counter(outcome[2]) for outcome in outcomes), Counter())
+        problems = verify(path, event_id, sold)
+
+    summary = {
+        'processes': args.processes,
+        'tickets': args.tickets * len(SEATS),
+        'sold': len(sold),
+        'sales': stats['sales'],
+        'abandoned_holds': stats['abandoned'],
+        'conflicts': stats['conflicts'],
+        'busy': stats['busy'],
+        'seconds': round(seconds, 3),
+        'sales_per_second': round(stats['sales'] / seconds, 1),
+        'tickets_per_second': round(len(sold) / seconds, 1),
+        'problems': problems,
+    }
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        for key, value in summary.items():
+            print(f"{key:>20}: {value}")
+    raise SystemExit(1 if problems else 0)
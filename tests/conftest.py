@@ -0,0 +1,41 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_connection import connect
+from db_services import StadiumService
+from db_setup import setup_database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'stadium.db')
+    setup_database(path)
+    return path
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = connect(db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def service(conn):
+    return StadiumService(conn)
+
+
+@pytest.fixture
+def make_event(service):
+    # Events start tomorrow unless told otherwise, so they count as upcoming.
+    def make_event(name='Cup Final', start=None, hours=2, **values):
+        start = start or datetime.now().replace(microsecond=0) + timedelta(days=1)
+        return service.create('events', {'event_name': name, 'event_type': 'sports', 'event_start': start,
+                                         'event_end': start + timedelta(hours=hours), 'event_holder': 'League',
+                                         **values})
+    return make_event
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db_connection import connect
+from db_services import ConflictError, NotFoundError, StadiumService
+
+START = datetime(2030, 6, 1, 18, 0)
+
+
+@pytest.fixture
+def facility(service):
+    return service.create('facilities', {'facility_name': 'Main Arena', 'facility_status': 'free'})
+
+
+def test_booking_missing_resource_or_event_is_not_found(service, make_event, facility):
+    event_id = make_event(start=START)
+    with pytest.raises(NotFoundError, match='Facility 999'):
+        service.assign_facility_to_event(999, event_id, START, START + timedelta(hours=2))
+    with pytest.raises(NotFoundError, match='Event 999'):
+        service.assign_facility_to_event(facility, 999, START, START + timedelta(hours=2))
+    assert service.facility_events(facility) == []
+
+
+def test_index_survives_unrelated_commits(db_path, service, make_event, facility):
+    first = make_event('First', START)
+    service.assign_facility_to_event(facility, first, START, START + timedelta(hours=2))
+    service.bookings.sync()
+    assert service.bookings.indexes
+
+    other = StadiumService(connect(db_path))
+    other.create('users', {'name': 'Ann', 'email': 'ann@example.com'})
+    service.bookings.sync()
+    assert service.bookings.indexes
+
+    # A booking made elsewhere does drop the cached index, so it is seen here.
+    second = other.create('events', {'event_name': 'Second', 'event_type': 'music', 'event_start': START,
+                                     'event_end': START + timedelta(hours=2), 'event_holder': 'Band'})
+    other.assign_facility_to_event(facility, second, START + timedelta(hours=3), START + timedelta(hours=4))
+    other.conn.close()
+    third = make_event('Third', START)
+    with pytest.raises(ConflictError):
+        service.assign_facility_to_event(facility, third, START + timedelta(hours=3), START + timedelta(hours=5))
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = sorted(name for name in os.listdir(ROOT)
+                 if name.endswith('.py') and 'argparse.ArgumentParser' in open(os.path.join(ROOT, name)).read())
+
+
+@pytest.mark.parametrize('script', SCRIPTS)
+def test_help(script):
+    # argparse %-formats help strings, so a stray % only shows up when --help runs.
+    result = subprocess.run([sys.executable, script, '--help'], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert 'usage:' in result.stdout
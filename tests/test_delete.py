@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+
+def test_delete_many_reports_cascaded_rows(service, make_event):
+    facility_id = service.create('facilities', {'facility_name': 'Main Arena', 'facility_status': 'free'})
+    start = datetime(2030, 5, 1, 18, 0)
+    events = [make_event(f"Match {i}", start + timedelta(days=i)) for i in range(3)]
+    for day, event_id in enumerate(events[:2]):
+        service.generate_tickets(event_id, {'sitting': 4, 'standing': 1})
+        service.assign_facility_to_event(facility_id, event_id, start + timedelta(days=day),
+                                         start + timedelta(days=day, hours=2))
+
+    removed = service.delete_many('events', events[:2] + [999])
+
+    assert removed == {'Kravtsov_Events': 2, 'Kravtsov_Tickets': 10, 'Kravtsov_Facilities_Events': 2}
+    assert [event['event_id'] for event in service.find('events')] == events[2:]
+    assert service.delete_many('events', [999]) == {}
+
+
+def test_purge_removes_only_ended_events(service, make_event):
+    ended = make_event('Old Match', datetime(2020, 1, 1, 18, 0))
+    upcoming = make_event()
+    service.generate_tickets(ended, {'sitting': 3})
+
+    assert service.purge_events(datetime(2021, 1, 1)) == {'Kravtsov_Events': 1, 'Kravtsov_Tickets': 3}
+    assert [event['event_id'] for event in service.find('events')] == [upcoming]
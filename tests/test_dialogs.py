@@ -0,0 +1,34 @@
+import db_app_final
+from db_services import ENTITIES
+
+
+class Entry:
+    def __init__(self):
+        self.value = ''
+
+    def insert(self, index, value):
+        self.value = str(value) + self.value
+
+
+def test_update_ticket_dialog_fills_by_column(service, make_event):
+    # Tickets carry held_by and hold_expires besides the columns the dialog edits.
+    event_id = make_event()
+    user_id = service.create('users', {'name': 'Ann', 'email': 'ann@example.test'})
+    ticket_id = service.create('tickets', {'event_id': event_id, 'user_id': user_id, 'ticket_type': 'one_day',
+                                           'seat': 'standing', 'status': 'sold'})
+    row = service.get('tickets', ticket_id)
+    assert len(row) > len(ENTITIES['tickets'][2]) + 1
+
+    fields = [("Event ID:", None), ("User ID:", None), ("Type:", None), ("Seat:", None), ("Status:", None)]
+    entries = {label: Entry() for label, _ in fields}
+    db_app_final.EventManagementGUI.fill_entries(None, entries, fields, 'tickets', row)
+    assert [entries[label].value for label, _ in fields] == [str(event_id), str(user_id), 'one_day', 'standing', 'sold']
+
+
+def test_fill_entries_leaves_nulls_blank(service, make_event):
+    ticket_id = service.create('tickets', {'event_id': make_event(), 'ticket_type': 'one_day',
+                                           'seat': 'sitting', 'status': 'unsold'})
+    fields = [("Event ID:", None), ("User ID:", None)]
+    entries = {label: Entry() for label, _ in fields}
+    db_app_final.EventManagementGUI.fill_entries(None, entries, fields, 'tickets', service.get('tickets', ticket_id))
+    assert entries["User ID:"].value == ''
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+
+import pytest
+
+from db_import import _json_array, import_file
+
+
+@pytest.mark.parametrize('size', [1, 7, 1 << 16])
+def test_json_array_streams_records(size):
+    records = [{'name': f"User {i}", 'email': f"user{i}@example.com", 'tags': [i, None]} for i in range(50)]
+    assert list(_json_array(io.StringIO(json.dumps(records, indent=2)), size)) == records
+
+
+@pytest.mark.parametrize('text', ['{"name": "x"}', '[{"name": "x"}', '[{"name": "x"} {}]', '[{"name": '])
+def test_json_array_rejects_malformed_files(text):
+    with pytest.raises(ValueError):
+        list(_json_array(io.StringIO(text), 4))
+
+
+def read_rejects(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(int(row['line']), row['error'], json.loads(row['record'])) for row in csv.DictReader(f)]
+
+
+@pytest.mark.parametrize('suffix', ['.json', '.jsonl'])
+def test_import_writes_rejects(conn, tmp_path, suffix, service):
+    records = [
+        {'name': 'Alice', 'email': 'alice@example.com'},
+        {'name': 'Bob', 'email': 'not an email'},
+        {'name': 'Carol', 'email': 'alice@example.com'},
+        {'name': 'Dave', 'email': 'dave@example.com'},
+    ]
+    path = tmp_path / f"users{suffix}"
+    path.write_text(json.dumps(records) if suffix == '.json' else '\n'.join(map(json.dumps, records)))
+    rejects_path = tmp_path / 'rejects.csv'
+
+    stats = import_file(conn, 'users', str(path), batch_size=2, rejects_path=str(rejects_path))
+
+    assert (stats['read'], stats['inserted'], stats['rejected']) == (4, 2, 2)
+    assert [line for line, _, _ in read_rejects(rejects_path)] == [2, 3]
+    assert [record for _, _, record in read_rejects(rejects_path)] == records[1:3]
+    assert sorted(user['name'] for user in service.find('users')) == ['Alice', 'Dave']
+
+
+def test_import_rejects_missing_references(conn, tmp_path):
+    path = tmp_path / 'tickets.jsonl'
+    path.write_text(json.dumps({'event_id': 999, 'user_id': None, 'ticket_type': 'one_day',
+                                'seat': 'sitting', 'status': 'unsold'}))
+    rejects_path = tmp_path / 'rejects.csv'
+
+    stats = import_file(conn, 'tickets', str(path), rejects_path=str(rejects_path))
+
+    assert (stats['inserted'], stats['rejected']) == (0, 1)
+    assert read_rejects(rejects_path)[0][1] == "event_id 999 does not exist"
+
+
+def test_import_without_rejects_writes_no_file(conn, tmp_path):
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps([{'name': 'Alice', 'email': 'alice@example.com'}]))
+    rejects_path = tmp_path / 'rejects.csv'
+
+    assert import_file(conn, 'users', str(path), rejects_path=str(rejects_path))['inserted'] == 1
+    assert not rejects_path.exists()
@@ -0,0 +1,103 @@
+import pytest
+
+from db_paging import KeysetPager, TreeviewWindow
+
+
+class Tree:
+    # The few ttk.Treeview calls TreeviewWindow makes, on a plain list of item ids.
+    def __init__(self):
+        self.order, self.values = [], {}
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def insert(self, parent, index, iid, values):
+        self.order.insert(len(self.order) if index == 'end' else index, iid)
+        self.values[iid] = values
+
+    def item(self, iid, values):
+        self.values[iid] = values
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.order.remove(iid)
+            del self.values[iid]
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def yview_scroll(self, number, what):
+        pass
+
+
+class Executor:
+    # Runs each task at once on the test's connection.
+    on_error = None
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def submit(self, task, callback, errback):
+        callback(task(self.conn))
+
+
+@pytest.fixture
+def window():
+    window = TreeviewWindow(Tree(), KeysetPager('Kravtsov_Staff', 'staff_id'), executor=None)
+    window.pager.set_query(order='staff_name')
+    window._apply([(1, 'Ann'), (2, 'Bob'), (3, 'Cid'), (4, 'Dan')])
+    return window
+
+
+def test_apply_moves_rows_whose_sort_key_changed(window):
+    window._apply([(2, 'Bob'), (3, 'Cid'), (4, 'Dan'), (1, 'Eve')])
+    assert window.tree.get_children() == ('2', '3', '4', '1')
+    assert window.tree.values['1'] == (1, 'Eve')
+
+
+def test_apply_inserts_and_drops_rows(window):
+    window._apply([(5, 'Abe'), (1, 'Ann'), (3, 'Cid'), (2, 'Dee')])
+    assert window.tree.get_children() == ('5', '1', '3', '2')
+    assert set(window.rows) == {'1', '2', '3', '5'}
+
+
+@pytest.fixture
+def users(service):
+    return [service.create('users', {'name': name, 'email': f"{name.lower()}@example.com"})
+            for name in ('Hal', 'Gus', 'Fay', 'Eve', 'Dan', 'Cid', 'Bob', 'Ann')]
+
+
+def sorted_window(conn, page_size):
+    window = TreeviewWindow(Tree(), KeysetPager('Kravtsov_Users', 'user_id', page_size), Executor(conn), max_pages=2)
+    window.pager.set_query(order='name')
+    window.reset()
+    return window
+
+
+def names(window):
+    return [window.rows[iid][1] for iid in window.tree.get_children()]
+
+
+def test_refresh_after_deleting_the_edge_rows(conn, service, users):
+    window = sorted_window(conn, 2)
+    window.on_scroll(0.5, 1.0)
+    window.on_scroll(0.5, 1.0)
+    assert names(window) == ['Cid', 'Dan', 'Eve', 'Fay'] and not window.at_start and not window.at_end
+
+    first, last = window.tree.get_children()[0], window.tree.get_children()[-1]
+    service.delete_many('users', [int(first), int(last)])
+    window.refresh()
+    assert names(window) == ['Dan', 'Eve']
+
+
+def test_scroll_after_deleting_the_edge_row(conn, service, users):
+    window = sorted_window(conn, 3)
+    service.delete('users', int(window.tree.get_children()[-1]))
+    # The deleted Cid stays shown until the next refresh; the page after it still loads.
+    window.on_scroll(0.5, 1.0)
+    assert names(window) == ['Ann', 'Bob', 'Cid', 'Dan', 'Eve', 'Fay']
+    assert not window.at_end
@@ -0,0 +1,24 @@
+def add_staff(service, name):
+    return service.create('staff', {'staff_name': name, 'staff_email': f"{name.split()[0].lower()}@example.com",
+                                    'phone_number': '555-0100', 'position': 'Usher', 'schedule_start': '09:00',
+                                    'schedule_end': '17:00', 'salary': '1000'})
+
+
+def test_staff_matches_are_limited_after_ranking(service):
+    for name in ('Anna Taylor', 'Annabel Anderson', 'Ann Annis', 'Bob Stone'):
+        add_staff(service, name)
+
+    matches = service.suggest('staff', 'ann', limit=2)
+    assert len(matches) == 2
+    assert all('Ann' in match['label'] for match in matches)
+    assert service.suggest('staff', 'ann', limit=10)[:2] == matches
+    assert service.suggest('staff', 'zz') == []
+
+
+def test_search_keeps_the_best_matches_under_the_limit(service):
+    for i in range(5):
+        service.create('users', {'name': f"Quinn Alpha Beta Gamma Delta {i}", 'email': f"q{i}@example.com"})
+    best = service.create('users', {'name': 'Quinn', 'email': 'quinn@example.com'})
+
+    results = service.search('quinn', limit=1)
+    assert [(result['entity'], result['id']) for result in results] == [('users', best)]
@@ -0,0 +1,60 @@
+import pytest
+
+from db_bench import TABS
+from db_connection import connect
+from db_generate import generate, scale_counts
+from db_search import SORTABLE
+from db_setup import check_query_plans, setup_database
+
+
+class Recorder:
+    # Stands in for a cursor to capture the statement a pager would run.
+    def __init__(self, connection):
+        self.connection = connection
+        self.statement = None
+        self.description = ()
+
+    def execute(self, sql, params=()):
+        self.statement = (sql, params)
+
+    def fetchall(self):
+        return []
+
+
+@pytest.fixture(scope='module')
+def generated(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('plans') / 'generated.db')
+    setup_database(path)
+    conn = connect(path)
+    generate(conn, scale_counts(5000))
+    yield conn
+    conn.close()
+
+
+def test_indexed_queries_use_their_index(conn):
+    failed = [(name, index, plan) for name, index, uses_index, plan in check_query_plans(conn) if not uses_index]
+    assert failed == []
+
+
+def test_indexed_queries_use_their_index_after_analyze(generated):
+    failed = [(name, index, plan) for name, index, uses_index, plan in check_query_plans(generated) if not uses_index]
+    assert failed == []
+
+
+@pytest.mark.parametrize('entity,column', [(entity, column) for entity, columns in SORTABLE.items() for column in columns])
+@pytest.mark.parametrize('descending', [False, True])
+def test_sorted_pages_read_in_index_order(generated, entity, column, descending):
+    table, key, count_table, pager_class = TABS[entity]
+    pager = pager_class(table, key, count_table=count_table)
+    pager.set_query((), column, descending)
+    # Edges given by key alone (API cursors) and by key and sort value (the GUI window).
+    pages = [pager.first_page]
+    for sort_value in (None, generated.execute(f"SELECT {column} FROM {table} WHERE {key} = 1").fetchone()[0]):
+        pages += [lambda cursor, s=sort_value: pager.page_after(cursor, 1, s),
+                  lambda cursor, s=sort_value: pager.page_before(cursor, 1, s),
+                  lambda cursor, s=sort_value: pager.window(cursor, 1, 50, 100, s, s)]
+    for page in pages:
+        cursor = Recorder(generated)
+        page(cursor)
+        plan = [row[-1] for row in generated.execute(f"EXPLAIN QUERY PLAN {cursor.statement[0]}", cursor.statement[1])]
+        assert not any('TEMP B-TREE' in step for step in plan), plan
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db_scheduler import parse_ids
+from db_services import NotFoundError
+
+DAY = datetime(2030, 6, 1)
+
+
+@pytest.fixture
+def facilities(service):
+    return [service.create('facilities', {'facility_name': name, 'facility_status': status})
+            for name, status in (('North', 'free'), ('South', 'free'), ('Box', 'private'))]
+
+
+def at(hour, minute=0):
+    return DAY + timedelta(hours=hour, minutes=minute)
+
+
+def placements(result):
+    return {row['event_id']: row['facility_id'] for row in result['placed']}
+
+
+def test_parse_ids():
+    assert parse_ids("3-5, 1 4 9") == [3, 4, 5, 1, 9]
+
+
+def test_schedule_reuses_facilities_in_start_order(service, make_event, facilities):
+    # Events run two hours; Box is private and is never a candidate.
+    north, south, _ = facilities
+    first = make_event('First', at(10))
+    second = make_event('Second', at(11))
+    third = make_event('Third', at(12, 30))
+    clash = make_event('Clash', at(12, 45))
+    fifth = make_event('Fifth', at(13))
+
+    result = service.schedule_facilities([first, second, third, clash, fifth])
+
+    assert placements(result) == {first: north, second: south, third: north, fifth: south}
+    assert result['unplaced'] == [{'event_id': clash, 'reason': "all 2 candidate facilities are in use"}]
+    assert result['applied'] and result['facilities_used'] == 2
+    assert [event['event_id'] for event in service.facility_events(north)] == [first, third]
+
+
+def test_schedule_avoids_existing_bookings(service, make_event, facilities):
+    north, south, _ = facilities
+    booked = make_event('Booked', at(10))
+    service.assign_facility_to_event(north, booked, at(10), at(12))
+    event_id = make_event('Overlap', at(11))
+
+    result = service.schedule_facilities([booked, event_id, 999])
+
+    assert placements(result) == {event_id: south}
+    assert result['unplaced'] == [{'event_id': booked, 'reason': f"already has facility {north}"},
+                                  {'event_id': 999, 'reason': "no such event"}]
+
+
+def test_schedule_dry_run_with_setup_time(service, make_event, facilities):
+    north, south, _ = facilities
+    first = make_event('First', at(16))
+    second = make_event('Second', at(18, 15))
+
+    # Half an hour either side makes the two overlap, so they need both facilities.
+    result = service.schedule_facilities([first, second], setup_minutes=30, dry_run=True)
+
+    assert not result['applied'] and placements(result) == {first: north, second: south}
+    assert (result['placed'][0]['usage_start'], result['placed'][0]['usage_end']) == (at(15, 30), at(18, 30))
+    assert service.facility_events(north) == []
+    assert placements(service.schedule_facilities([first, second])) == {first: north, second: north}
+
+
+def test_schedule_rejects_unknown_facility(service, make_event, facilities):
+    with pytest.raises(NotFoundError):
+        service.schedule_facilities([make_event()], facility_ids=[facilities[0], 999])
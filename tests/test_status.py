@@ -0,0 +1,35 @@
+import time
+from datetime import datetime, timedelta
+
+from db_connection import connect
+from db_status import LIVE_VIEWS, STATUS_VIEWS, StatusPager, snapshot_fresh
+
+
+def test_writes_keep_the_snapshot_fresh(conn, service, make_event):
+    facility = service.create('facilities', {'facility_name': 'Main Arena', 'facility_status': 'free'})
+    start = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    event_id = make_event(start=start)
+    service.assign_facility_to_event(facility, event_id, start, start + timedelta(hours=2))
+
+    assert snapshot_fresh(conn)
+    assert [row['facility_status'] for row in service.find('facilities')] == ['occupied']
+
+
+def test_readers_do_not_wait_for_the_write_lock(db_path, conn, service):
+    facility = service.create('facilities', {'facility_name': 'Main Arena', 'facility_status': 'free'})
+    writer = connect(db_path)
+    with writer:
+        writer.execute("UPDATE Kravtsov_Status_Snapshot SET stale = 1")
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        pager = StatusPager(STATUS_VIEWS['facility'], 'facility_id')
+        rows = pager.first_page(conn.cursor())
+        assert pager.table == LIVE_VIEWS['facility']
+        assert [(row[0], row[2]) for row in rows] == [(facility, 'free')]
+        assert [row['facility_id'] for row in service.find('facilities', 'arena')] == [facility]
+        assert time.perf_counter() - started < 1
+    finally:
+        writer.rollback()
+        writer.close()
+    assert not snapshot_fresh(conn)
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from db_sweeper import sweep
+
+
+def facility_status(service, facility_id):
+    return service.get('facilities', facility_id)['facility_status']
+
+
+def test_full_sweep_frees_occupied_resources_without_a_current_booking(conn, service, make_event):
+    now = datetime.now().replace(microsecond=0)
+    sweep(conn, now)
+    future = service.create('facilities', {'facility_name': 'North', 'facility_status': 'occupied'})
+    unbooked = service.create('facilities', {'facility_name': 'South', 'facility_status': 'occupied'})
+    busy = service.create('facilities', {'facility_name': 'East', 'facility_status': 'free'})
+    later = make_event('Later', now + timedelta(days=1))
+    service.assign_facility_to_event(future, later, now + timedelta(days=1), now + timedelta(days=1, hours=2))
+    running = make_event('Running', now - timedelta(hours=1))
+    service.assign_facility_to_event(busy, running, now - timedelta(hours=1), now + timedelta(hours=1))
+
+    # An incremental sweep only looks at bookings that ended since the last one.
+    sweep(conn, now + timedelta(seconds=1))
+    assert facility_status(service, future) == 'occupied'
+
+    metrics = sweep(conn, now + timedelta(seconds=2), full=True)
+    assert metrics['facility_freed'] == 2
+    assert [facility_status(service, f) for f in (future, unbooked, busy)] == ['free', 'free', 'occupied']
@@ -0,0 +1,78 @@
+import pytest
+
+from db_queries import run
+from db_services import ConflictError
+from db_tickets import BULK_ROWS, generate_ticket_inventory, verify_ticket_counts
+
+
+def row_count(conn):
+    return dict(run(conn, 'table_row_counts'))['Kravtsov_Tickets']
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def bulk_markers(conn):
+    return conn.execute("SELECT COUNT(*) FROM Kravtsov_Bulk_Inserts").fetchone()[0]
+
+
+@pytest.mark.parametrize('sitting', [10, BULK_ROWS])
+def test_generate_keeps_counters(conn, service, make_event, sitting):
+    event_id = make_event()
+    before = schema_version(conn)
+    generate_ticket_inventory(conn, event_id, {'sitting': sitting, 'standing': 3})
+    generate_ticket_inventory(conn, event_id, {'sitting': sitting})
+
+    # Bulk batches leave the schema alone, so other connections keep their prepared statements.
+    assert schema_version(conn) == before and bulk_markers(conn) == 0
+    assert verify_ticket_counts(conn) == []
+    assert row_count(conn) == 2 * sitting + 3
+    assert service.ticket_counts(event_id) == [
+        {'seat': 'sitting', 'ticket_type': 'one_day', 'status': 'unsold', 'count': 2 * sitting},
+        {'seat': 'standing', 'ticket_type': 'one_day', 'status': 'unsold', 'count': 3},
+    ]
+
+
+def test_failed_bulk_generate_leaves_no_marker(conn, make_event, monkeypatch):
+    event_id = make_event()
+
+    def failing_run(cursor, name, params=()):
+        if name == 'table_rows_added':
+            raise RuntimeError(name)
+        return run(cursor, name, params)
+
+    monkeypatch.setattr('db_tickets.run', failing_run)
+    with pytest.raises(RuntimeError):
+        generate_ticket_inventory(conn, event_id, {'sitting': BULK_ROWS})
+    assert bulk_markers(conn) == 0
+    generate_ticket_inventory(conn, event_id, {'sitting': 2})
+    assert row_count(conn) == 2 and verify_ticket_counts(conn) == []
+
+
+def test_insert_triggers_skip_only_marked_tables(conn, make_event):
+    event_id = make_event()
+    with conn:
+        run(conn, 'bulk_insert_begin', ('Kravtsov_Users',))
+        run(conn, 'generate_tickets', (3, event_id, 'one_day', 'sitting'))
+        run(conn, 'bulk_insert_end', ('Kravtsov_Users',))
+    assert row_count(conn) == 3 and verify_ticket_counts(conn) == []
+
+
+def test_hold_confirm_release(service, make_event):
+    event_id = make_event()
+    service.generate_tickets(event_id, {'sitting': 5})
+    alice = service.create('users', {'name': 'Alice', 'email': 'alice@example.com'})
+    bob = service.create('users', {'name': 'Bob', 'email': 'bob@example.com'})
+
+    held = service.hold_tickets(event_id, 'sitting', 2, alice)
+    assert len(held) == 2
+    with pytest.raises(ConflictError):
+        service.confirm_hold(bob, held)
+    assert service.confirm_hold(alice, held[:1]) == held[:1]
+    assert service.release_hold(alice) == 1
+
+    # The released ticket is free again, the confirmed one is sold.
+    assert len(service.hold_tickets(event_id, 'sitting', 4, bob)) == 4
+    counts = {row['status']: row['count'] for row in service.ticket_counts(event_id)}
+    assert counts == {'sold': 1, 'unsold': 4}
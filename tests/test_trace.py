@@ -0,0 +1,20 @@
+from db_trace import Tracer
+
+
+class Window:
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def lookup_staff_events(self):
+        return self.tracer.caller(0)
+
+    def show_add_event_dialog(self):
+        def save():
+            return self.tracer.caller(0)
+        return save()
+
+
+def test_caller_names_the_public_method():
+    window = Window(Tracer())
+    assert window.lookup_staff_events() == 'lookup_staff_events'
+    assert window.show_add_event_dialog() == 'show_add_event_dialog.save'